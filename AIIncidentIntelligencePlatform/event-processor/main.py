@@ -1,10 +1,31 @@
-"""Event Processor - Kafka 이벤트 소비, LLM 분류 호출, Redis/ES 저장, 리포트 발행"""
+"""Event Processor - Kafka 이벤트 소비, LLM 분류 호출, Redis/ES 저장, 리포트 발행
+
+이벤트를 BATCH_SIZE개가 모이거나 첫 이벤트 후 BATCH_MAX_WAIT_MS가 지나면 한 번에 분류를 요청한다.
+분류 요청은 공유 비동기 클라이언트(연결 재사용)로 최대 CLASSIFY_CONCURRENCY개까지 동시에 보내고,
+슬롯이 모두 차 있으면 다음 배치를 가져오지 않는다(역압). 그동안에는 파티션을 멈춘 채 poll을 계속 호출해
+재시도가 길어져도 max.poll.interval.ms를 넘겨 그룹에서 빠지지 않는다.
+오프셋은 자동 커밋하지 않고, 결과 저장(Redis, 리포트 발행)이 끝난 배치까지 가져온 순서대로만 커밋한다.
+실패한 배치는 커밋하지 않고 백오프로 다시 처리하며, BATCH_MAX_ATTEMPTS회 실패하면 DEAD_LETTER_TOPIC에 발행한 뒤에만 넘어간다.
+파티션이 회수되면(리밸런스) 그 전에 가져온 배치는 커밋하지 않는다(새 할당에서 커밋 위치부터 다시 가져옴).
+"""
 import os
+import sys
 import json
-import redis
-from kafka import KafkaConsumer, KafkaProducer
+import time
+import uuid
+import asyncio
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Set
+import redis.asyncio as aioredis
+from kafka import ConsumerRebalanceListener, KafkaConsumer, KafkaProducer, OffsetAndMetadata, TopicPartition
+from kafka.errors import KafkaError
 import httpx
-from prometheus_client import Counter, start_http_server
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+# 서비스 공용 모듈 (AIIncidentIntelligencePlatform/shared)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.log_template import template_key as fingerprint
 
 KAFKA_BOOTSTRAP = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9094")
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6380")
@@ -12,40 +33,517 @@ LLM_URL = os.getenv("LLM_LAYER_URL", "http://localhost:9200")
 EVENTS_TOPIC = os.getenv("EVENTS_TOPIC", "events")
 REPORTS_TOPIC = os.getenv("REPORTS_TOPIC", "incident-reports")
 METRICS_PORT = int(os.getenv("METRICS_PORT", "9091"))
+CONSUMER_GROUP_ID = os.getenv("CONSUMER_GROUP_ID", "event-processor")
+
+# 마이크로 배치 / 동시 분류 요청
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "100"))
+BATCH_MAX_WAIT_MS = int(os.getenv("BATCH_MAX_WAIT_MS", "200"))
+CLASSIFY_CONCURRENCY = int(os.getenv("CLASSIFY_CONCURRENCY", "4"))
+CLASSIFY_TIMEOUT = float(os.getenv("CLASSIFY_TIMEOUT", "30"))
+CLASSIFY_MAX_RETRIES = int(os.getenv("CLASSIFY_MAX_RETRIES", "3"))
+# 슬롯을 기다리는 동안 멈춘 파티션으로 poll하는 간격 (초, 그룹 멤버십 유지용)
+PAUSED_POLL_INTERVAL = 1.0
+
+# 배치 재처리 (실패한 배치는 커밋하지 않고 다시 처리, BATCH_MAX_ATTEMPTS회 실패하면 데드레터 토픽으로)
+BATCH_MAX_ATTEMPTS = int(os.getenv("BATCH_MAX_ATTEMPTS", "5"))
+BATCH_RETRY_BACKOFF = float(os.getenv("BATCH_RETRY_BACKOFF", "1"))  # 초 (실패할 때마다 두 배)
+BATCH_RETRY_MAX_BACKOFF = float(os.getenv("BATCH_RETRY_MAX_BACKOFF", "30"))
+DEAD_LETTER_TOPIC = os.getenv("DEAD_LETTER_TOPIC", "events-dlq")  # 비우면 성공할 때까지 재시도
+
+# 이벤트 상관 분석 (같은 fingerprint는 CORRELATION_WINDOW초 동안 열린 인시던트 하나로 합침)
+CORRELATION_ENABLED = os.getenv("CORRELATION_ENABLED", "true").lower() in ("1", "true", "yes")
+CORRELATION_WINDOW = int(os.getenv("CORRELATION_WINDOW", "300"))  # 마지막 발생 후 초 (발생할 때마다 연장)
 
 events_processed_total = Counter("events_processed_total", "처리된 이벤트 수")
+events_failed_total = Counter("events_failed_total", "재시도 후에도 분류/저장에 실패해 데드레터 토픽으로 보낸 이벤트 수")
+batch_retries_total = Counter("event_batch_retries_total", "실패해서 다시 처리한 배치 수")
+event_batch_size = Histogram(
+    "event_batch_size", "분류 요청 한 번에 담긴 이벤트 수",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+incidents_created_total = Counter("incidents_created_total", "새로 만든 인시던트 수 (분류 요청 대상)")
+events_correlated_total = Counter("events_correlated_total", "열린 인시던트에 합쳐진 이벤트 수 (분류 생략)")
+classify_duration = Histogram("classify_request_duration_seconds", "분류 요청 소요 시간")
+classify_inflight = Gauge("classify_requests_inflight", "진행 중인 분류 요청 수")
+uncommitted_batches = Gauge("event_batches_uncommitted", "처리 중이거나 앞 배치를 기다리는 미커밋 배치 수")
 start_http_server(METRICS_PORT)
 
+# 상태별 인시던트 인덱스 (metrics-exporter가 KEYS 조회 없이 O(1)로 읽음)
+# - incidents:status:{status}  sorted set (id → 마지막 갱신 시각)
+# - incidents:status_counts    hash (status → 인시던트 수, 항상 위 sorted set 크기와 같음)
+# - incidents:statuses         set (지금까지 나온 상태 이름, 재구성 작업용)
+STATUS_INDEX_PREFIX = "incidents:status:"
+STATUS_COUNTS_KEY = "incidents:status_counts"
+STATUSES_KEY = "incidents:statuses"
+# 상태 변경과 인덱스/카운터 갱신을 원자적으로 (이전 상태는 해시에서 읽음, 중복 처리돼도 카운터가 늘지 않음)
+SET_STATUS_LUA = """
+local old = redis.call('HGET', KEYS[1], 'status')
+redis.call('HSET', KEYS[1], 'status', ARGV[2])
+if old and old ~= ARGV[2] and redis.call('ZREM', ARGV[4] .. old, ARGV[1]) == 1 then
+    redis.call('HINCRBY', KEYS[2], old, -1)
+end
+if redis.call('ZADD', ARGV[4] .. ARGV[2], ARGV[3], ARGV[1]) == 1 then
+    redis.call('HINCRBY', KEYS[2], ARGV[2], 1)
+    redis.call('SADD', KEYS[3], ARGV[2])
+end
+"""
+
+# fingerprint 인덱스: incident_fp:{fingerprint} → 열린 인시던트 id (TTL = CORRELATION_WINDOW)
+FINGERPRINT_PREFIX = "incident_fp:"
+# 열린 인시던트가 있으면 TTL 연장 후 그 id, 없으면 후보 id로 등록 → {새로 만들었는지, id}
+CLAIM_FINGERPRINT_LUA = """
+local current = redis.call('GET', KEYS[1])
+if current then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return {0, current}
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return {1, ARGV[1]}
+"""
+# 분류/저장 실패 시 등록 취소 (그 사이 다른 인시던트로 바뀌었으면 두기)
+RELEASE_FINGERPRINT_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def _decode(value: bytes) -> Dict[str, Any]:
+    """잘못된 JSON 메시지 하나로 소비가 멈추지 않도록 빈 이벤트로 처리"""
+    if not value:
+        return {}
+    try:
+        evt = json.loads(value.decode())
+    except (UnicodeDecodeError, ValueError):
+        print("[EventProcessor] JSON 아닌 메시지 건너뜀")
+        return {}
+    return evt if isinstance(evt, dict) else {"raw": evt}
+
+
+def _commit_offset(offset: int) -> OffsetAndMetadata:
+    # kafka-python 2.1부터 leader_epoch 필드 추가
+    try:
+        return OffsetAndMetadata(offset, "", -1)
+    except TypeError:
+        return OffsetAndMetadata(offset, "")
+
+
+class Batch:
+    """한 번에 분류할 이벤트 묶음 + 처리 완료 시 커밋할 파티션별 다음 오프셋
+
+    재처리 때 이미 끝난 단계를 반복하지 않도록 단계별 결과(묶음, 새 인시던트, 분류 결과, 저장 여부)를 보관한다.
+    """
+
+    __slots__ = ("generation", "events", "offsets", "messages", "done", "groups", "incidents", "results", "persisted")
+
+    def __init__(self, generation: int):
+        self.generation = generation  # 가져올 때의 할당 세대 (리밸런스마다 증가)
+        self.events: List[Dict[str, Any]] = []
+        self.offsets: Dict[TopicPartition, int] = {}
+        self.messages = 0
+        self.done = False
+        self.groups: Optional[Dict[str, "NewIncident"]] = None
+        self.incidents: Optional[List["NewIncident"]] = None
+        self.results: Optional[List[Dict[str, Any]]] = None
+        self.persisted = False
+
+    def add(self, msg):
+        self.offsets[TopicPartition(msg.topic, msg.partition)] = msg.offset + 1
+        self.messages += 1
+        if msg.value:
+            self.events.append(msg.value)
+
+
+class NewIncident:
+    """분류할 인시던트 (같은 fingerprint 이벤트 중 첫 이벤트가 대표)"""
+
+    __slots__ = ("id", "fingerprint", "event", "count")
+
+    def __init__(self, inc_id: Optional[str], fp: Optional[str], event: Dict[str, Any], count: int = 1):
+        self.id = inc_id
+        self.fingerprint = fp
+        self.event = event
+        self.count = count
+
+
+class EventProcessor:
+    """배치 단위 분류 파이프라인
+
+    KafkaConsumer는 스레드 안전하지 않으므로 poll/commit은 잠금 하나로 순서대로 스레드에서 실행한다.
+    """
+
+    def __init__(self, consumer: KafkaConsumer, producer: KafkaProducer, redis_client, http: httpx.AsyncClient):
+        self.consumer = consumer
+        self.producer = producer
+        self.redis = redis_client
+        self.http = http
+        self._set_status = redis_client.register_script(SET_STATUS_LUA)
+        self._claim_fingerprint = redis_client.register_script(CLAIM_FINGERPRINT_LUA)
+        self._release_fingerprint = redis_client.register_script(RELEASE_FINGERPRINT_LUA)
+        self._slots = asyncio.Semaphore(CLASSIFY_CONCURRENCY)
+        self._consumer_lock = asyncio.Lock()
+        # 가져온 순서대로 보관 → 앞 배치가 끝나야 뒤 배치 오프셋을 커밋 (유실 방지)
+        self._pending: Deque[Batch] = deque()
+        self._tasks: Set[asyncio.Task] = set()
+        # 파티션 회수마다 증가 (poll 안에서 리스너가 바꾸므로 잠금 안에서만 변경됨)
+        self._generation = 0
+
+    async def _consumer_call(self, fn, *args, **kwargs):
+        async with self._consumer_lock:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def run(self):
+        try:
+            while True:
+                batch = await self._fill()
+                await self._acquire_slot()
+                self._forget_revoked()
+                if batch.generation != self._generation:
+                    # 기다리는 동안 회수된 파티션의 메시지 → 새 할당에서 다시 가져옴
+                    self._slots.release()
+                    continue
+                self._pending.append(batch)
+                uncommitted_batches.set(len(self._pending))
+                task = asyncio.create_task(self._process(batch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        finally:
+            # 진행 중인 배치는 끝까지 처리하고 커밋 (취소된 배치와 그 뒤 배치는 커밋하지 않음)
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _fill(self) -> Batch:
+        """BATCH_SIZE개 또는 첫 메시지 후 BATCH_MAX_WAIT_MS까지 모으기"""
+        batch = Batch(self._generation)
+        deadline = None
+        while batch.messages < BATCH_SIZE:
+            if deadline is None:
+                timeout_ms = BATCH_MAX_WAIT_MS
+            else:
+                timeout_ms = int((deadline - time.monotonic()) * 1000)
+                if timeout_ms <= 0:
+                    break
+            records = await self._consumer_call(
+                self.consumer.poll, timeout_ms=timeout_ms, max_records=BATCH_SIZE - batch.messages
+            )
+            if batch.generation != self._generation:
+                # 모으는 중 리밸런스 → 앞서 모은 메시지는 새 할당에서 커밋 위치부터 다시 가져옴
+                batch = Batch(self._generation)
+                deadline = None
+            for messages in records.values():
+                for msg in messages:
+                    batch.add(msg)
+            if deadline is None and batch.messages:
+                deadline = time.monotonic() + BATCH_MAX_WAIT_MS / 1000
+        return batch
+
+    async def _acquire_slot(self):
+        """분류 슬롯 확보 - 기다리는 동안 할당된 파티션을 멈추고 PAUSED_POLL_INTERVAL마다 poll
+
+        재시도 중인 배치가 슬롯을 모두 잡고 있어도 max.poll.interval.ms 안에 poll하므로
+        그룹에서 빠지지 않고(빠지면 리밸런스 후 같은 배치를 다시 가져옴), 새 메시지도 쌓아 두지 않는다.
+        """
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._slots.acquire(), PAUSED_POLL_INTERVAL)
+                    return
+                except asyncio.TimeoutError:
+                    await self._consumer_call(self._poll_paused)
+                    self._forget_revoked()
+        finally:
+            await self._consumer_call(self._resume)
+
+    def _poll_paused(self):
+        # 리밸런스로 새로 할당된 파티션은 멈춰 있지 않으므로 받은 레코드는 되감아 재개 후 다시 가져옴
+        self.consumer.pause(*self.consumer.assignment())
+        records = self.consumer.poll(timeout_ms=0)
+        for tp, messages in records.items():
+            if messages:
+                self.consumer.seek(tp, messages[0].offset)
+
+    def _resume(self):
+        paused = self.consumer.paused()
+        if paused:
+            self.consumer.resume(*paused)
 
-def run():
+    def on_partitions_revoked(self):
+        """(poll 안에서 호출) 회수 전에 가져온 배치는 커밋하지 않도록 세대 증가"""
+        self._generation += 1
+        print(f"[EventProcessor] 파티션 회수, 미커밋 배치 {len(self._pending)}개는 새 할당에서 다시 처리")
+
+    def _forget_revoked(self):
+        # 세대는 가져온 순서대로 늘어나므로 이전 세대 배치는 항상 앞쪽에 있음
+        while self._pending and self._pending[0].generation != self._generation:
+            self._pending.popleft()
+        uncommitted_batches.set(len(self._pending))
+
+    async def _process(self, batch: Batch):
+        try:
+            if batch.events:
+                event_batch_size.observe(len(batch.events))
+                if await self._handle(batch):
+                    events_processed_total.inc(len(batch.events))
+                else:
+                    events_failed_total.inc(len(batch.events))
+            # 저장(또는 데드레터 발행)이 끝난 배치만 커밋 대상 (취소되면 커밋하지 않고 재시작 후 다시 처리)
+            batch.done = True
+        finally:
+            self._slots.release()
+            if batch.done:
+                await self._commit_ready()
+
+    async def _handle(self, batch: Batch) -> bool:
+        """성공할 때까지 지수 백오프로 재처리, BATCH_MAX_ATTEMPTS회 실패하면 데드레터 토픽으로 보내고 False
+
+        데드레터 발행까지 실패하면 계속 재시도하므로 커밋 위치가 저장되지 않은 이벤트를 넘지 않는다.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                await self._run_stages(batch)
+                return True
+            except Exception as e:
+                error = e
+            if DEAD_LETTER_TOPIC and BATCH_MAX_ATTEMPTS > 0 and attempt >= BATCH_MAX_ATTEMPTS:
+                if await self._dead_letter(batch, error, attempt):
+                    # 이미 저장된 인시던트의 등록은 남김 (지우면 다음 발생 때 중복 인시던트가 생김)
+                    if not batch.persisted:
+                        await self._release(batch.incidents or [])
+                    return False
+            batch_retries_total.inc()
+            delay = min(BATCH_RETRY_BACKOFF * 2 ** (attempt - 1), BATCH_RETRY_MAX_BACKOFF)
+            print(f"[EventProcessor] 배치 처리 실패 ({len(batch.events)}건, {attempt}회), {delay:g}초 후 재시도: {error}")
+            await asyncio.sleep(delay)
+
+    async def _run_stages(self, batch: Batch):
+        """상관 분석 → 분류 → 저장/발행 (앞선 시도에서 끝난 단계는 건너뜀)"""
+        if batch.incidents is None:
+            if CORRELATION_ENABLED:
+                batch.incidents = await self._correlate(batch)
+            else:
+                batch.incidents = [NewIncident(None, None, evt) for evt in batch.events]
+        if not batch.incidents:
+            return
+        if batch.results is None:
+            results = await self._classify([inc.event for inc in batch.incidents])
+            if len(results) != len(batch.incidents):
+                raise RuntimeError(f"분류 결과 수 불일치 (요청 {len(batch.incidents)}건, 결과 {len(results)}건)")
+            batch.results = results
+        await self._store(batch)
+
+    async def _correlate(self, batch: Batch) -> List[NewIncident]:
+        """fingerprint별로 묶어 열린 인시던트에는 건수/마지막 발생 시각만 더하고, 새 fingerprint만 반환
+
+        묶음(후보 id 포함)은 배치에 보관하므로, 등록 후 실패해 다시 시도하면 자기 등록을 새 인시던트로 인식한다.
+        """
+        if batch.groups is None:
+            groups: Dict[str, NewIncident] = {}
+            for evt in batch.events:
+                fp = fingerprint(evt)
+                group = groups.get(fp)
+                if group is None:
+                    groups[fp] = NewIncident(str(evt.get("id") or uuid.uuid4().hex), fp, evt)
+                else:
+                    group.count += 1
+            batch.groups = groups
+        groups = batch.groups
+        pipe = self.redis.pipeline(transaction=False)
+        for fp, group in groups.items():
+            await self._claim_fingerprint(
+                keys=[FINGERPRINT_PREFIX + fp], args=[group.id, CORRELATION_WINDOW], client=pipe
+            )
+        claims = await pipe.execute()
+        incidents: List[NewIncident] = []
+        folded = 0
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        for group, (created, inc_id) in zip(groups.values(), claims):
+            inc_id = inc_id.decode() if isinstance(inc_id, bytes) else inc_id
+            if created or inc_id == group.id:
+                incidents.append(group)
+                continue
+            key = f"incident:{inc_id}"
+            pipe.hincrby(key, "count", group.count)
+            pipe.hset(key, "last_seen", now)
+            folded += group.count
+        if folded:
+            await pipe.execute()
+            events_correlated_total.inc(folded)
+        return incidents
+
+    async def _release(self, incidents: List[NewIncident]):
+        """저장하지 못한 새 인시던트의 fingerprint 등록 취소 (다음 발생 때 다시 분류)"""
+        claimed = [inc for inc in incidents if inc.fingerprint is not None]
+        if not claimed:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for inc in claimed:
+                await self._release_fingerprint(
+                    keys=[FINGERPRINT_PREFIX + inc.fingerprint], args=[inc.id], client=pipe
+                )
+            await pipe.execute()
+        except Exception as e:
+            print(f"[EventProcessor] fingerprint 등록 취소 실패: {e}")
+
+    async def _classify(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """분류 요청 (연결 오류/5xx는 지수 백오프로 재시도)"""
+        attempt = 0
+        while True:
+            classify_inflight.inc()
+            started = time.perf_counter()
+            try:
+                resp = await self.http.post("/api/v1/classify", json={"events": events})
+                if resp.status_code < 500:
+                    resp.raise_for_status()
+                    return resp.json().get("results", [])
+                error = f"HTTP {resp.status_code}"
+            except httpx.TransportError as e:
+                error = repr(e)
+            finally:
+                classify_inflight.dec()
+                classify_duration.observe(time.perf_counter() - started)
+            if attempt >= CLASSIFY_MAX_RETRIES:
+                raise RuntimeError(f"분류 요청 실패 ({attempt + 1}회): {error}")
+            await asyncio.sleep(min(0.5 * 2 ** attempt, 10))
+            attempt += 1
+
+    async def _store(self, batch: Batch):
+        """Redis 저장 + 상태 인덱스 갱신(파이프라인 한 번) 후 리포트 발행, 브로커 확인까지 대기
+
+        건수는 HINCRBY로 더하므로 저장 전에 다른 배치가 먼저 합친 건수도 유지된다.
+        리포트 발행만 실패했으면 재처리 때 Redis 저장은 건너뛴다 (건수가 두 번 더해지지 않도록).
+        """
+        incidents, results = batch.incidents, batch.results
+        if not batch.persisted:
+            await self._persist(incidents, results)
+            batch.persisted = True
+        futures = [self.producer.send(REPORTS_TOPIC, rpt) for rpt in results]
+        if futures:
+            await asyncio.to_thread(self.producer.flush, CLASSIFY_TIMEOUT)
+            for future in futures:
+                if future.failed():
+                    raise future.exception
+
+    async def _persist(self, incidents: List[NewIncident], results: List[Dict[str, Any]]):
+        """인시던트 해시와 상태 인덱스를 파이프라인 한 번으로 저장"""
+        pipe = self.redis.pipeline(transaction=False)
+        now = time.time()
+        for inc, rpt in zip(incidents, results):
+            inc_id = inc.id or rpt.get("incident_id", inc.event.get("id", "unknown"))
+            rpt["incident_id"] = inc_id
+            if inc.fingerprint is not None:
+                rpt["fingerprint"] = inc.fingerprint
+            key = f"incident:{inc_id}"
+            pipe.hset(key, mapping={"data": json.dumps(rpt), "last_seen": now})
+            pipe.hsetnx(key, "first_seen", now)
+            pipe.hincrby(key, "count", inc.count)
+            if inc.fingerprint is not None:
+                pipe.hset(key, "fingerprint", inc.fingerprint)
+            await self._set_status(
+                keys=[key, STATUS_COUNTS_KEY, STATUSES_KEY],
+                args=[inc_id, "active", now, STATUS_INDEX_PREFIX],
+                client=pipe,
+            )
+        await pipe.execute()
+        incidents_created_total.inc(len(incidents))
+
+    async def _dead_letter(self, batch: Batch, error: Exception, attempts: int) -> bool:
+        """처리하지 못한 원본 이벤트를 DEAD_LETTER_TOPIC에 발행 (브로커 확인까지 대기), 성공 여부 반환"""
+        failed_at = time.time()
+        try:
+            futures = [
+                self.producer.send(
+                    DEAD_LETTER_TOPIC,
+                    {"event": evt, "error": str(error), "attempts": attempts, "failed_at": failed_at},
+                )
+                for evt in batch.events
+            ]
+            await asyncio.to_thread(self.producer.flush, CLASSIFY_TIMEOUT)
+            for future in futures:
+                if future.failed():
+                    raise future.exception
+        except Exception as e:
+            print(f"[EventProcessor] 데드레터 발행 실패 ({len(batch.events)}건), 계속 재시도: {e}")
+            return False
+        print(f"[EventProcessor] {attempts}회 실패한 배치 {len(batch.events)}건을 {DEAD_LETTER_TOPIC}로 보냄: {error}")
+        return True
+
+    async def _commit_ready(self):
+        """앞에서부터 완료된 배치들의 오프셋 커밋"""
+        self._forget_revoked()
+        generation = self._generation
+        offsets: Dict[TopicPartition, int] = {}
+        while self._pending and self._pending[0].done:
+            offsets.update(self._pending.popleft().offsets)
+        uncommitted_batches.set(len(self._pending))
+        if not offsets:
+            return
+        # 꺼낸 순서대로 잠금을 얻으므로(asyncio.Lock은 FIFO) 오프셋이 뒤로 가지 않음
+        try:
+            await self._consumer_call(
+                self._commit, {tp: _commit_offset(offset) for tp, offset in offsets.items()}, generation
+            )
+        except KafkaError as e:
+            # 리밸런스로 파티션이 넘어간 경우 등 → 새 소유자가 다시 처리 (at-least-once)
+            print(f"[EventProcessor] 오프셋 커밋 실패: {e}")
+
+    def _commit(self, offsets: Dict[TopicPartition, OffsetAndMetadata], generation: int):
+        # 잠금 안에서 세대를 확인하므로 그사이 리밸런스가 있었다면 이전 할당의 오프셋을 커밋하지 않음
+        if generation == self._generation:
+            self.consumer.commit(offsets)
+
+
+class _RebalanceListener(ConsumerRebalanceListener):
+    def __init__(self, processor: EventProcessor):
+        self.processor = processor
+
+    def on_partitions_revoked(self, revoked):
+        if revoked:  # 첫 참여 때는 빈 집합
+            self.processor.on_partitions_revoked()
+
+    def on_partitions_assigned(self, assigned):
+        pass
+
+
+async def run():
     consumer = KafkaConsumer(
-        EVENTS_TOPIC,
         bootstrap_servers=KAFKA_BOOTSTRAP.split(","),
+        group_id=CONSUMER_GROUP_ID,
+        enable_auto_commit=False,
         auto_offset_reset="latest",
-        value_deserializer=lambda v: json.loads(v.decode()) if v else {},
+        max_poll_records=BATCH_SIZE,
+        value_deserializer=_decode,
     )
     producer = KafkaProducer(
         bootstrap_servers=KAFKA_BOOTSTRAP.split(","),
         value_serializer=lambda v: json.dumps(v).encode(),
+        linger_ms=20,
     )
-    r = redis.from_url(REDIS_URL)
-
-    for msg in consumer:
-        evt = msg.value
-        if not evt:
-            continue
-        try:
-            resp = httpx.post(f"{LLM_URL}/api/v1/classify", json={"events": [evt]}, timeout=30)
-            if resp.status_code == 200:
-                data = resp.json()
-                for rpt in data.get("results", []):
-                    inc_id = rpt.get("incident_id", evt.get("id", "unknown"))
-                    r.hset(f"incident:{inc_id}", mapping={"data": json.dumps(rpt), "status": "active"})
-                    producer.send(REPORTS_TOPIC, rpt)
-            events_processed_total.inc()
-        except Exception as e:
-            print(f"[EventProcessor] 오류: {e}")
+    r = aioredis.from_url(REDIS_URL)
+    limits = httpx.Limits(max_connections=CLASSIFY_CONCURRENCY, max_keepalive_connections=CLASSIFY_CONCURRENCY)
+    print(
+        f"[EventProcessor] {EVENTS_TOPIC} 구독 중 (배치 {BATCH_SIZE}건/{BATCH_MAX_WAIT_MS}ms, "
+        f"동시 분류 {CLASSIFY_CONCURRENCY})"
+    )
+    try:
+        async with httpx.AsyncClient(base_url=LLM_URL, timeout=CLASSIFY_TIMEOUT, limits=limits) as client:
+            processor = EventProcessor(consumer, producer, r, client)
+            consumer.subscribe([EVENTS_TOPIC], listener=_RebalanceListener(processor))
+            await processor.run()
+    finally:
+        consumer.close(autocommit=False)
+        producer.close()
+        await r.aclose()
 
 
 if __name__ == "__main__":
-    run()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
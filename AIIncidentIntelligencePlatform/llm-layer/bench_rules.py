@@ -0,0 +1,100 @@
+"""규칙 분류기 벤치마크 (코어당 초당 이벤트 수)
+
+    cd llm-layer && py bench_rules.py                 # 20만 건, 프로세스 1개
+    py bench_rules.py -n 500000 -p 4                  # 프로세스 4개 (코어 4개) 확장성 확인
+    py bench_rules.py --rules my_rules.json
+
+합성 로그(오류 유형별 템플릿 + 매번 바뀌는 id/숫자/주소)를 만들어 분류하고,
+CPU 시간 기준 초당 이벤트 수(코어당)와 벽시계 기준 처리량, 결과 분포를 출력한다.
+"""
+import argparse
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from rule_classifier import RuleClassifier
+
+DEFAULT_RULES = Path(__file__).resolve().parent / "rules.json"
+
+# (level, 메시지 템플릿) - {n} 숫자, {ip} 주소, {id} 16진수 id
+_TEMPLATES = [
+    ("error", "Connection refused while connecting to {ip}:5432 (attempt {n})"),
+    ("error", "psycopg2.OperationalError: could not connect to server: Connection timed out db-{n}"),
+    ("error", "Request {id} failed: upstream timed out after {n}ms"),
+    ("error", "HTTP 503 Service Unavailable from payment-api ({n}ms)"),
+    ("critical", "Traceback (most recent call last): File \"/app/worker.py\", line {n}, in run"),
+    ("critical", "Container killed: OOMKilled (memory limit {n}Mi)"),
+    ("error", "write /var/log/app.log: no space left on device"),
+    ("warning", "JWT token expired for user {id}"),
+    ("warning", "429 Too Many Requests: rate limit exceeded for client {ip}"),
+    ("error", "Unexpected failure in job {id} step {n}"),
+    ("error", "Order {id} could not be reconciled with ledger entry {n}"),
+    ("info", "GET /api/items/{n} 200 {n}ms"),
+    ("debug", "cache refresh finished in {n}ms ({n} keys)"),
+    ("warning", "Slow query detected: SELECT * FROM orders WHERE id = {n} took {n}ms"),
+]
+_SERVICES = ["api", "worker", "payment", "gateway", "auth", "scheduler"]
+
+
+def make_events(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        level, template = rng.choice(_TEMPLATES)
+        message = template.replace("{n}", str(rng.randint(1, 99999))) \
+            .replace("{ip}", f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}") \
+            .replace("{id}", f"{rng.getrandbits(48):012x}")
+        events.append({"id": f"evt-{i}", "service": rng.choice(_SERVICES), "level": level, "message": message})
+    return events
+
+
+def run_worker(args: Tuple[str, int, int]) -> Tuple[int, float, Dict[str, int]]:
+    """프로세스 하나: (처리 건수, CPU 초, 결과 분포)"""
+    rules_path, count, seed = args
+    classifier = RuleClassifier.from_file(Path(rules_path))
+    events = make_events(count, seed)
+    outcomes: Counter = Counter()
+    started = time.process_time()
+    for evt in events:
+        outcome, _ = classifier.classify(evt)
+        outcomes[outcome] += 1
+    return count, time.process_time() - started, dict(outcomes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="규칙 분류기 벤치마크")
+    parser.add_argument("-n", "--events", type=int, default=200_000, help="전체 이벤트 수")
+    parser.add_argument("-p", "--processes", type=int, default=1, help="프로세스 수 (코어 수)")
+    parser.add_argument("--rules", default=str(DEFAULT_RULES), help="규칙 파일")
+    args = parser.parse_args()
+
+    processes = max(1, args.processes)
+    per_process = args.events // processes
+    jobs = [(args.rules, per_process, 42 + i) for i in range(processes)]
+    started = time.perf_counter()
+    if processes == 1:
+        results = [run_worker(jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(run_worker, jobs))
+    wall = time.perf_counter() - started
+
+    total = sum(r[0] for r in results)
+    cpu = sum(r[1] for r in results)
+    outcomes: Counter = Counter()
+    for _, _, o in results:
+        outcomes.update(o)
+    rules = len(RuleClassifier.from_file(Path(args.rules)).rules)
+    print(f"규칙 {rules}개, 이벤트 {total:,}건, 프로세스 {processes}개 (CPU {os.cpu_count()}개)")
+    print(f"코어당     {total / cpu:>12,.0f} events/s  (CPU {cpu:.2f}초)")
+    print(f"전체       {total / wall:>12,.0f} events/s  (벽시계 {wall:.2f}초, 이벤트 생성 포함)")
+    print(f"이벤트당   {cpu / total * 1e6:>12.2f} µs")
+    print("결과       " + ", ".join(f"{k} {v / total:.1%}" for k, v in sorted(outcomes.items())))
+
+
+if __name__ == "__main__":
+    main()
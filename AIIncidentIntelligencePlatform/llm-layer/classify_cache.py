@@ -0,0 +1,120 @@
+"""분류 결과 캐시 (프로세스 메모리 LRU + Redis, 모델/버전별 네임스페이스)
+
+같은 로그 템플릿(숫자·id 등을 뺀 메시지 + 서비스 + 심각도)은 같은 분류 결과를 재사용한다.
+모델(OLLAMA_MODEL)이나 CLASSIFY_CACHE_VERSION이 바뀌면 키가 달라지므로 이전 결과는 TTL로 사라진다.
+"""
+import sys
+import json
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+from prometheus_client import Counter
+
+# 서비스 공용 모듈 (AIIncidentIntelligencePlatform/shared) - event-processor fingerprint와 같은 키
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.log_template import message_template, template_key
+
+classify_cache_requests = Counter(
+    "classify_cache_requests_total", "분류 캐시 조회 수", ["tier", "result"]
+)
+classify_cache_errors = Counter("classify_cache_errors_total", "분류 캐시 Redis 오류 수")
+
+
+class ClassificationCache:
+    """2단계 캐시: 메모리 LRU(max_entries) → Redis(ttl초)
+
+    Redis 오류 시 메모리 캐시만으로 계속 동작하고 REDIS_RETRY_INTERVAL초 뒤 다시 시도한다.
+    """
+
+    REDIS_RETRY_INTERVAL = 30.0
+
+    def __init__(self, model: str, version: str, max_entries: int, ttl: int, redis_url: Optional[str] = None):
+        self.namespace = f"classify:{model}:{version}:"
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._redis = None
+        self._redis_down_until = 0.0
+        if redis_url:
+            import redis.asyncio as aioredis
+            self._redis = aioredis.from_url(redis_url, socket_timeout=1.0, socket_connect_timeout=1.0)
+
+    def _redis_available(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception):
+        classify_cache_errors.inc()
+        if time.monotonic() >= self._redis_down_until:
+            print(f"[LLM Layer] 분류 캐시 Redis 오류, {self.REDIS_RETRY_INTERVAL:g}초간 메모리 캐시만 사용: {e}")
+        self._redis_down_until = time.monotonic() + self.REDIS_RETRY_INTERVAL
+
+    def _remember(self, key: str, value: Dict[str, Any]):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        now = time.monotonic()
+        for key in keys:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] > now:
+                self._entries.move_to_end(key)
+                found[key] = cached[1]
+            else:
+                if cached is not None:
+                    del self._entries[key]
+                missing.append(key)
+        if found:
+            classify_cache_requests.labels("memory", "hit").inc(len(found))
+        if missing:
+            classify_cache_requests.labels("memory", "miss").inc(len(missing))
+        if not missing or not self._redis_available():
+            return found
+        try:
+            values = await self._redis.mget([self.namespace + key for key in missing])
+        except Exception as e:
+            self._redis_failed(e)
+            return found
+        hits = 0
+        for key, raw in zip(missing, values):
+            if raw is None:
+                continue
+            value = json.loads(raw)
+            found[key] = value
+            self._remember(key, value)
+            hits += 1
+        if hits:
+            classify_cache_requests.labels("redis", "hit").inc(hits)
+        if len(missing) > hits:
+            classify_cache_requests.labels("redis", "miss").inc(len(missing) - hits)
+        return found
+
+    async def put_many(self, items: Dict[str, Dict[str, Any]]):
+        for key, value in items.items():
+            self._remember(key, value)
+        if not items or not self._redis_available():
+            return
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(self.namespace + key, json.dumps(value, ensure_ascii=False), ex=self.ttl)
+            await pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "namespace": self.namespace,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "redis": self._redis is not None,
+            "redis_available": self._redis_available(),
+        }
+
+    async def aclose(self):
+        if self._redis is not None:
+            await self._redis.aclose()
@@ -1,10 +1,18 @@
 """LLM Layer - 포트 9200 (로그 수집, 분류, 분석)"""
 import os
 import json
-from fastapi import FastAPI
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi import FastAPI, Request
 from kafka import KafkaProducer
 from prometheus_client import Counter, Histogram, generate_latest
 from fastapi.responses import Response
+from classify_cache import ClassificationCache, message_template, template_key
+from rule_classifier import MATCHED, AMBIGUOUS, UNMATCHED, RuleClassifier
 
 load_dotenv = lambda: None
 try:
@@ -17,22 +25,233 @@ PORT = int(os.getenv("LLM_LAYER_PORT", "9200"))
 KAFKA_BOOTSTRAP = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9094")
 EVENTS_TOPIC = os.getenv("EVENTS_TOPIC", "events")
 
+# Kafka 프로듀서 (프로세스당 하나, 메시지를 linger_ms 동안 모아 압축 후 배치 전송)
+KAFKA_ACKS = os.getenv("KAFKA_ACKS", "1")  # 0, 1, all
+KAFKA_LINGER_MS = int(os.getenv("KAFKA_LINGER_MS", "20"))
+KAFKA_BATCH_SIZE = int(os.getenv("KAFKA_BATCH_SIZE", str(64 * 1024)))
+KAFKA_COMPRESSION = os.getenv("KAFKA_COMPRESSION", "gzip")  # none, gzip (snappy/lz4/zstd는 별도 패키지)
+KAFKA_RECONNECT_INTERVAL = float(os.getenv("KAFKA_RECONNECT_INTERVAL", "10"))
+
+# 수집 API
+INGEST_ACK_TIMEOUT = float(os.getenv("INGEST_ACK_TIMEOUT", "30"))  # 브로커 확인 대기 상한 (초)
+INGEST_BULK_CHUNK = int(os.getenv("INGEST_BULK_CHUNK", "500"))  # NDJSON 몇 줄씩 프로듀서에 넘길지
+INGEST_BULK_MAX_LINE_BYTES = int(os.getenv("INGEST_BULK_MAX_LINE_BYTES", str(1024 * 1024)))
+
+# 분류 결과 캐시 (같은 로그 템플릿은 모델을 다시 호출하지 않음, 모델/버전이 바뀌면 새 네임스페이스)
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "deepseek-coder:6.7b")
+CLASSIFY_CACHE_ENABLED = os.getenv("CLASSIFY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CLASSIFY_CACHE_VERSION = os.getenv("CLASSIFY_CACHE_VERSION", "1")  # 프롬프트/규칙 변경 시 올림
+CLASSIFY_CACHE_MAX_ENTRIES = int(os.getenv("CLASSIFY_CACHE_MAX_ENTRIES", "10000"))
+CLASSIFY_CACHE_TTL = int(os.getenv("CLASSIFY_CACHE_TTL", "86400"))  # 초
+CLASSIFY_CACHE_REDIS_URL = os.getenv("CLASSIFY_CACHE_REDIS_URL", os.getenv("REDIS_URL", "redis://localhost:6380"))
+
+# 규칙 기반 1차 분류 (맞는 규칙이 없거나 애매한 이벤트만 캐시/모델로)
+CLASSIFY_RULES_ENABLED = os.getenv("CLASSIFY_RULES_ENABLED", "true").lower() in ("1", "true", "yes")
+CLASSIFY_RULES_PATH = os.getenv("CLASSIFY_RULES_PATH") or str(Path(__file__).resolve().parent / "rules.json")
+CLASSIFY_RULE_MIN_CONFIDENCE = float(os.getenv("CLASSIFY_RULE_MIN_CONFIDENCE", "0.7"))
+CLASSIFY_RULE_AMBIGUITY_MARGIN = float(os.getenv("CLASSIFY_RULE_AMBIGUITY_MARGIN", "0.1"))
+
 llm_requests_total = Counter("llm_requests_total", "LLM 요청 수", ["endpoint"])
 llm_request_duration = Histogram("llm_request_duration_seconds", "LLM 요청 소요 시간", ["endpoint"])
+ingest_events_total = Counter("ingest_events_total", "수집 이벤트 수 (accepted: 발행, rejected: 잘못된 줄)", ["result"])
+kafka_acks_total = Counter("kafka_acks_total", "브로커가 확인한 메시지 수", ["partition"])
+kafka_send_failures_total = Counter("kafka_send_failures_total", "발행 실패 메시지 수", ["error"])
+classify_rule_results_total = Counter(
+    "classify_rule_results_total", "규칙 분류 결과 수 (matched 외에는 모델 경로)", ["result"]
+)
 
-app = FastAPI(title="LLM Layer")
 
-
-def get_kafka_producer():
+def get_kafka_producer() -> Optional[KafkaProducer]:
+    """프로듀서 생성 (브로커 연결/메타데이터 조회가 있으므로 KafkaProducerHolder에서 한 번만 호출)"""
     try:
         return KafkaProducer(
             bootstrap_servers=KAFKA_BOOTSTRAP.split(","),
             value_serializer=lambda v: json.dumps(v).encode(),
+            acks=KAFKA_ACKS if KAFKA_ACKS == "all" else int(KAFKA_ACKS),
+            linger_ms=KAFKA_LINGER_MS,
+            batch_size=KAFKA_BATCH_SIZE,
+            compression_type=None if KAFKA_COMPRESSION == "none" else KAFKA_COMPRESSION,
         )
-    except Exception:
+    except Exception as e:
+        print(f"[LLM Layer] Kafka 연결 실패: {e}")
         return None
 
 
+class KafkaProducerHolder:
+    """프로세스 전체가 공유하는 프로듀서 (연결 실패 시 KAFKA_RECONNECT_INTERVAL마다 재시도)"""
+
+    def __init__(self):
+        self.producer: Optional[KafkaProducer] = None
+        self._lock = asyncio.Lock()
+        self._last_attempt = 0.0
+
+    async def get(self) -> Optional[KafkaProducer]:
+        if self.producer is not None:
+            return self.producer
+        async with self._lock:
+            if self.producer is None and time.monotonic() - self._last_attempt >= KAFKA_RECONNECT_INTERVAL:
+                self._last_attempt = time.monotonic()
+                self.producer = await asyncio.to_thread(get_kafka_producer)
+        return self.producer
+
+    async def close(self):
+        """남은 메시지 전송 후 종료"""
+        if self.producer is not None:
+            producer, self.producer = self.producer, None
+            await asyncio.to_thread(producer.close, INGEST_ACK_TIMEOUT)
+
+
+kafka_producer = KafkaProducerHolder()
+classify_cache = ClassificationCache(
+    OLLAMA_MODEL, CLASSIFY_CACHE_VERSION, CLASSIFY_CACHE_MAX_ENTRIES, CLASSIFY_CACHE_TTL,
+    redis_url=CLASSIFY_CACHE_REDIS_URL or None,
+) if CLASSIFY_CACHE_ENABLED else None
+
+
+def load_rule_classifier() -> Optional[RuleClassifier]:
+    """규칙 파일 로드 (없거나 잘못되면 규칙 없이 모델 경로만 사용)"""
+    if not CLASSIFY_RULES_ENABLED:
+        return None
+    try:
+        classifier = RuleClassifier.from_file(
+            Path(CLASSIFY_RULES_PATH),
+            min_confidence=CLASSIFY_RULE_MIN_CONFIDENCE,
+            ambiguity_margin=CLASSIFY_RULE_AMBIGUITY_MARGIN,
+        )
+    except Exception as e:
+        print(f"[LLM Layer] 분류 규칙 로드 실패 ({CLASSIFY_RULES_PATH}): {e}")
+        return None
+    print(f"[LLM Layer] 분류 규칙 {len(classifier.rules)}개 로드: {CLASSIFY_RULES_PATH}")
+    return classifier
+
+
+rule_classifier = load_rule_classifier()
+
+
+class AckTracker:
+    """요청 하나에서 보낸 메시지의 브로커 확인 집계
+
+    콜백은 프로듀서 I/O 스레드에서 호출되므로 잠금으로 보호하고,
+    모두 확인되면 이벤트 루프에 한 번만 알린다.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._done = loop.create_future()
+        self._sealed = False
+        self.pending = 0
+        self.acked = 0
+        self.failed = 0
+        self.partitions: Dict[int, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def send(self, producer: KafkaProducer, events: List[Dict[str, Any]]):
+        """events 발행 (버퍼가 가득 차면 블로킹되므로 스레드에서 호출)"""
+        for evt in events:
+            try:
+                future = producer.send(EVENTS_TOPIC, evt)
+            except Exception as e:
+                with self._lock:
+                    self.pending += 1
+                self._on_error(e)
+                continue
+            with self._lock:
+                self.pending += 1
+            future.add_callback(self._on_ack)
+            future.add_errback(self._on_error)
+
+    def _on_ack(self, metadata):
+        kafka_acks_total.labels(str(metadata.partition)).inc()
+        with self._lock:
+            self.acked += 1
+            self.partitions[metadata.partition] = self.partitions.get(metadata.partition, 0) + 1
+            self._settle()
+
+    def _on_error(self, error: BaseException):
+        name = type(error).__name__
+        kafka_send_failures_total.labels(name).inc()
+        with self._lock:
+            self.failed += 1
+            self.errors[name] = self.errors.get(name, 0) + 1
+            self._settle()
+
+    def _settle(self):
+        # 잠금 안에서 호출
+        self.pending -= 1
+        if self._sealed and self.pending == 0:
+            self._loop.call_soon_threadsafe(self._finish)
+
+    def _finish(self):
+        if not self._done.done():
+            self._done.set_result(None)
+
+    async def wait(self, timeout: float) -> Dict[str, Any]:
+        """보낸 메시지가 모두 확인(또는 실패)될 때까지 최대 timeout초 대기 후 집계"""
+        with self._lock:
+            self._sealed = True
+            if self.pending == 0:
+                self._finish()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._done), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.summary()
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "acked": self.acked,
+                "failed": self.failed,
+                "pending": self.pending,
+                "partitions": {str(p): n for p, n in sorted(self.partitions.items())},
+                "errors": dict(self.errors),
+            }
+
+
+def _ack_status(acks: Dict[str, Any]) -> str:
+    if acks["failed"] == 0 and acks["pending"] == 0:
+        return "ok"
+    return "error" if acks["acked"] == 0 else "partial"
+
+
+async def _ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[bytes]]:
+    """본문 청크 → 줄 단위 (INGEST_BULK_MAX_LINE_BYTES를 넘는 줄은 버리고 None)"""
+    buf = bytearray()
+    oversized = False
+    async for data in chunks:
+        *lines, rest = data.split(b"\n")
+        for piece in lines:
+            if oversized or len(buf) + len(piece) > INGEST_BULK_MAX_LINE_BYTES:
+                yield None
+            else:
+                buf += piece
+                yield bytes(buf)
+            buf.clear()
+            oversized = False
+        if not oversized:
+            buf += rest
+            if len(buf) > INGEST_BULK_MAX_LINE_BYTES:
+                oversized = True
+                buf.clear()
+    if oversized:
+        yield None
+    elif buf:
+        yield bytes(buf)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await kafka_producer.get()
+    yield
+    await kafka_producer.close()
+    if classify_cache is not None:
+        await classify_cache.aclose()
+
+
+app = FastAPI(title="LLM Layer", lifespan=lifespan)
+
+
 @app.get("/")
 async def root():
     return {"service": "LLM Layer", "port": PORT}
@@ -44,38 +263,150 @@ async def metrics():
 
 
 @app.post("/api/v1/ingest")
-async def ingest_logs(body: dict):
-    """다른 프로젝트에서 로그 전송 (수집)"""
+async def ingest_logs(body: dict, wait: bool = True):
+    """다른 프로젝트에서 로그 전송 (수집), wait=false면 브로커 확인을 기다리지 않음"""
     events = body.get("events", [body])
     if not isinstance(events, list):
         events = [events]
-    producer = get_kafka_producer()
+    producer = await kafka_producer.get()
     if not producer:
         return {"status": "error", "message": "Kafka 연결 실패"}
-    for evt in events:
-        producer.send(EVENTS_TOPIC, evt if isinstance(evt, dict) else {"raw": str(evt)})
-    producer.flush()
+    events = [evt if isinstance(evt, dict) else {"raw": str(evt)} for evt in events]
+    tracker = AckTracker(asyncio.get_running_loop())
+    await asyncio.to_thread(tracker.send, producer, events)
     llm_requests_total.labels(endpoint="ingest").inc()
-    return {"status": "ok", "count": len(events)}
+    ingest_events_total.labels("accepted").inc(len(events))
+    if not wait:
+        return {"status": "queued", "count": len(events)}
+    acks = await tracker.wait(INGEST_ACK_TIMEOUT)
+    return {"status": _ack_status(acks), "count": len(events), **acks}
+
+
+@app.post("/api/v1/ingest/bulk")
+async def ingest_bulk(request: Request, wait: bool = True):
+    """NDJSON 대량 수집 (한 줄에 이벤트 하나)
+
+    본문 전체를 모으지 않고 INGEST_BULK_CHUNK줄씩 프로듀서에 넘긴다.
+    프로듀서 버퍼가 가득 차면 본문 읽기도 멈추므로 메모리 사용량은 본문 크기와 무관하다.
+    """
+    producer = await kafka_producer.get()
+    if not producer:
+        return {"status": "error", "message": "Kafka 연결 실패"}
+    started = time.perf_counter()
+    tracker = AckTracker(asyncio.get_running_loop())
+    lines = accepted = 0
+    rejected: List[int] = []
+    chunk: List[Dict[str, Any]] = []
+    async for line in _ndjson_lines(request.stream()):
+        lines += 1
+        if line is not None and not line.strip():
+            continue
+        try:
+            if line is None:
+                raise ValueError("line too long")
+            evt = json.loads(line)
+        except ValueError:
+            rejected.append(lines)
+            continue
+        chunk.append(evt if isinstance(evt, dict) else {"raw": str(evt)})
+        if len(chunk) >= INGEST_BULK_CHUNK:
+            await asyncio.to_thread(tracker.send, producer, chunk)
+            accepted += len(chunk)
+            chunk = []
+    if chunk:
+        await asyncio.to_thread(tracker.send, producer, chunk)
+        accepted += len(chunk)
+    llm_requests_total.labels(endpoint="ingest_bulk").inc()
+    ingest_events_total.labels("accepted").inc(accepted)
+    ingest_events_total.labels("rejected").inc(len(rejected))
+    result = {
+        "lines": lines,
+        "accepted": accepted,
+        "rejected": len(rejected),
+        "rejected_lines": rejected[:20],
+    }
+    if not wait:
+        return {"status": "queued", **result}
+    acks = await tracker.wait(INGEST_ACK_TIMEOUT)
+    elapsed = time.perf_counter() - started
+    llm_request_duration.labels(endpoint="ingest_bulk").observe(elapsed)
+    return {"status": _ack_status(acks), **result, **acks, "elapsed_ms": round(elapsed * 1000, 1)}
+
+
+def classify_event(evt: Dict[str, Any]) -> Dict[str, Any]:
+    """이벤트 하나 분류 (LLM 분석, incident_id 제외 - 결과는 같은 템플릿 이벤트에 재사용됨)"""
+    return {
+        "category": "error",
+        "severity": "medium",
+        "confidence": 0.9,
+        "description": f"분류됨: {message_template(str(evt.get('message', '')))}",
+        "source": "model",
+    }
 
 
 @app.post("/api/v1/classify")
 async def classify(body: dict):
-    """인시던트 분류 (LLM 분석)"""
+    """인시던트 분류: 규칙 → 캐시 → LLM 분석 순 (규칙 결과는 캐시하지 않음)"""
     llm_requests_total.labels(endpoint="classify").inc()
-    events = body.get("events", [])
-    results = []
-    for evt in events:
-        results.append({
-            "incident_id": evt.get("id", "unknown"),
-            "category": "error",
-            "severity": "medium",
-            "confidence": 0.9,
-            "description": f"분류됨: {evt.get('message', '')}",
-        })
+    started = time.perf_counter()
+    events = [evt if isinstance(evt, dict) else {"raw": str(evt)} for evt in body.get("events", [])]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(events)
+    pending = list(range(len(events)))
+    if rule_classifier is not None:
+        outcomes = {MATCHED: 0, AMBIGUOUS: 0, UNMATCHED: 0}
+        pending = []
+        for i, evt in enumerate(events):
+            outcome, result = rule_classifier.classify(evt)
+            outcomes[outcome] += 1
+            if result is not None:
+                results[i] = {"incident_id": evt.get("id", "unknown"), **result}
+            else:
+                pending.append(i)
+        for outcome, count in outcomes.items():
+            if count:
+                classify_rule_results_total.labels(result=outcome).inc(count)
+    keys = {i: template_key(events[i]) for i in pending}
+    known: Dict[str, Dict[str, Any]] = {}
+    if keys and classify_cache is not None:
+        known = await classify_cache.get_many(dict.fromkeys(keys.values()))
+    fresh: Dict[str, Dict[str, Any]] = {}
+    for i, key in keys.items():
+        if key not in known and key not in fresh:
+            fresh[key] = classify_event(events[i])
+    if fresh and classify_cache is not None:
+        await classify_cache.put_many(fresh)
+    known.update(fresh)
+    for i, key in keys.items():
+        results[i] = {"incident_id": events[i].get("id", "unknown"), **known[key]}
+    llm_request_duration.labels(endpoint="classify").observe(time.perf_counter() - started)
     return {"results": results}
 
 
+@app.get("/api/v1/classify/cache")
+async def classify_cache_stats():
+    """분류 캐시 상태"""
+    if classify_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **classify_cache.get_stats()}
+
+
+@app.get("/api/v1/classify/rules")
+async def classify_rules():
+    """로드된 분류 규칙"""
+    if rule_classifier is None:
+        return {"enabled": False, "rules": []}
+    return {
+        "enabled": True,
+        "path": CLASSIFY_RULES_PATH,
+        "min_confidence": rule_classifier.min_confidence,
+        "ambiguity_margin": rule_classifier.ambiguity_margin,
+        "rules": [
+            {"name": r.name, "category": r.category, "severity": r.severity, "confidence": r.confidence}
+            for r in rule_classifier.rules
+        ],
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=PORT)
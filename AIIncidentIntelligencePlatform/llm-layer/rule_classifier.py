@@ -0,0 +1,102 @@
+"""규칙 기반 1차 분류 (CPU, 모델 호출 전)
+
+rules.json의 정규식을 규칙마다 미리 컴파일해 두고, 메시지에서 맞는 규칙을 위치가 겹치더라도 모두 후보로 모은다.
+(하나로 합친 정규식의 finditer는 겹치지 않는 가장 왼쪽 일치만 돌려주므로 "mysql timeout"에서 timeout 규칙을 놓친다.
+규칙별 search는 고정 접두어 최적화가 살아 있어 합친 정규식보다 빠르다.) 규칙마다 category / severity / confidence를 정하고,
+신뢰도가 낮거나(CLASSIFY_RULE_MIN_CONFIDENCE 미만) 서로 다른 분류가 비슷한 신뢰도로 겹치면
+모델 분류로 넘긴다.
+
+규칙 형식:
+    {"name": "timeout", "pattern": "timed? ?out|timeout", "category": "network",
+     "severity": "medium", "confidence": 0.8}
+    {"name": "low_level", "levels": ["debug", "info"], "category": "info", "severity": "low", "confidence": 0.9}
+
+메시지를 소문자로 바꿔 비교하므로 pattern은 소문자로 쓴다(re.IGNORECASE보다 빠름). levels만 있으면 이벤트 level/severity 값으로, 둘 다 있으면 둘 다 맞을 때만 적용한다.
+"""
+import re
+import json
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Pattern, Tuple
+
+MATCHED = "matched"
+AMBIGUOUS = "ambiguous"
+UNMATCHED = "unmatched"
+
+_ESCAPE = re.compile(r"\\.")  # \D, \S 같은 이스케이프는 대문자 검사에서 제외
+
+
+class Rule:
+    __slots__ = ("name", "category", "severity", "confidence", "levels", "pattern", "regex", "result")
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.name = str(raw["name"])
+        self.category = str(raw["category"])
+        self.severity = str(raw["severity"])
+        self.confidence = float(raw.get("confidence", 0.8))
+        levels = raw.get("levels")
+        self.levels: Optional[FrozenSet[str]] = frozenset(str(v).lower() for v in levels) if levels else None
+        self.pattern: Optional[str] = raw.get("pattern") or None
+        self.regex: Optional[Pattern[str]] = None
+        if self.pattern is None and self.levels is None:
+            raise ValueError(f"규칙 {self.name}: pattern 또는 levels가 필요합니다")
+        if self.pattern is not None:
+            try:
+                self.regex = re.compile(self.pattern)
+            except re.error as e:
+                raise ValueError(f"규칙 {self.name}: 잘못된 pattern ({e})") from e
+            bare = _ESCAPE.sub("", self.pattern)
+            if bare != bare.lower():
+                raise ValueError(f"규칙 {self.name}: pattern은 소문자로 써야 합니다")
+        # 요청마다 새로 만들지 않도록 응답 형태로 보관 (호출 측은 복사해서 사용)
+        self.result = {
+            "category": self.category,
+            "severity": self.severity,
+            "confidence": self.confidence,
+            "description": f"규칙 분류: {self.name}",
+            "source": "rule",
+            "rule": self.name,
+        }
+
+
+class RuleClassifier:
+    """컴파일된 규칙 집합 (스레드/코루틴 간 공유 가능, 상태 없음)"""
+
+    def __init__(self, rules: Iterable[Dict[str, Any]], min_confidence: float = 0.7,
+                 ambiguity_margin: float = 0.1, max_chars: int = 4096):
+        self.rules: List[Rule] = [Rule(raw) for raw in rules]
+        self.min_confidence = min_confidence
+        self.ambiguity_margin = ambiguity_margin
+        self.max_chars = max_chars
+        self._pattern_rules: List[Rule] = [r for r in self.rules if r.regex is not None]
+        # levels만 있는 규칙은 정규식 없이 level 값으로 바로 찾음
+        self._level_only: Dict[str, List[Rule]] = {}
+        for rule in self.rules:
+            if rule.pattern is None:
+                for level in rule.levels:
+                    self._level_only.setdefault(level, []).append(rule)
+
+    @classmethod
+    def from_file(cls, path: Path, **kwargs) -> "RuleClassifier":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("rules", []), **kwargs)
+
+    def classify(self, evt: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """(matched | ambiguous | unmatched, 분류 결과 또는 None)"""
+        level = str(evt.get("level") or evt.get("severity") or "").lower()
+        candidates: List[Rule] = list(self._level_only.get(level, ())) if level else []
+        message = evt.get("message") or evt.get("msg")
+        if message and self._pattern_rules:
+            text = str(message)[:self.max_chars].lower()
+            for rule in self._pattern_rules:
+                if (rule.levels is None or level in rule.levels) and rule.regex.search(text):
+                    candidates.append(rule)
+        if not candidates:
+            return UNMATCHED, None
+        best = max(candidates, key=lambda r: r.confidence)
+        if best.confidence < self.min_confidence:
+            return AMBIGUOUS, None
+        for rule in candidates:
+            if rule.category != best.category and best.confidence - rule.confidence < self.ambiguity_margin:
+                return AMBIGUOUS, None
+        return MATCHED, dict(best.result)
@@ -0,0 +1,37 @@
+"""규칙 분류기 테스트
+
+    cd llm-layer && py -m pytest test_rule_classifier.py
+"""
+from pathlib import Path
+
+from rule_classifier import AMBIGUOUS, MATCHED, UNMATCHED, RuleClassifier
+
+RULES_PATH = Path(__file__).resolve().parent / "rules.json"
+
+# 서로 다른 분류, 신뢰도 차이 0.05 (ambiguity_margin 0.1 미만), database 일치가 timeout 일치를 덮음
+_OVERLAPPING = [
+    {"name": "database", "pattern": "(?:mysql|postgres).*(?:timed? ?out|timeout|down)|timeout.*mysql",
+     "category": "database", "severity": "high", "confidence": 0.9},
+    {"name": "timeout", "pattern": "timed? ?out|timeout", "category": "network", "severity": "medium",
+     "confidence": 0.85},
+]
+
+
+def test_every_matching_rule_is_a_candidate_regardless_of_position():
+    classifier = RuleClassifier(_OVERLAPPING, ambiguity_margin=0.1)
+    for message in ("mysql timeout", "timeout talking to mysql", "MySQL connection timed out"):
+        assert classifier.classify({"level": "error", "message": message}) == (AMBIGUOUS, None), message
+
+
+def test_overlapping_matches_in_shipped_rules_are_ambiguous():
+    classifier = RuleClassifier.from_file(RULES_PATH)
+    for message in ("mysql timeout", "timeout talking to mysql"):
+        assert classifier.classify({"level": "error", "message": message}) == (AMBIGUOUS, None), message
+
+
+def test_single_rule_match_and_no_match():
+    classifier = RuleClassifier(_OVERLAPPING)
+    outcome, result = classifier.classify({"level": "error", "message": "Postgres is down"})
+    assert outcome == MATCHED
+    assert result["rule"] == "database" and result["source"] == "rule"
+    assert classifier.classify({"level": "error", "message": "all good"}) == (UNMATCHED, None)
@@ -1,26 +1,131 @@
-"""Metrics Exporter - Redis 인시던트를 Prometheus 메트릭으로 노출"""
+"""Metrics Exporter - Redis 인시던트를 Prometheus 메트릭으로 노출
+
+상태별 인시던트 수는 Event Processor가 인시던트 저장과 함께 갱신하는 인덱스에서 읽는다
+(incidents:status_counts 해시 하나, 키 개수와 무관하게 O(1)).
+RECONCILE_INTERVAL마다 SCAN으로 incident:* 해시와 인덱스를 비교해 어긋난 항목을 고친다
+(인덱스 도입 전 인시던트, 수동 삭제/수정 등).
+"""
 import os
+import time
 import redis
-from prometheus_client import Gauge, start_http_server
+from prometheus_client import Counter, Gauge, start_http_server
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6380")
 METRICS_PORT = int(os.getenv("METRICS_PORT", "9093"))
+EXPORT_INTERVAL = float(os.getenv("EXPORT_INTERVAL", "15"))
+RECONCILE_INTERVAL = float(os.getenv("RECONCILE_INTERVAL", "600"))  # 0이면 시작 시 한 번만
+RECONCILE_SCAN_COUNT = int(os.getenv("RECONCILE_SCAN_COUNT", "500"))
+
+# 상태별 인덱스 (event-processor/main.py와 같은 키)
+STATUS_INDEX_PREFIX = "incidents:status:"
+STATUS_COUNTS_KEY = "incidents:status_counts"
+STATUSES_KEY = "incidents:statuses"
+
+# 해시의 현재 상태에 맞게 인시던트 하나의 인덱스 위치/카운터 수정 (고친 항목 수 반환)
+REINDEX_LUA = """
+local status = redis.call('HGET', KEYS[1], 'status')
+local fixed = 0
+for _, s in ipairs(redis.call('SMEMBERS', KEYS[3])) do
+    if s ~= status and redis.call('ZREM', ARGV[2] .. s, ARGV[1]) == 1 then
+        redis.call('HINCRBY', KEYS[2], s, -1)
+        fixed = fixed + 1
+    end
+end
+if status and redis.call('ZADD', ARGV[2] .. status, 'NX', ARGV[3], ARGV[1]) == 1 then
+    redis.call('HINCRBY', KEYS[2], status, 1)
+    redis.call('SADD', KEYS[3], status)
+    fixed = fixed + 1
+end
+return fixed
+"""
+# 카운터를 인덱스 크기로 다시 맞춤
+RECOUNT_LUA = """
+local fixed = 0
+for _, s in ipairs(redis.call('SMEMBERS', KEYS[2])) do
+    local n = redis.call('ZCARD', ARGV[1] .. s)
+    if tonumber(redis.call('HGET', KEYS[1], s) or '0') ~= n then
+        redis.call('HSET', KEYS[1], s, n)
+        fixed = fixed + 1
+    end
+end
+return fixed
+"""
 
 incidents_active = Gauge("incidents_active", "활성 인시던트 수")
+incidents_by_status = Gauge("incidents_by_status", "상태별 인시던트 수", ["status"])
+index_repairs_total = Counter("incident_index_repairs_total", "재구성 작업이 고친 인덱스 항목 수")
+reconcile_duration = Gauge("incident_index_reconcile_seconds", "마지막 인덱스 재구성 소요 시간")
 start_http_server(METRICS_PORT)
 
 
+def export_counts(r: redis.Redis):
+    counts = {k.decode(): int(v) for k, v in r.hgetall(STATUS_COUNTS_KEY).items()}
+    for status, count in counts.items():
+        incidents_by_status.labels(status).set(count)
+    incidents_active.set(counts.get("active", 0))
+
+
+def reconcile(r: redis.Redis) -> int:
+    """SCAN 기반 인덱스 점검 (KEYS와 달리 Redis를 오래 막지 않음), 고친 항목 수 반환"""
+    started = time.perf_counter()
+    reindex = r.register_script(REINDEX_LUA)
+    recount = r.register_script(RECOUNT_LUA)
+    fixed = 0
+
+    def check(ids):
+        nonlocal fixed
+        if not ids:
+            return
+        now = time.time()
+        pipe = r.pipeline(transaction=False)
+        for inc_id in ids:
+            reindex(
+                keys=[f"incident:{inc_id}", STATUS_COUNTS_KEY, STATUSES_KEY],
+                args=[inc_id, STATUS_INDEX_PREFIX, now],
+                client=pipe,
+            )
+        fixed += sum(pipe.execute())
+
+    # 해시는 있는데 인덱스에 없거나 다른 상태에 있는 인시던트
+    batch = []
+    for key in r.scan_iter(match="incident:*", count=RECONCILE_SCAN_COUNT):
+        batch.append(key.decode().split(":", 1)[1])
+        if len(batch) >= RECONCILE_SCAN_COUNT:
+            check(batch)
+            batch = []
+    check(batch)
+    # 인덱스에는 있는데 해시가 사라진 인시던트
+    for status in r.smembers(STATUSES_KEY):
+        batch = []
+        for member, _ in r.zscan_iter(STATUS_INDEX_PREFIX + status.decode(), count=RECONCILE_SCAN_COUNT):
+            batch.append(member.decode())
+            if len(batch) >= RECONCILE_SCAN_COUNT:
+                check(batch)
+                batch = []
+        check(batch)
+    fixed += recount(keys=[STATUS_COUNTS_KEY, STATUSES_KEY], args=[STATUS_INDEX_PREFIX])
+    index_repairs_total.inc(fixed)
+    reconcile_duration.set(time.perf_counter() - started)
+    return fixed
+
+
 def run():
     r = redis.from_url(REDIS_URL)
+    next_reconcile = 0.0
     while True:
+        if time.monotonic() >= next_reconcile:
+            try:
+                fixed = reconcile(r)
+                if fixed:
+                    print(f"[MetricsExporter] 인시던트 인덱스 {fixed}건 수정")
+            except Exception as e:
+                print(f"[MetricsExporter] 인덱스 재구성 실패: {e}")
+            next_reconcile = time.monotonic() + RECONCILE_INTERVAL if RECONCILE_INTERVAL > 0 else float("inf")
         try:
-            keys = r.keys("incident:*")
-            count = sum(1 for k in keys if r.hget(k, "status") == b"active")
-            incidents_active.set(count)
+            export_counts(r)
         except Exception:
             incidents_active.set(0)
-        import time
-        time.sleep(15)
+        time.sleep(EXPORT_INTERVAL)
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+"""서비스 간 공용 모듈 (각 서비스가 상위 디렉터리를 sys.path에 넣고 import)"""
@@ -0,0 +1,40 @@
+"""로그 템플릿 정규화 (Event Processor fingerprint, LLM Layer 분류 캐시 키 공용)
+
+숫자·IP·UUID·16진수·따옴표 값을 자리표시자로 바꾼 메시지 + 서비스 + 심각도를 같은 키로 본다.
+두 서비스가 같은 키를 써야 상관 분석과 분류 캐시가 같은 이벤트를 같은 묶음으로 다루므로 여기서만 정의한다.
+"""
+import re
+import json
+import hashlib
+from typing import Any, Dict
+
+# 메시지에서 매번 바뀌는 값 → 자리표시자 (순서 중요: 긴 형식부터)
+_TEMPLATE_RULES = [
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<uuid>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b0x[0-9a-f]+\b|\b(?=[0-9a-f]*\d)[0-9a-f]{8,}\b", re.I), "<hex>"),
+    (re.compile(r"\"[^\"]*\"|'[^']*'"), "<str>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<num>"),
+    (re.compile(r"\s+"), " "),
+]
+# message가 없는 이벤트의 키에서 제외할 필드
+_VOLATILE_FIELDS = {"id", "timestamp", "time", "@timestamp", "ts"}
+
+
+def message_template(message: str) -> str:
+    """로그 메시지 정규화 (id/숫자/주소/따옴표 값 제거)"""
+    for pattern, placeholder in _TEMPLATE_RULES:
+        message = pattern.sub(placeholder, message)
+    return message.strip()
+
+
+def template_key(evt: Dict[str, Any]) -> str:
+    """서비스 + 심각도 + 메시지 템플릿 → 16바이트 blake2b 16진수"""
+    service = str(evt.get("service") or evt.get("source") or "")
+    severity = str(evt.get("severity") or evt.get("level") or "").lower()
+    message = evt.get("message") or evt.get("msg")
+    if message:
+        body = message_template(str(message))
+    else:
+        body = json.dumps({k: v for k, v in evt.items() if k not in _VOLATILE_FIELDS}, sort_keys=True, default=str)
+    return hashlib.blake2b(f"{service}\x1f{severity}\x1f{body}".encode(), digest_size=16).hexdigest()
@@ -1,9 +1,12 @@
 """대시보드 접속 IP 기록 (개인 자료용)"""
+import asyncio
 import json
 import logging
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
+from app import metrics
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -24,19 +27,135 @@ def _get_client_ip(request) -> str:
     return "unknown"
 
 
+class AccessLogWriter:
+    """접속 기록 비동기 배치 기록기
+
+    요청 처리 중에는 큐에 넣기만 하고, 백그라운드 작업이 ACCESS_LOG_BATCH_SIZE개 또는
+    ACCESS_LOG_FLUSH_INTERVAL초마다 모아서 별도 스레드에서 파일에 쓴다.
+    큐가 가득 차면 요청을 멈추지 않고 기록을 버리고 개수만 센다.
+    파일은 날짜가 바뀌거나 ACCESS_LOG_MAX_BYTES를 넘으면 교체하고 ACCESS_LOG_BACKUP_COUNT개까지 보관한다.
+    """
+
+    def __init__(self, path: Path = ACCESS_LOG_PATH):
+        self.path = path
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=settings.ACCESS_LOG_QUEUE_SIZE)
+        self._task: Optional[asyncio.Task] = None
+        self._file_date: Optional[date] = None
+        self.stats = {"written": 0, "dropped": 0, "batches": 0, "rotations": 0, "errors": 0}
+
+    def submit(self, entry: Dict[str, Any]):
+        """기록 추가 (블로킹 없음)"""
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            metrics.access_log_dropped.inc()
+            dropped = self.stats["dropped"]
+            # 로그 폭주 방지: 1, 2, 4, 8, ... 번째와 1000건마다만 경고
+            if dropped & (dropped - 1) == 0 or dropped % 1000 == 0:
+                logger.warning(f"대시보드 접속 기록 유실 (큐 가득 참, 누적 {dropped}건)")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """남은 기록을 모두 쓰고 종료"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._flush(self._drain([], limit=None))
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + settings.ACCESS_LOG_FLUSH_INTERVAL
+            try:
+                while len(batch) < settings.ACCESS_LOG_BATCH_SIZE:
+                    self._drain(batch)
+                    if len(batch) >= settings.ACCESS_LOG_BATCH_SIZE:
+                        break
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                await self._flush(batch)
+                raise
+            await self._flush(batch)
+
+    def _drain(self, batch: List[Dict[str, Any]], limit: Optional[int] = -1) -> List[Dict[str, Any]]:
+        """큐에 이미 있는 항목을 기다리지 않고 batch에 추가 (limit=None이면 전부)"""
+        if limit == -1:
+            limit = settings.ACCESS_LOG_BATCH_SIZE
+        while limit is None or len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in batch).encode("utf-8")
+        try:
+            await asyncio.to_thread(self._write, data)
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"대시보드 접속 기록 실패 ({len(batch)}건): {e}")
+
+    def _write(self, data: bytes):
+        """파일 교체 확인 후 추가 (스레드에서 실행)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        today = date.today()
+        if self.path.exists():
+            stat = self.path.stat()
+            if self._file_date is None:
+                self._file_date = date.fromtimestamp(stat.st_mtime)
+            if stat.st_size > 0 and (self._file_date != today or
+                                     stat.st_size + len(data) > settings.ACCESS_LOG_MAX_BYTES):
+                self._rotate(self._file_date)
+        self._file_date = today
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+    def _rotate(self, file_date: date):
+        """dashboard_access.jsonl → dashboard_access.YYYY-MM-DD[.N].jsonl"""
+        stem, suffix = self.path.stem, self.path.suffix
+        target = self.path.with_name(f"{stem}.{file_date.isoformat()}{suffix}")
+        n = 1
+        while target.exists():
+            target = self.path.with_name(f"{stem}.{file_date.isoformat()}.{n}{suffix}")
+            n += 1
+        self.path.rename(target)
+        self.stats["rotations"] += 1
+        keep = settings.ACCESS_LOG_BACKUP_COUNT
+        if keep > 0:
+            backups = sorted(self.path.parent.glob(f"{stem}.*{suffix}"), key=lambda p: p.stat().st_mtime)
+            for old in backups[:-keep]:
+                old.unlink(missing_ok=True)
+
+
+access_log_writer = AccessLogWriter()
+
+
 def log_dashboard_access(request, username: Optional[str] = None):
-    """대시보드 접속 기록 (개인 자료용)"""
+    """대시보드 접속 기록 (개인 자료용) - 큐에 넣기만 하고 파일 쓰기는 백그라운드"""
     try:
-        ip = _get_client_ip(request)
         entry = {
             "timestamp": datetime.now().isoformat(),
-            "ip": ip,
+            "ip": _get_client_ip(request),
             "path": str(request.url.path),
             "username": username,
         }
-        ACCESS_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(ACCESS_LOG_PATH, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-            f.flush()
+        access_log_writer.submit(entry)
     except Exception as e:
         logger.warning(f"대시보드 접속 기록 실패: {e}")
@@ -0,0 +1,119 @@
+"""루프백 주소 선택 캐시 (localhost / 127.0.0.1 / ::1)"""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+LOOPBACK_HOSTS = ("localhost", "127.0.0.1", "::1")
+# URL에 들어갈 형태 (IPv6는 대괄호)
+_CANDIDATE_HOSTS = ("localhost", "127.0.0.1", "[::1]")
+
+PROBE_TIMEOUT = 1.0  # 초
+
+
+class AddressResolver:
+    """서비스별로 접속에 성공한 루프백 주소를 기억해 먼저 시도
+
+    매 요청마다 localhost → 127.0.0.1 → [::1] 순서로 시도하면 죽은 첫 후보 때문에
+    매번 연결 실패 비용을 치르므로, 성공한 주소를 (서비스, 포트) 단위로 캐시한다.
+    캐시된 주소가 실패하면 캐시를 비우고 백그라운드에서만 재탐색한다.
+    프록시, 헬스체크, check-service-access가 같은 인스턴스를 공유한다.
+    """
+
+    def __init__(self):
+        self._preferred: Dict[Tuple[str, int], str] = {}
+        self._probe_tasks: Dict[Tuple[str, int], asyncio.Task] = {}
+
+    @staticmethod
+    def _split(url: str) -> Optional[Tuple[str, str, int, str]]:
+        """(scheme, host, port, path+query) 반환, 루프백이 아니면 None"""
+        try:
+            p = urlparse(url)
+            if p.hostname not in LOOPBACK_HOSTS:
+                return None
+            scheme = p.scheme or "http"
+            port = p.port or (443 if scheme == "https" else 80)
+            path = (p.path or "/") + (f"?{p.query}" if p.query else "")
+            host = f"[{p.hostname}]" if ":" in p.hostname else p.hostname
+            return scheme, host, port, path
+        except Exception:
+            return None
+
+    def candidates(self, service_id: str, url: str) -> List[str]:
+        """시도할 URL 목록 (학습된 주소 우선)"""
+        parts = self._split(url)
+        if parts is None:
+            return [url]
+        scheme, _, port, path = parts
+        hosts = list(_CANDIDATE_HOSTS)
+        preferred = self._preferred.get((service_id, port))
+        if preferred:
+            hosts.remove(preferred)
+            hosts.insert(0, preferred)
+        return [f"{scheme}://{host}:{port}{path}" for host in hosts]
+
+    def record_success(self, service_id: str, url: str):
+        """접속 성공한 주소 기록"""
+        parts = self._split(url)
+        if parts is None:
+            return
+        _, host, port, _ = parts
+        key = (service_id, port)
+        if self._preferred.get(key) != host:
+            logger.debug(f"주소 학습: {service_id}:{port} → {host}")
+            self._preferred[key] = host
+
+    def record_failure(self, service_id: str, url: str):
+        """연결 실패 기록 - 학습된 주소였다면 캐시를 비우고 백그라운드 재탐색"""
+        parts = self._split(url)
+        if parts is None:
+            return
+        _, host, port, _ = parts
+        key = (service_id, port)
+        if self._preferred.get(key) != host:
+            return
+        del self._preferred[key]
+        task = self._probe_tasks.get(key)
+        if task is None or task.done():
+            try:
+                self._probe_tasks[key] = asyncio.create_task(self._probe(key))
+            except RuntimeError:
+                # 실행 중인 이벤트 루프 없음
+                pass
+
+    async def _probe(self, key: Tuple[str, int]):
+        """후보 주소에 TCP 연결만 시도해 처음 성공한 주소를 기록"""
+        service_id, port = key
+        for host in _CANDIDATE_HOSTS:
+            try:
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host.strip("[]"), port), timeout=PROBE_TIMEOUT
+                )
+                writer.close()
+                self._preferred.setdefault(key, host)
+                logger.info(f"주소 재탐색: {service_id}:{port} → {host}")
+                return
+            except Exception:
+                continue
+        logger.debug(f"주소 재탐색 실패: {service_id}:{port} (모든 후보 연결 불가)")
+
+    def get_preferred(self) -> Dict[str, str]:
+        """학습된 주소 목록 (디버그용)"""
+        return {f"{sid}:{port}": host for (sid, port), host in self._preferred.items()}
+
+    def forget(self, service_id: str):
+        """서비스 설정 변경/제거 시 학습된 주소와 재탐색 작업 삭제"""
+        for key in [k for k in self._preferred if k[0] == service_id]:
+            del self._preferred[key]
+        for key in [k for k in self._probe_tasks if k[0] == service_id]:
+            self._probe_tasks.pop(key).cancel()
+
+    async def aclose(self):
+        """진행 중인 재탐색 중단"""
+        tasks = [t for t in self._probe_tasks.values() if not t.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._probe_tasks.clear()
@@ -0,0 +1,147 @@
+"""서비스별 동시 요청 제한 (입장 제어)"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from pydantic import BaseModel, ValidationError
+from app.models import ServiceInfo
+from app import metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionConfig(BaseModel):
+    """입장 제어 설정 (services.json metadata.admission으로 서비스별 지정)"""
+    max_concurrency: int = settings.PROXY_MAX_CONCURRENCY  # 동시에 업스트림으로 보낼 요청 수 (0이면 제한 없음)
+    max_queue: int = settings.PROXY_MAX_QUEUE  # 자리를 기다릴 수 있는 요청 수
+    queue_timeout: float = settings.PROXY_QUEUE_TIMEOUT  # 대기 상한 (초), 넘으면 503
+    reject_status: int = settings.PROXY_QUEUE_FULL_STATUS  # 대기열이 가득 찼을 때 응답 코드 (429 또는 503)
+
+
+class AdmissionRejected(Exception):
+    """입장 거절 (대기열 가득 참 / 대기 시간 초과)"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ServiceGate:
+    """서비스 하나의 동시 실행 슬롯 + FIFO 대기열
+
+    슬롯이 비면 대기 중인 가장 오래된 요청에 바로 넘겨주므로 새로 온 요청이 새치기하지 않는다.
+    """
+
+    def __init__(self, service_id: str, config: AdmissionConfig):
+        self.service_id = service_id
+        self.config = config
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.stats = {"admitted": 0, "queued": 0, "rejected_full": 0, "rejected_timeout": 0}
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """슬롯 확보 (필요하면 대기), 거절 시 AdmissionRejected. 대기열을 거쳤으면 True"""
+        limit = self.config.max_concurrency
+        if limit <= 0 or (self.active < limit and not self._waiters):
+            self.active += 1
+            self.stats["admitted"] += 1
+            return False
+        if len(self._waiters) >= self.config.max_queue:
+            self.stats["rejected_full"] += 1
+            metrics.admission_rejected.labels(self.service_id, "queue_full").inc()
+            raise AdmissionRejected(
+                self.config.reject_status,
+                f"서비스 '{self.service_id}' 요청이 많아 대기열이 가득 찼습니다",
+                retry_after=max(1, int(self.config.queue_timeout)),
+            )
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.stats["queued"] += 1
+        metrics.admission_queue_depth.labels(self.service_id).set(len(self._waiters))
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.config.queue_timeout):
+                await future
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # 슬롯을 넘겨받은 직후 취소/시간 초과 → 다음 대기자에게 반환
+                self.release()
+            else:
+                future.cancel()
+                self._remove_waiter(future)
+            if isinstance(e, TimeoutError):
+                self.stats["rejected_timeout"] += 1
+                metrics.admission_rejected.labels(self.service_id, "queue_timeout").inc()
+                raise AdmissionRejected(
+                    503,
+                    f"서비스 '{self.service_id}' 대기 시간({self.config.queue_timeout:g}초)을 초과했습니다",
+                    retry_after=max(1, int(self.config.queue_timeout)),
+                ) from None
+            raise
+        finally:
+            metrics.admission_queue_seconds.labels(self.service_id).observe(time.perf_counter() - started)
+            metrics.admission_queue_depth.labels(self.service_id).set(len(self._waiters))
+        self.stats["admitted"] += 1
+        return True
+
+    def release(self):
+        """슬롯 반환 (대기자가 있으면 그대로 넘김)"""
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active = max(0, self.active - 1)
+
+    def _remove_waiter(self, future: asyncio.Future):
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrency": self.config.max_concurrency,
+            "max_queue": self.config.max_queue,
+        }
+
+
+class AdmissionController:
+    """서비스별 ServiceGate 관리 (ProxyRouter 전용)"""
+
+    def __init__(self):
+        self._gates: Dict[str, Optional[ServiceGate]] = {}
+
+    def get(self, service: ServiceInfo) -> Optional[ServiceGate]:
+        """서비스 입장 제어 반환 (metadata.admission이 false면 None)"""
+        if service.id in self._gates:
+            return self._gates[service.id]
+        raw = (service.metadata or {}).get("admission", {})
+        gate = None
+        if raw is not False:
+            try:
+                config = AdmissionConfig(**(raw if isinstance(raw, dict) else {}))
+            except ValidationError as e:
+                logger.warning(f"입장 제어 설정 오류 {service.id}: {e} → 기본값 사용")
+                config = AdmissionConfig()
+            gate = ServiceGate(service.id, config)
+        self._gates[service.id] = gate
+        return gate
+
+    def remove(self, service_id: str):
+        """설정 변경/제거 시 (진행 중 요청은 이전 게이트에 반환)"""
+        self._gates.pop(service_id, None)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {service_id: g.get_stats() for service_id, g in self._gates.items() if g is not None}
@@ -0,0 +1,169 @@
+"""업스트림 서킷 브레이커"""
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Optional, Tuple
+from pydantic import BaseModel, ValidationError
+from app.models import ServiceInfo
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    """서킷 상태"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreakerConfig(BaseModel):
+    """서킷 브레이커 설정 (services.json metadata.circuit_breaker로 서비스별 지정)"""
+    window_size: int = 20  # 최근 N회 호출 기준으로 비율 계산
+    min_calls: int = 5  # 이 횟수 미만이면 판단 보류
+    failure_rate_threshold: float = 0.5  # 실패율이 이 이상이면 open
+    slow_call_ms: float = 5000  # 이보다 느린 호출은 '느린 호출'
+    slow_call_rate_threshold: float = 1.0  # 느린 호출 비율이 이 이상이면 open (1.0 = 전부 느릴 때만)
+    open_seconds: float = 30  # open 유지 시간, 이후 half-open
+    half_open_max_calls: int = 1  # half-open에서 동시에 허용할 시험 호출 수
+
+
+class CircuitBreaker:
+    """서비스 하나의 서킷 (closed → open → half-open → closed)
+
+    open 상태에서는 업스트림에 연결하지 않고 즉시 거절하므로, 멈춘 백엔드 때문에
+    요청마다 PROXY_TIMEOUT만큼 연결 슬롯을 붙잡지 않는다.
+    """
+
+    def __init__(self, service_id: str, config: CircuitBreakerConfig):
+        self.service_id = service_id
+        self.config = config
+        self.state = CircuitState.CLOSED
+        self._calls: Deque[Tuple[bool, bool]] = deque(maxlen=config.window_size)  # (실패, 느림)
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._open_count = 0
+
+    def allow_request(self) -> bool:
+        """요청 허용 여부 (half-open이면 시험 호출 슬롯 확보)"""
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self._opened_at < self.config.open_seconds:
+                return False
+            self._transition(CircuitState.HALF_OPEN)
+        if self.state == CircuitState.HALF_OPEN:
+            if self._half_open_in_flight >= self.config.half_open_max_calls:
+                return False
+            self._half_open_in_flight += 1
+        return True
+
+    def retry_after(self) -> int:
+        """open 해제까지 남은 시간 (초)"""
+        remaining = self.config.open_seconds - (time.monotonic() - self._opened_at)
+        return max(1, int(remaining + 0.999))
+
+    def record(self, success: Optional[bool], elapsed_ms: float = 0.0):
+        """호출 결과 기록 (success=None: 클라이언트 취소 등 판단 불가, 슬롯만 반환)"""
+        if self.state == CircuitState.HALF_OPEN and self._half_open_in_flight > 0:
+            self._half_open_in_flight -= 1
+        if success is None:
+            return
+        slow = elapsed_ms >= self.config.slow_call_ms
+        if self.state == CircuitState.HALF_OPEN:
+            if success and not slow:
+                self._transition(CircuitState.CLOSED)
+            else:
+                self._transition(CircuitState.OPEN)
+            return
+        if self.state == CircuitState.OPEN:
+            return
+        self._calls.append((not success, slow))
+        self._evaluate()
+
+    def record_health(self, is_healthy: bool):
+        """헬스체크 결과 반영 - open 중 정상이면 바로 half-open, closed 중 실패는 실패 호출로 집계"""
+        if self.state == CircuitState.OPEN:
+            if is_healthy:
+                self._transition(CircuitState.HALF_OPEN)
+            return
+        if self.state == CircuitState.HALF_OPEN:
+            if not is_healthy:
+                self._transition(CircuitState.OPEN)
+            return
+        if not is_healthy:
+            self._calls.append((True, False))
+            self._evaluate()
+
+    def _evaluate(self):
+        total = len(self._calls)
+        if total < self.config.min_calls:
+            return
+        failures = sum(1 for failed, _ in self._calls if failed)
+        slow = sum(1 for _, is_slow in self._calls if is_slow)
+        if (failures / total >= self.config.failure_rate_threshold or
+                slow / total >= self.config.slow_call_rate_threshold):
+            logger.warning(
+                f"서킷 open: {self.service_id} (실패 {failures}/{total}, 느린 호출 {slow}/{total})"
+            )
+            self._transition(CircuitState.OPEN)
+
+    def _transition(self, state: CircuitState):
+        if self.state == state:
+            return
+        logger.info(f"서킷 상태 변경: {self.service_id} {self.state.value} → {state.value}")
+        self.state = state
+        self._half_open_in_flight = 0
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+            self._open_count += 1
+        self._calls.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = len(self._calls)
+        failures = sum(1 for failed, _ in self._calls if failed)
+        stats = {
+            "state": self.state.value,
+            "window_calls": total,
+            "failure_rate": round(failures / total, 3) if total else 0.0,
+            "open_count": self._open_count,
+        }
+        if self.state == CircuitState.OPEN:
+            stats["retry_after_seconds"] = self.retry_after()
+        return stats
+
+
+class CircuitBreakerRegistry:
+    """서비스별 서킷 브레이커 관리 (ProxyRouter, HealthChecker 공유)"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, service: ServiceInfo) -> Optional[CircuitBreaker]:
+        """서비스 서킷 반환 (비활성화 시 None)"""
+        breaker = self._breakers.get(service.id)
+        if breaker is not None:
+            return breaker
+        if not settings.CIRCUIT_BREAKER_ENABLED:
+            return None
+        raw = (service.metadata or {}).get("circuit_breaker", {})
+        if raw is False:
+            return None
+        try:
+            config = CircuitBreakerConfig(**(raw if isinstance(raw, dict) else {}))
+        except ValidationError as e:
+            logger.warning(f"서킷 브레이커 설정 오류 {service.id}: {e} → 기본값 사용")
+            config = CircuitBreakerConfig()
+        breaker = CircuitBreaker(service.id, config)
+        self._breakers[service.id] = breaker
+        return breaker
+
+    def record_health(self, service: ServiceInfo, is_healthy: bool):
+        breaker = self.get(service)
+        if breaker is not None:
+            breaker.record_health(is_healthy)
+
+    def remove(self, service_id: str):
+        self._breakers.pop(service_id, None)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {service_id: b.get_stats() for service_id, b in self._breakers.items()}
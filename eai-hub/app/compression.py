@@ -0,0 +1,107 @@
+"""응답 압축 (gzip / brotli) 공통 처리"""
+import gzip
+import zlib
+from typing import AsyncIterator, Iterable, Optional
+
+# brotli는 brotli 패키지가 있을 때만 사용
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+# 압축 효과가 있는 형식 (이미지/폰트/압축 파일 등은 제외)
+_COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/x-javascript",
+    "application/xml",
+    "application/manifest+json",
+    "image/svg+xml",
+)
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # 첫 요청 시 압축하므로 속도와 압축률 절충 (빌드 시 사전 압축은 11)
+
+
+def is_compressible(content_type: Optional[str], types: Iterable[str] = _COMPRESSIBLE_TYPES) -> bool:
+    """압축 대상 형식인지 (types의 접두어 중 하나로 시작)"""
+    if not content_type:
+        return False
+    content_type = content_type.lower()
+    return any(content_type.startswith(t) for t in types)
+
+
+def supported_encodings() -> Iterable[str]:
+    """서버가 만들 수 있는 인코딩 (선호 순)"""
+    return ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+
+def choose_encoding(accept_encoding: Optional[str], available: Iterable[str] = None) -> Optional[str]:
+    """Accept-Encoding에서 사용할 인코딩 선택 (available 순서가 우선순위, 없으면 None = 원본)"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    for encoding in (available if available is not None else supported_encodings()):
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """본문 전체 압축"""
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY if level is None else level)
+    if encoding == "gzip":
+        # mtime=0: 같은 본문이면 같은 바이트 (ETag/사전 압축 파일 비교용)
+        return gzip.compress(data, compresslevel=GZIP_LEVEL if level is None else level, mtime=0)
+    raise ValueError(f"지원하지 않는 인코딩: {encoding}")
+
+
+class StreamCompressor:
+    """청크 단위 압축기 - 청크마다 flush해 스트리밍 응답(SSE 등)도 지연 없이 전달"""
+
+    __slots__ = ("_encoding", "_compressor")
+
+    def __init__(self, encoding: str):
+        self._encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        elif encoding == "gzip":
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip 헤더
+        else:
+            raise ValueError(f"지원하지 않는 인코딩: {encoding}")
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self._encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+async def compress_stream(chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+    """청크 스트림 압축"""
+    compressor = StreamCompressor(encoding)
+    async for chunk in chunks:
+        if chunk:
+            out = compressor.compress(chunk)
+            if out:
+                yield out
+    yield compressor.finish()
@@ -13,6 +13,30 @@ class Settings(BaseSettings):
     # 서비스 레지스트리 파일 경로
     SERVICES_CONFIG_PATH: str = "services.json"
     
+    # 서비스 설정 재로드 (파일 변경을 감지해 재시작 없이 반영)
+    SERVICES_RELOAD_INTERVAL: float = 2.0  # 변경 확인 주기 (초, 0이면 감시 안 함)
+    SERVICES_RELOAD_DRAIN_TIMEOUT: float = 30.0  # 변경/제거된 서비스의 기존 연결이 진행 중 요청을 기다리는 최대 시간 (초)
+    
+    # 로그인 세션 저장소 (memory: 단일 프로세스, redis: 여러 워커/프로세스 공유)
+    SESSION_BACKEND: str = "memory"
+    SESSION_REDIS_URL: str = "redis://localhost:6379/0"
+    SESSION_TTL: int = 86400  # 초 (쿠키 max_age와 동일)
+    SESSION_SWEEP_INTERVAL: int = 60  # memory 백엔드 만료 세션 정리 주기 (초)
+    
+    # 대시보드 접속 기록 (data/dashboard_access.jsonl, 백그라운드 배치 기록)
+    ACCESS_LOG_QUEUE_SIZE: int = 10000  # 초과분은 요청을 막지 않고 버림
+    ACCESS_LOG_BATCH_SIZE: int = 100
+    ACCESS_LOG_FLUSH_INTERVAL: float = 1.0  # 초
+    ACCESS_LOG_MAX_BYTES: int = 10 * 1024 * 1024  # 넘거나 날짜가 바뀌면 파일 교체
+    ACCESS_LOG_BACKUP_COUNT: int = 30  # 교체된 파일 보관 개수 (0이면 전부 보관)
+    
+    # 대시보드 정적 파일 / 생성 HTML 캐시 (ETag는 콘텐츠 해시, gzip·brotli는 사전 압축본 또는 첫 요청 시 압축)
+    STATIC_CACHE_MAX_BYTES: int = 32 * 1024 * 1024  # 메모리에 올려 둘 정적 파일 전체 크기
+    STATIC_CACHE_MAX_FILE_BYTES: int = 1024 * 1024  # 이보다 큰 파일은 디스크에서 스트리밍
+    STATIC_COMPRESS_MIN_BYTES: int = 1024  # 이보다 작으면 압축하지 않음
+    STATIC_CACHE_CONTROL: str = "no-cache"  # 해시 없는 자산 (ETag로 재검증), 해시 자산은 1년 immutable
+    PAGE_CACHE_MAX_ENTRIES: int = 500  # 서비스 상세/API 정보 페이지 캐시 개수
+    
     # 서비스 연결 호스트 (localhost → IPv6 우선 시도 시 실패할 수 있어 127.0.0.1 권장)
     SERVICE_HOST: str = "127.0.0.1"
     
@@ -20,10 +44,63 @@ class Settings(BaseSettings):
     HEALTH_CHECK_INTERVAL: int = 30  # 초
     HEALTH_CHECK_TIMEOUT: int = 5  # 초
     
+    # 적응형 헬스체크 스케줄 (기본 주기는 HEALTH_CHECK_INTERVAL, 서비스별 metadata.health_check_interval)
+    HEALTH_CHECK_SUSPECT_INTERVAL: int = 5  # 실패 직후/복구 직후 재확인 주기 (초)
+    HEALTH_CHECK_DOWN_AFTER: int = 3  # 연속 실패가 이 횟수 이상이면 지수 백오프
+    HEALTH_CHECK_MAX_BACKOFF: int = 300  # 백오프 상한 (초)
+    HEALTH_CHECK_JITTER: float = 0.2  # 주기 대비 무작위 편차 비율 (동시 폭주 방지)
+    HEALTH_CHECK_MAX_CONCURRENCY: int = 10  # 동시 헬스체크 상한 (공유 클라이언트 연결 수)
+    HEALTH_STATUS_MAX_AGE: int = 60  # /api/health가 캐시 대신 즉시 재확인하는 상태 나이 (초)
+    
+    # 상태 변경 스트림 (/api/health/stream, SSE)
+    HEALTH_STREAM_MAX_CLIENTS: int = 100
+    HEALTH_STREAM_HEARTBEAT: int = 15  # 변경이 없을 때 keep-alive 전송 주기 (초)
+    
     # 프록시 설정
     PROXY_TIMEOUT: int = 30  # 초
     PROXY_FOLLOW_REDIRECTS: bool = True
     
+    # 업스트림 연결 풀 설정 (services.json metadata로 서비스별 덮어쓰기 가능)
+    PROXY_POOL_MAX_CONNECTIONS: int = 100
+    PROXY_POOL_MAX_KEEPALIVE: int = 20
+    PROXY_POOL_KEEPALIVE_EXPIRY: float = 30.0  # 초
+    PROXY_HTTP2: bool = True  # h2 설치 + 업스트림 지원 시에만 사용
+    
+    # 서비스별 입장 제어 (metadata.admission으로 서비스별 덮어쓰기, 느린 백엔드가 워커를 독점하지 않도록)
+    PROXY_MAX_CONCURRENCY: int = 100  # 서비스당 동시 업스트림 요청 수 (0이면 제한 없음)
+    PROXY_MAX_QUEUE: int = 200  # 상한 초과 시 대기할 수 있는 요청 수
+    PROXY_QUEUE_TIMEOUT: float = 30.0  # 대기 상한 (초), 넘으면 503
+    PROXY_QUEUE_FULL_STATUS: int = 429  # 대기열이 가득 찼을 때 응답 코드 (429 또는 503)
+    
+    # 동일 요청 병합 (캐시 미지정 서비스의 GET/HEAD, 같은 URL·쿠키·인증·Accept 헤더)
+    PROXY_COALESCE: bool = True
+    PROXY_COALESCE_MAX_BYTES: int = 1024 * 1024  # 응답이 이보다 크면 공유하지 않고 각자 요청
+    PROXY_COALESCE_BYPASS_TTL: float = 30  # 공유할 수 없는 응답(SSE 등)이 나온 요청은 이 시간(초) 동안 병합하지 않음
+    
+    # 스트리밍 프록시 (요청/응답 본문을 버퍼링하지 않고 청크 단위로 전달)
+    PROXY_STREAMING: bool = True
+    PROXY_REWRITE_CSS_URLS: bool = False  # HTML 경로 교체 시 CSS url(/...)도 교체
+    
+    # 프록시 응답 압축 (클라이언트 Accept-Encoding 협상, 업스트림이 이미 압축한 응답은 그대로 전달)
+    PROXY_COMPRESS: bool = True  # 서비스별 metadata.compress로 덮어쓰기
+    PROXY_COMPRESS_MIN_BYTES: int = 1024  # 이보다 작은 응답은 압축하지 않음
+    PROXY_COMPRESS_TYPES: str = (
+        "text/,application/json,application/javascript,application/xml,application/problem+json,image/svg+xml"
+    )
+    
+    # 서킷 브레이커 (임계값은 services.json metadata.circuit_breaker로 서비스별 지정)
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    
+    # 다중 인스턴스 로드밸런싱 (서비스별 metadata.lb_strategy로 덮어쓰기)
+    LB_STRATEGY: str = "round_robin"  # round_robin | least_outstanding | ewma
+    LB_EJECT_AFTER_FAILURES: int = 3  # 연속 실패 시 인스턴스 일시 제외
+    LB_EJECT_SECONDS: int = 30
+    
+    # 프록시 GET 응답 캐시 (metadata.cache 지정 서비스만, TTL은 서비스별)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2000
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
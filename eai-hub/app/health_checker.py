@@ -1,5 +1,6 @@
 """서비스 헬스체크"""
 import asyncio
+import random
 import time
 import logging
 from datetime import datetime
@@ -8,19 +9,45 @@ from urllib.parse import urlparse
 import httpx
 from app.models import ServiceStatus, ServiceInfo
 from app.service_registry import ServiceRegistry
+from app.address_resolver import AddressResolver
+from app.circuit_breaker import CircuitBreakerRegistry
+from app.load_balancer import LoadBalancer
+from app.status_stream import StatusBroadcaster
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
 
 class HealthChecker:
-    """서비스 헬스체크 관리"""
+    """서비스 헬스체크 관리
     
-    def __init__(self, registry: ServiceRegistry):
+    서비스마다 다음 체크 시각을 따로 두고(지터 포함) 도래한 서비스만 확인한다.
+    정상 서비스는 기본 주기, 실패/복구 직후는 HEALTH_CHECK_SUSPECT_INTERVAL로 자주,
+    HEALTH_CHECK_DOWN_AFTER회 이상 연속 실패한 서비스는 지수 백오프로 드물게 확인한다.
+    모든 체크는 공유 클라이언트 하나와 HEALTH_CHECK_MAX_CONCURRENCY 동시 실행 상한을 쓴다.
+    """
+    
+    def __init__(
+        self,
+        registry: ServiceRegistry,
+        resolver: Optional[AddressResolver] = None,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+        balancer: Optional[LoadBalancer] = None,
+        broadcaster: Optional[StatusBroadcaster] = None
+    ):
         self.registry = registry
+        self.resolver = resolver or AddressResolver()
+        self.breakers = breakers or CircuitBreakerRegistry()
+        self.balancer = balancer or LoadBalancer()
+        self.broadcaster = broadcaster or StatusBroadcaster()
         self._status_cache: Dict[str, ServiceStatus] = {}
         self._running = False
         self._task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(settings.HEALTH_CHECK_MAX_CONCURRENCY)
+        self._next_check: Dict[str, float] = {}  # service_id → time.monotonic() 기준 다음 체크 시각
+        self._failures: Dict[str, int] = {}  # 연속 실패 횟수
+        self._inflight: Dict[str, asyncio.Task] = {}
     
     async def check_service(self, service_id: str) -> ServiceStatus:
         """특정 서비스 헬스체크"""
@@ -38,84 +65,160 @@ class HealthChecker:
         
         # 데스크톱 앱 또는 base_url 없음: 헬스체크 불가 → 비정상
         if service.type.value == "desktop" or not service.base_url:
-            return ServiceStatus(
+            return self._remember(ServiceStatus(
                 service_id=service_id,
                 is_healthy=False,
                 last_check=datetime.now(),
                 error_message="헬스체크 불가"
-            )
+            ))
         
-        start_time = time.time()
+        health_url = service.get_health_url()
+        if not health_url:
+            return self._remember(ServiceStatus(
+                    service_id=service_id,
+                    is_healthy=False,
+                    last_check=datetime.now(),
+                    error_message="헬스체크 불가"
+                ))
+        # 우리 서버와 같은 주소면 헬스체크 불가 (로그인 페이지 200으로 잘못된 정상 판정 방지)
         try:
-            health_url = service.get_health_url()
-            if not health_url:
-                return ServiceStatus(
-                        service_id=service_id,
-                        is_healthy=False,
-                        last_check=datetime.now(),
-                        error_message="헬스체크 불가"
-                    )
-            # 우리 서버와 같은 주소면 헬스체크 불가 (로그인 페이지 200으로 잘못된 정상 판정 방지)
-            try:
-                p = urlparse(health_url)
-                port = p.port or (443 if p.scheme == "https" else 80)
-                if p.hostname in ("localhost", "127.0.0.1") and port == settings.PORT:
-                    return ServiceStatus(
-                        service_id=service_id,
-                        is_healthy=False,
-                        last_check=datetime.now(),
-                        error_message="헬스체크 불가 (EAI Hub와 포트 충돌)"
-                    )
-            except Exception:
-                pass
-            async with httpx.AsyncClient(timeout=settings.HEALTH_CHECK_TIMEOUT) as client:
-                response = await client.get(health_url, follow_redirects=True)
-                response_time = (time.time() - start_time) * 1000
-                # 리다이렉트 따라간 최종 응답이 2xx면 정상 (Vite 등)
-                is_healthy = 200 <= response.status_code < 300
-                logger.info(f"헬스체크 {service_id}: {health_url} -> {response.status_code} ({'정상' if is_healthy else '비정상'})")
-                
-                status = ServiceStatus(
+            p = urlparse(health_url)
+            port = p.port or (443 if p.scheme == "https" else 80)
+            if p.hostname in ("localhost", "127.0.0.1") and port == settings.PORT:
+                return self._remember(ServiceStatus(
                     service_id=service_id,
-                    is_healthy=is_healthy,
-                    status_code=response.status_code,
-                    response_time_ms=round(response_time, 2),
+                    is_healthy=False,
                     last_check=datetime.now(),
-                    error_message=None if is_healthy else f"HTTP {response.status_code}"
-                )
-                
-                self._status_cache[service_id] = status
-                return status
-                
+                    error_message="헬스체크 불가 (EAI Hub와 포트 충돌)"
+                ))
+        except Exception:
+            pass
+        
+        instance_urls = service.get_instance_health_urls()
+        if len(instance_urls) > 1:
+            # 다중 인스턴스: 전부 확인해 로드밸런서에 반영, 하나라도 정상이면 서비스 정상
+            results = await asyncio.gather(*(self._probe(service_id, url) for url in instance_urls.values()))
+            instances = {}
+            for instance, result in zip(instance_urls, results):
+                self.balancer.mark_health(service_id, instance, result.is_healthy)
+                instances[instance] = result.is_healthy
+            healthy = [r for r in results if r.is_healthy]
+            status = (healthy or results)[0]
+            status.instances = instances
+            if healthy and len(healthy) < len(results):
+                status.error_message = f"인스턴스 {len(results) - len(healthy)}/{len(results)}개 비정상"
+        else:
+            status = await self._probe(service_id, health_url)
+        self._store_status(service, status)
+        return status
+    
+    async def _probe(self, service_id: str, health_url: str) -> ServiceStatus:
+        """헬스체크 URL 하나 확인"""
+        async with self._semaphore:
+            start_time = time.time()
+            return await self._probe_once(service_id, health_url, start_time)
+    
+    async def _probe_once(self, service_id: str, health_url: str, start_time: float) -> ServiceStatus:
+        try:
+            response = await self._get_with_fallback(self._get_client(), service_id, health_url)
+            response_time = (time.time() - start_time) * 1000
+            # 리다이렉트 따라간 최종 응답이 2xx면 정상 (Vite 등)
+            is_healthy = 200 <= response.status_code < 300
+            logger.info(f"헬스체크 {service_id}: {health_url} -> {response.status_code} ({'정상' if is_healthy else '비정상'})")
+            
+            return ServiceStatus(
+                service_id=service_id,
+                is_healthy=is_healthy,
+                status_code=response.status_code,
+                response_time_ms=round(response_time, 2),
+                last_check=datetime.now(),
+                error_message=None if is_healthy else f"HTTP {response.status_code}"
+            )
+            
         except httpx.TimeoutException:
             response_time = (time.time() - start_time) * 1000
-            status = ServiceStatus(
+            return ServiceStatus(
                 service_id=service_id,
                 is_healthy=False,
                 response_time_ms=round(response_time, 2),
                 last_check=datetime.now(),
                 error_message="타임아웃"
             )
-            self._status_cache[service_id] = status
-            return status
             
         except Exception as e:
             response_time = (time.time() - start_time) * 1000
-            err_msg = str(e)
-            # 연결 실패 등 영문 에러 → 한글 메시지로 변환
-            if ("connection" in err_msg.lower() or "connect" in err_msg.lower() or
-                    "refused" in err_msg.lower() or "all connection attempts failed" in err_msg.lower()):
-                err_msg = "서비스가 꺼져 있어 접속할 수 없습니다"
-            status = ServiceStatus(
+            logger.warning(f"서비스 '{service_id}' 헬스체크 실패: {e}")
+            return ServiceStatus(
                 service_id=service_id,
                 is_healthy=False,
                 response_time_ms=round(response_time, 2),
                 last_check=datetime.now(),
-                error_message=err_msg
+                error_message=_error_message(e)
             )
-            self._status_cache[service_id] = status
-            logger.warning(f"서비스 '{service_id}' 헬스체크 실패: {e}")
-            return status
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """헬스체크 공유 클라이언트 (연결 수는 동시 체크 상한과 같게)"""
+        if self._client is None or self._client.is_closed:
+            limits = httpx.Limits(
+                max_connections=settings.HEALTH_CHECK_MAX_CONCURRENCY,
+                max_keepalive_connections=settings.HEALTH_CHECK_MAX_CONCURRENCY,
+            )
+            self._client = httpx.AsyncClient(timeout=settings.HEALTH_CHECK_TIMEOUT, limits=limits)
+        return self._client
+    
+    def _store_status(self, service: ServiceInfo, status: ServiceStatus):
+        """상태 캐시 갱신, 서킷 브레이커에 결과 전달, 다음 체크 시각 계산"""
+        previous = self._status_cache.get(service.id)
+        self._status_cache[service.id] = status
+        self.breakers.record_health(service, status.is_healthy)
+        if _changed(previous, status):
+            self.broadcaster.publish(status)
+        
+        failures = 0 if status.is_healthy else self._failures.get(service.id, 0) + 1
+        self._failures[service.id] = failures
+        recovered = status.is_healthy and previous is not None and not previous.is_healthy
+        interval = self._next_interval(service, failures, recovered)
+        self._next_check[service.id] = time.monotonic() + interval
+    
+    def _remember(self, status: ServiceStatus) -> ServiceStatus:
+        """헬스체크 불가 상태는 캐시에만 저장 (서킷/스케줄에는 반영 안 함)"""
+        previous = self._status_cache.get(status.service_id)
+        self._status_cache[status.service_id] = status
+        if _changed(previous, status):
+            self.broadcaster.publish(status)
+        return status
+    
+    @staticmethod
+    def _base_interval(service: ServiceInfo) -> float:
+        return float((service.metadata or {}).get("health_check_interval", settings.HEALTH_CHECK_INTERVAL))
+    
+    def _next_interval(self, service: ServiceInfo, failures: int, recovered: bool) -> float:
+        """다음 체크까지 대기 시간 (지터 포함)"""
+        base = self._base_interval(service)
+        if failures >= settings.HEALTH_CHECK_DOWN_AFTER:
+            # 오래 꺼진 서비스: 기본 주기부터 두 배씩, 상한까지
+            exponent = min(failures - settings.HEALTH_CHECK_DOWN_AFTER, 16)
+            interval = min(base * (2 ** exponent), max(base, settings.HEALTH_CHECK_MAX_BACKOFF))
+        elif failures > 0 or recovered:
+            interval = min(base, settings.HEALTH_CHECK_SUSPECT_INTERVAL)
+        else:
+            interval = base
+        jitter = settings.HEALTH_CHECK_JITTER
+        return interval * random.uniform(1 - jitter, 1 + jitter)
+    
+    async def _get_with_fallback(self, client: httpx.AsyncClient, service_id: str, url: str) -> httpx.Response:
+        """학습된 루프백 주소부터 시도, 연결 실패 시 다음 후보"""
+        urls_to_try = self.resolver.candidates(service_id, url)
+        for try_url in urls_to_try:
+            try:
+                response = await client.get(try_url, follow_redirects=True)
+                self.resolver.record_success(service_id, try_url)
+                return response
+            except httpx.ConnectError:
+                self.resolver.record_failure(service_id, try_url)
+                if try_url == urls_to_try[-1]:
+                    raise
+        raise httpx.ConnectError(f"연결할 수 없습니다: {url}")
     
     async def check_all_services(self) -> Dict[str, ServiceStatus]:
         """모든 서비스 헬스체크"""
@@ -127,30 +230,114 @@ class HealthChecker:
         for i, result in enumerate(results):
             if isinstance(result, Exception):
                 service_id = services[i].id
-                err_msg = str(result)
-                if ("connection" in err_msg.lower() or "connect" in err_msg.lower() or
-                        "refused" in err_msg.lower() or "all connection attempts failed" in err_msg.lower()):
-                    err_msg = "서비스가 꺼져 있어 접속할 수 없습니다"
                 status_dict[service_id] = ServiceStatus(
                     service_id=service_id,
                     is_healthy=False,
                     last_check=datetime.now(),
-                    error_message=err_msg
+                    error_message=_error_message(result)
                 )
             else:
                 status_dict[result.service_id] = result
         
         return status_dict
     
+    async def get_statuses(self, force: bool = False) -> Dict[str, ServiceStatus]:
+        """활성 서비스 상태를 캐시에서 반환
+
+        오래된 항목은 그대로 반환하고 백그라운드에서 재확인한다. 재확인은 서비스별 체크 하나를
+        동시 호출·스케줄러와 공유하므로, 다른 호출이 시작한 갱신에 빠진 서비스도 각자 확인된다.
+        아직 결과가 없는 서비스와 force=True일 때만 확인이 끝날 때까지 기다린다.
+        """
+        services = self.registry.get_enabled_services()
+        waits = []
+        for service in services:
+            if not force and not self._is_stale(service.id):
+                continue
+            task = self._inflight.get(service.id) or self._start_check(service.id)
+            if force or service.id not in self._status_cache:
+                # 요청이 끊겨도 체크는 끝까지 진행
+                waits.append(asyncio.shield(task))
+        if waits:
+            await asyncio.gather(*waits, return_exceptions=True)
+        return {s.id: self._status_cache[s.id] for s in services if s.id in self._status_cache}
+    
+    async def get_status(self, service_id: str) -> ServiceStatus:
+        """서비스 하나의 상태 (캐시가 최신이면 그대로, 아니면 확인)"""
+        if not self._is_stale(service_id):
+            return self._status_cache[service_id]
+        task = self._inflight.get(service_id) or self._start_check(service_id)
+        await asyncio.shield(task)
+        status = self._status_cache.get(service_id)
+        if status is None:
+            # 비활성화 등 캐시에 남기지 않는 결과
+            status = await self.check_service(service_id)
+        return status
+    
+    def _is_stale(self, service_id: str) -> bool:
+        status = self._status_cache.get(service_id)
+        if status is None:
+            return True
+        if (datetime.now() - status.last_check).total_seconds() <= settings.HEALTH_STATUS_MAX_AGE:
+            return False
+        # 백오프 중인 서비스는 예약된 다음 체크 시각까지 최신으로 간주
+        due = self._next_check.get(service_id)
+        return due is None or time.monotonic() >= due
+    
     async def _periodic_check(self):
-        """주기적 헬스체크"""
+        """주기적 헬스체크 - 체크 시각이 도래한 서비스만 실행"""
         while self._running:
             try:
-                await self.check_all_services()
+                self._dispatch_due()
             except Exception as e:
                 logger.error(f"주기적 헬스체크 오류: {e}")
             
-            await asyncio.sleep(settings.HEALTH_CHECK_INTERVAL)
+            await asyncio.sleep(self._seconds_until_next())
+    
+    def _dispatch_due(self):
+        now = time.monotonic()
+        services = self.registry.get_enabled_services()
+        active = {service.id for service in services}
+        for service_id in [sid for sid in self._next_check if sid not in active]:
+            # 제거/비활성화된 서비스
+            self._next_check.pop(service_id, None)
+            self._failures.pop(service_id, None)
+        for service in services:
+            due = self._next_check.get(service.id)
+            if due is None:
+                # 처음 보는 서비스: 시작 시 한꺼번에 몰리지 않도록 첫 체크를 분산
+                due = now + random.uniform(0, self._base_interval(service) * settings.HEALTH_CHECK_JITTER)
+                self._next_check[service.id] = due
+            if due > now or service.id in self._inflight:
+                continue
+            # 체크 결과 없이 끝나는 서비스(데스크톱 등)는 기본 주기로 재시도
+            self._next_check[service.id] = now + self._base_interval(service)
+            self._start_check(service.id)
+    
+    def _start_check(self, service_id: str) -> asyncio.Task:
+        task = asyncio.create_task(self._run_check(service_id))
+        self._inflight[service_id] = task
+        task.add_done_callback(lambda _: self._inflight.pop(service_id, None))
+        return task
+    
+    async def _run_check(self, service_id: str):
+        try:
+            await self.check_service(service_id)
+        except Exception as e:
+            service = self.registry.get_service(service_id)
+            if service is not None:
+                self._store_status(service, ServiceStatus(
+                    service_id=service_id,
+                    is_healthy=False,
+                    last_check=datetime.now(),
+                    error_message=_error_message(e)
+                ))
+    
+    def _seconds_until_next(self) -> float:
+        """다음 체크까지 대기 (새 서비스 반영을 위해 최대 1초)"""
+        if not self._next_check:
+            return 1.0
+        wait = min(self._next_check.values()) - time.monotonic()
+        return min(1.0, max(0.05, wait))
     
     def start_periodic_check(self) -> asyncio.Task:
         """주기적 헬스체크 시작"""
@@ -166,7 +353,53 @@ class HealthChecker:
         if self._task:
             self._task.cancel()
             logger.info("주기적 헬스체크 중지")
+        for task in list(self._inflight.values()):
+            task.cancel()
+    
+    async def aclose(self):
+        """공유 클라이언트 종료 (앱 종료 시)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def forget(self, service_id: str):
+        """설정 재로드로 제거/변경된 서비스의 상태와 스케줄 삭제 (변경된 서비스는 다음 틱에 바로 확인)"""
+        self._status_cache.pop(service_id, None)
+        self._failures.pop(service_id, None)
+        if self.registry.get_service(service_id) is not None:
+            self._next_check[service_id] = time.monotonic()
+        else:
+            self._next_check.pop(service_id, None)
+        task = self._inflight.get(service_id)
+        if task is not None:
+            # 이전 설정으로 진행 중인 체크 결과가 새 상태를 덮어쓰지 않도록
+            task.cancel()
     
     def get_cached_status(self, service_id: str) -> Optional[ServiceStatus]:
         """캐시된 상태 조회"""
         return self._status_cache.get(service_id)
+    
+    def get_cached_statuses(self) -> Dict[str, ServiceStatus]:
+        """활성 서비스의 캐시된 상태 전체 (갱신 없음)"""
+        services = self.registry.get_enabled_services()
+        return {s.id: self._status_cache[s.id] for s in services if s.id in self._status_cache}
+
+
+def _error_message(error: Exception) -> str:
+    """연결 실패 등 영문 에러 → 한글 메시지로 변환"""
+    err_msg = str(error)
+    lowered = err_msg.lower()
+    if ("connection" in lowered or "connect" in lowered or
+            "refused" in lowered or "all connection attempts failed" in lowered):
+        return "서비스가 꺼져 있어 접속할 수 없습니다"
+    return err_msg
+
+
+def _changed(previous: Optional[ServiceStatus], status: ServiceStatus) -> bool:
+    """구독자에게 알릴 변경인지 (응답시간/체크 시각만 바뀐 경우 제외)"""
+    if previous is None:
+        return True
+    return (previous.is_healthy != status.is_healthy or
+            previous.status_code != status.status_code or
+            previous.error_message != status.error_message or
+            previous.instances != status.instances)
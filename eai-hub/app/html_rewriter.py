@@ -0,0 +1,94 @@
+"""프록시 프론트엔드 절대 경로 교체 (청크 단위 스트리밍)"""
+import re
+from typing import AsyncIterator, Pattern
+
+# 속성/url( 과 "/" 사이 공백 허용 폭 (상한이 있어야 보류 바이트 수가 고정됨)
+_MAX_SPACE = 8
+_ATTR_LEAD = rb"(?:src|href|action|poster)\s{0,%d}=\s{0,%d}[\"']?" % (_MAX_SPACE, _MAX_SPACE)
+_CSS_LEAD = rb"url\(\s{0,%d}[\"']?" % _MAX_SPACE
+# 가장 긴 선행부("action" + 공백 + = + 공백 + 따옴표) + "/" 길이 여유분
+_LEAD_MAX_LEN = 32
+
+
+class UrlPrefixRewriter:
+    """서비스 하나의 교체 규칙 (정규식은 서비스 등록 시 한 번만 컴파일)
+
+    HTML의 src/href/action/poster="/..." 와 (옵션) CSS url(/...) 의 절대 경로 앞에
+    /api/{service_id} 를 붙인다. 프로토콜 상대 경로(//host)와 이미 접두어가 붙은 경로는 그대로 둔다.
+    """
+
+    def __init__(self, prefix: str, css_urls: bool = False):
+        prefix_bytes = prefix.strip("/").encode("utf-8") + b"/"
+        guard = rb"/(?!/|" + re.escape(prefix_bytes) + rb")"
+        lead = _ATTR_LEAD + (rb"|" + _CSS_LEAD if css_urls else b"")
+        self.css_urls = css_urls
+        self.html_pattern: Pattern[bytes] = re.compile(rb"(" + lead + rb")" + guard, re.IGNORECASE)
+        self.css_pattern: Pattern[bytes] = re.compile(rb"(" + _CSS_LEAD + rb")" + guard, re.IGNORECASE)
+        self.replacement = rb"\1/" + prefix_bytes
+        # 청크 끝에서 판단을 미룰 바이트 수 (한 매치가 볼 수 있는 최대 길이)
+        self.hold = _LEAD_MAX_LEN + len(prefix_bytes) + 1
+
+    def applies_to(self, content_type: str) -> bool:
+        """교체 대상 응답인지 (HTML, css_urls면 CSS도)"""
+        return "text/html" in content_type or (self.css_urls and "text/css" in content_type)
+
+    def stream(self, content_type: str) -> "StreamingRewriter":
+        pattern = self.css_pattern if "text/css" in content_type else self.html_pattern
+        return StreamingRewriter(pattern, self.replacement, self.hold)
+
+    def rewrite(self, content: bytes, content_type: str) -> bytes:
+        """버퍼링된 본문 전체 교체"""
+        if not content:
+            return content
+        pattern = self.css_pattern if "text/css" in content_type else self.html_pattern
+        return pattern.sub(self.replacement, content)
+
+    async def rewrite_iter(self, chunks: AsyncIterator[bytes], content_type: str) -> AsyncIterator[bytes]:
+        """청크 스트림 교체 (메모리는 문서 크기와 무관하게 hold 바이트 + 청크 하나)"""
+        rewriter = self.stream(content_type)
+        async for chunk in chunks:
+            out = rewriter.feed(chunk)
+            if out:
+                yield out
+        tail = rewriter.flush()
+        if tail:
+            yield tail
+
+
+class StreamingRewriter:
+    """청크 경계에 걸친 매치를 놓치지 않는 증분 치환기
+
+    버퍼 끝 hold 바이트 안에서 시작하는 매치는 다음 청크가 올 때까지 판단을 미루고,
+    그 앞에서 시작하는 매치는 매치 전체(선행 조건 포함)가 버퍼 안에 있으므로 바로 치환해 내보낸다.
+    """
+
+    __slots__ = ("_pattern", "_replacement", "_hold", "_carry")
+
+    def __init__(self, pattern: Pattern[bytes], replacement: bytes, hold: int):
+        self._pattern = pattern
+        self._replacement = replacement
+        self._hold = hold
+        self._carry = b""
+
+    def feed(self, chunk: bytes) -> bytes:
+        buf = self._carry + chunk if self._carry else chunk
+        cut = len(buf) - self._hold
+        if cut <= 0:
+            self._carry = buf
+            return b""
+        out = []
+        pos = 0
+        for m in self._pattern.finditer(buf):
+            if m.start() >= cut:
+                break
+            out.append(buf[pos:m.start()])
+            out.append(m.expand(self._replacement))
+            pos = m.end()
+        end = max(cut, pos)
+        out.append(buf[pos:end])
+        self._carry = buf[end:]
+        return b"".join(out)
+
+    def flush(self) -> bytes:
+        buf, self._carry = self._carry, b""
+        return self._pattern.sub(self._replacement, buf) if buf else b""
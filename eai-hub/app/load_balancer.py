@@ -0,0 +1,127 @@
+"""다중 인스턴스 업스트림 로드밸런서"""
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from app.models import ServiceInfo
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+LB_STRATEGIES = ("round_robin", "least_outstanding", "ewma")
+EWMA_ALPHA = 0.3  # 최근 응답시간 가중치
+
+
+class InstanceStats:
+    """인스턴스 하나의 런타임 상태"""
+    __slots__ = ("url", "outstanding", "ewma_ms", "healthy",
+                 "consecutive_failures", "ejected_until", "requests")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.ewma_ms = 0.0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+
+    def is_available(self, now: float) -> bool:
+        return self.healthy and now >= self.ejected_until
+
+
+class LoadBalancer:
+    """서비스 인스턴스 선택 (round_robin / least_outstanding / ewma)
+
+    services.json metadata.instances로 인스턴스가 2개 이상인 서비스만 대상이며,
+    HealthChecker 결과로 비정상 인스턴스를 건너뛰고, 연속 연결 실패 인스턴스는
+    LB_EJECT_SECONDS 동안 후보에서 제외(outlier ejection)한다.
+    사용 가능한 인스턴스가 없으면 전체 인스턴스 중에서 고른다.
+    """
+
+    def __init__(self):
+        self._instances: Dict[str, Dict[str, InstanceStats]] = {}
+        self._rr_counter: Dict[str, int] = {}
+
+    def _get_instances(self, service: ServiceInfo) -> List[InstanceStats]:
+        known = self._instances.get(service.id)
+        if known is None or list(known) != service.instances:
+            # 설정 변경 시 기존 통계는 유지하고 목록만 맞춤
+            known = {url: (known or {}).get(url) or InstanceStats(url) for url in service.instances}
+            self._instances[service.id] = known
+        return list(known.values())
+
+    def pick(self, service: ServiceInfo) -> Optional[str]:
+        """요청 보낼 인스턴스 base URL 선택 (단일 인스턴스면 None)"""
+        if len(service.instances) < 2:
+            return None
+        instances = self._get_instances(service)
+        now = time.monotonic()
+        candidates = [i for i in instances if i.is_available(now)] or instances
+        strategy = (service.metadata or {}).get("lb_strategy", settings.LB_STRATEGY)
+        counter = self._rr_counter.get(service.id, 0)
+        self._rr_counter[service.id] = counter + 1
+        if strategy == "least_outstanding":
+            # 동률이면 라운드로빈 순서로 분산
+            offset = counter % len(candidates)
+            rotated = candidates[offset:] + candidates[:offset]
+            chosen = min(rotated, key=lambda i: i.outstanding)
+        elif strategy == "ewma":
+            # 측정값 없는 인스턴스(0)부터 시도, 대기 요청 수로 가중
+            chosen = min(candidates, key=lambda i: i.ewma_ms * (i.outstanding + 1))
+        else:
+            chosen = candidates[counter % len(candidates)]
+        chosen.outstanding += 1
+        chosen.requests += 1
+        return chosen.url
+
+    def release(self, service_id: str, url: str, elapsed_ms: float, success: Optional[bool]):
+        """요청 완료 반영 (success=None: 취소 등 판단 불가)"""
+        instance = self._instances.get(service_id, {}).get(url)
+        if instance is None:
+            return
+        instance.outstanding = max(0, instance.outstanding - 1)
+        if success is None:
+            return
+        if instance.ewma_ms == 0.0:
+            instance.ewma_ms = elapsed_ms
+        else:
+            instance.ewma_ms = EWMA_ALPHA * elapsed_ms + (1 - EWMA_ALPHA) * instance.ewma_ms
+        if success:
+            instance.consecutive_failures = 0
+            return
+        instance.consecutive_failures += 1
+        if instance.consecutive_failures >= settings.LB_EJECT_AFTER_FAILURES:
+            instance.ejected_until = time.monotonic() + settings.LB_EJECT_SECONDS
+            instance.consecutive_failures = 0
+            logger.warning(f"인스턴스 제외: {service_id} {url} ({settings.LB_EJECT_SECONDS}초)")
+
+    def mark_health(self, service_id: str, url: str, healthy: bool):
+        """헬스체크 결과 반영"""
+        instance = self._instances.get(service_id, {}).get(url)
+        if instance is None:
+            instance = InstanceStats(url)
+            self._instances.setdefault(service_id, {})[url] = instance
+        if healthy and not instance.healthy:
+            instance.ejected_until = 0.0
+        instance.healthy = healthy
+
+    def remove(self, service_id: str):
+        self._instances.pop(service_id, None)
+        self._rr_counter.pop(service_id, None)
+
+    def get_stats(self) -> Dict[str, List[Dict[str, Any]]]:
+        now = time.monotonic()
+        return {
+            service_id: [
+                {
+                    "url": i.url,
+                    "healthy": i.healthy,
+                    "ejected": now < i.ejected_until,
+                    "outstanding": i.outstanding,
+                    "ewma_ms": round(i.ewma_ms, 2),
+                    "requests": i.requests,
+                }
+                for i in instances.values()
+            ]
+            for service_id, instances in self._instances.items()
+        }
@@ -0,0 +1,137 @@
+"""Prometheus 메트릭 (허브 자체 성능)"""
+import time
+from typing import Callable, Optional
+from prometheus_client import Counter, Gauge, Histogram
+
+# 프록시 응답 특성상 느린 업스트림(PROXY_TIMEOUT 30초)까지 구간을 둠
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+CONNECT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+QUEUE_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+http_request_duration = Histogram(
+    "eai_hub_request_duration_seconds",
+    "요청 처리 시간 (응답 본문 전송 완료까지)",
+    ["route", "service", "status_class"],
+    buckets=LATENCY_BUCKETS,
+)
+http_requests_in_flight = Gauge("eai_hub_requests_in_flight", "처리 중인 요청 수")
+http_bytes = Counter("eai_hub_http_bytes_total", "요청/응답 본문 바이트", ["service", "direction"])
+proxy_in_flight = Gauge("eai_hub_proxy_in_flight", "서비스별 업스트림 응답 대기 중인 프록시 요청 수", ["service"])
+upstream_connect_duration = Histogram(
+    "eai_hub_upstream_connect_seconds",
+    "업스트림 TCP 연결 시간 (새 연결만, keep-alive 재사용은 제외)",
+    ["service"],
+    buckets=CONNECT_BUCKETS,
+)
+access_log_dropped = Counter("eai_hub_access_log_dropped", "큐가 가득 차 버린 대시보드 접속 기록 수")
+upstream_address_retries = Counter(
+    "eai_hub_upstream_address_retries_total",
+    "루프백 주소 후보 재시도 횟수 (학습된 주소 연결 실패)",
+    ["service"],
+)
+
+admission_queue_seconds = Histogram(
+    "eai_hub_admission_queue_seconds",
+    "서비스 동시 요청 상한 때문에 대기열에서 기다린 시간",
+    ["service"],
+    buckets=QUEUE_BUCKETS,
+)
+admission_queue_depth = Gauge("eai_hub_admission_queue_depth", "서비스별 대기열 길이", ["service"])
+admission_rejected = Counter(
+    "eai_hub_admission_rejected_total",
+    "입장 거절 수 (reason: queue_full / queue_timeout)",
+    ["service", "reason"],
+)
+proxy_coalesced = Counter(
+    "eai_hub_proxy_coalesced_total",
+    "진행 중인 동일 요청의 응답을 공유해 업스트림 호출을 생략한 요청 수",
+    ["service"],
+)
+
+
+def connect_tracer(service_id: str):
+    """httpx 요청 extensions["trace"] 콜백 - 새 TCP 연결 시간 기록"""
+    started = 0.0
+
+    async def trace(event_name: str, info: dict):
+        nonlocal started
+        if event_name == "connection.connect_tcp.started":
+            started = time.perf_counter()
+        elif event_name == "connection.connect_tcp.complete" and started:
+            upstream_connect_duration.labels(service_id).observe(time.perf_counter() - started)
+
+    return trace
+
+
+class MetricsMiddleware:
+    """요청 지연/바이트/진행 중 요청 수 기록 (순수 ASGI, 스트리밍 응답도 본문 완료 시점까지 측정)
+
+    route 라벨은 매칭된 라우트 경로 템플릿을 쓰고(매칭 실패는 "unmatched"),
+    service 라벨은 프록시 라우트 중 등록된 서비스일 때만 붙여 라벨 수가 늘어나지 않게 한다.
+    """
+
+    def __init__(self, app, is_known_service: Callable[[str], bool]):
+        self.app = app
+        self.is_known_service = is_known_service
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        bytes_in = 0
+        bytes_out = 0
+        status_code = 500
+        observed = False
+
+        async def receive_wrapper():
+            nonlocal bytes_in
+            message = await receive()
+            if message["type"] == "http.request":
+                bytes_in += len(message.get("body", b""))
+            return message
+
+        def observe():
+            nonlocal observed
+            if observed:
+                return
+            observed = True
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or _mount_path(scope) or "unmatched"
+            service_id = (scope.get("path_params") or {}).get("service_id")
+            service = service_id if service_id and self.is_known_service(service_id) else ""
+            http_request_duration.labels(route_path, service, f"{status_code // 100}xx").observe(
+                time.perf_counter() - started
+            )
+            if bytes_in:
+                http_bytes.labels(service, "in").inc(bytes_in)
+            if bytes_out:
+                http_bytes.labels(service, "out").inc(bytes_out)
+
+        async def send_wrapper(message):
+            nonlocal status_code, bytes_out
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                bytes_out += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await send(message)
+                    observe()
+                    return
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            observe()
+
+
+def _mount_path(scope) -> Optional[str]:
+    """Mount(StaticFiles 등)로 처리된 요청은 마운트 경로로 묶음"""
+    root_path = scope.get("root_path") or ""
+    app_root = scope.get("app_root_path") or ""
+    mounted = root_path[len(app_root):] if root_path.startswith(app_root) else root_path
+    return mounted or None
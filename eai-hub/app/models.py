@@ -1,8 +1,10 @@
 """데이터 모델"""
 from pydantic import BaseModel, HttpUrl
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+from app.html_rewriter import UrlPrefixRewriter
 
 
 class ServiceType(str, Enum):
@@ -24,6 +26,7 @@ class ServiceInfo(BaseModel):
     health_check_url: Optional[str] = None
     api_prefix: Optional[str] = None
     enabled: bool = True
+    instances: List[str] = []  # 다중 인스턴스 base URL (metadata.instances, 첫 번째 = base_url)
     metadata: Dict[str, Any] = {}
     
     def get_health_url(self) -> Optional[str]:
@@ -35,6 +38,32 @@ class ServiceInfo(BaseModel):
         # 기본 헬스체크 경로 시도
         common_paths = ["/health", "/api/health", "/healthz", "/"]
         return f"{self.base_url}{common_paths[0]}"
+    
+    def get_instance_health_urls(self) -> Dict[str, str]:
+        """인스턴스 base URL → 헬스체크 URL"""
+        health_url = self.get_health_url()
+        if not self.instances or not health_url or not self.base_url:
+            return {}
+        health_path = health_url[len(self.base_url):] if health_url.startswith(self.base_url) else "/"
+        return {url: f"{url}{health_path}" for url in self.instances}
+
+
+@dataclass(frozen=True)
+class RoutePlan:
+    """서비스별 사전 계산된 프록시 경로 (레지스트리 로드/등록 시 생성, 요청 경로에서는 읽기만)
+
+    대상 URL = proxy_base + path_prefix + ("/" + path if path else empty_suffix)
+    """
+    service: ServiceInfo
+    proxy_base: str  # 끝 슬래시 제거, backend_port 반영
+    path_prefix: str  # proxy_base_path → /api/{id}, backend_path → 해당 경로, 그 외 ""
+    empty_suffix: str  # 하위 경로가 없을 때 붙일 문자열
+    referer: str
+    use_instances: bool  # 다중 인스턴스 중 선택 필요 (backend_port 지정 시 제외)
+    timeout: float
+    stream_mode: bool
+    rewriter: Optional[UrlPrefixRewriter]  # HTML(옵션 CSS) 절대 경로 → /api/{id}/ 교체, proxy_base_path 서비스는 None
+    compress_types: Tuple[str, ...] = ()  # 허브에서 압축할 응답 Content-Type 접두어, 비어 있으면 압축 안 함
 
 
 class ServiceStatus(BaseModel):
@@ -45,6 +74,7 @@ class ServiceStatus(BaseModel):
     response_time_ms: Optional[float] = None
     last_check: datetime
     error_message: Optional[str] = None
+    instances: Dict[str, bool] = {}  # 다중 인스턴스 서비스의 인스턴스별 정상 여부
 
 
 class HealthCheckResponse(BaseModel):
@@ -1,13 +1,24 @@
 """프록시 라우터"""
+import hashlib
+import json
 import logging
-import re
-from typing import Optional
-from urllib.parse import urlparse
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 from fastapi import Request, HTTPException
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 import httpx
+from app.models import RoutePlan
 from app.service_registry import ServiceRegistry
+from app.upstream_pool import UpstreamClientPool
+from app.address_resolver import AddressResolver
+from app.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, CircuitState
+from app.load_balancer import LoadBalancer
+from app.admission import AdmissionController, AdmissionRejected
+from app import metrics
+from app.compression import BROTLI_AVAILABLE, choose_encoding, compress, compress_stream, is_compressible
 from app.config import settings
+from app.response_cache import CacheConfig, CacheEntry, ResponseCache, parse_cache_control, response_ttl
 
 logger = logging.getLogger(__name__)
 
@@ -15,12 +26,30 @@ logger = logging.getLogger(__name__)
 class ProxyRouter:
     """프록시 라우팅"""
     
-    def __init__(self, registry: ServiceRegistry):
+    def __init__(
+        self,
+        registry: ServiceRegistry,
+        pool: Optional[UpstreamClientPool] = None,
+        resolver: Optional[AddressResolver] = None,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+        balancer: Optional[LoadBalancer] = None,
+        cache: Optional[ResponseCache] = None,
+        admission: Optional[AdmissionController] = None
+    ):
         self.registry = registry
+        self.pool = pool or UpstreamClientPool()
+        self.resolver = resolver or AddressResolver()
+        self.breakers = breakers or CircuitBreakerRegistry()
+        self.balancer = balancer or LoadBalancer()
+        self.cache = cache or ResponseCache()
+        self.admission = admission or AdmissionController()
+        # 공유할 수 없는 응답(SSE, 길이 모름, 큰 응답, Set-Cookie)이 나온 병합 키 → 만료 시각 (그동안 기다리지 않고 바로 요청)
+        self._coalesce_bypass: Dict[str, float] = {}
     
     async def route(self, service_id: str, path: str, request: Request) -> Response:
         """요청을 대상 서비스로 프록시"""
-        service = self.registry.get_service(service_id)
+        plan = self.registry.get_route(service_id)
+        service = plan.service if plan else None
         
         if not service:
             raise HTTPException(status_code=404, detail=f"서비스 '{service_id}'를 찾을 수 없습니다")
@@ -31,115 +60,701 @@ class ProxyRouter:
         if not service.base_url:
             raise HTTPException(status_code=503, detail=f"서비스 '{service_id}'는 API 엔드포인트가 없습니다")
         
-        # proxy_base_path: Vite base 사용 서비스(ball-bounce 등)만 전체 경로 전달
-        # backend_path: 프론트엔드가 /api/coffee 호출 시 백엔드 /api/coffee 경로로 전달
-        # backend_port: 실제 프록시 대상 포트 (experiments → 8101 gateway 직접)
-        meta = service.metadata or {}
-        use_base_path = meta.get("proxy_base_path", False)
-        backend_path = meta.get("backend_path", "").rstrip("/")
+        # 진행 중인 동일 요청이 있으면 그 응답을 공유 (대기열 자리도 차지하지 않음)
+        coalesce_key = self._coalesce_key(plan, path, request)
+        if coalesce_key is None:
+            return await self._dispatch(plan, path, request)
+        
+        async def fetch():
+            return await self._coalesce_fill(plan, path, request, coalesce_key)
+        
+        entry, response, is_leader = await self.cache.collapse(coalesce_key, fetch)
+        if is_leader:
+            if isinstance(response, HTTPException):
+                raise response
+            return response
+        if entry is None:
+            # 선행 응답을 공유할 수 없음 (SSE, 큰 응답, Set-Cookie 등) → 직접 요청
+            return await self._dispatch(plan, path, request)
+        metrics.proxy_coalesced.labels(service_id).inc()
+        # 압축은 대기자마다 자기 Accept-Encoding으로 (같은 인코딩은 항목에 한 번만 만들어 재사용)
+        return _entry_response(entry, plan, request.headers.get("accept-encoding"))
+    
+    async def _dispatch(self, plan: RoutePlan, path: str, request: Request, compress: bool = True) -> Response:
+        """서킷 확인 → 입장 제어 → 인스턴스 선택 → 업스트림 전달"""
+        service = plan.service
+        service_id = service.id
+        # 서킷 open이면 입장 대기열에 서지 않고 업스트림 연결 없이 즉시 503
+        breaker = self.breakers.get(service)
+        if breaker is not None and not breaker.allow_request():
+            raise _circuit_open(service_id, breaker)
+        gate = self.admission.get(service)
+        if gate is not None:
+            try:
+                queued = await gate.acquire()
+            except BaseException as e:
+                if breaker is not None:
+                    breaker.record(None)  # half-open 시험 슬롯 반환
+                if isinstance(e, AdmissionRejected):
+                    raise HTTPException(
+                        status_code=e.status_code,
+                        detail=e.reason,
+                        headers={"Retry-After": str(e.retry_after)}
+                    )
+                raise
+            # 대기하는 동안 서킷이 열렸으면 보내지 않음 (바로 입장했다면 상태가 바뀔 틈이 없음)
+            if queued and breaker is not None and breaker.state == CircuitState.OPEN:
+                gate.release()
+                raise _circuit_open(service_id, breaker)
+        admitted = gate is not None
+        try:
+            # 다중 인스턴스 서비스면 인스턴스 선택 (단일이면 None → base_url)
+            instance = self.balancer.pick(service) if plan.use_instances else None
+            started = time.perf_counter()
+            success: Optional[bool] = None
+            in_flight = metrics.proxy_in_flight.labels(service_id)
+            in_flight.inc()
+            try:
+                response = await self._forward(plan, path, request, instance, compress)
+                success = response.status_code < 500
+            except HTTPException as e:
+                success = e.status_code < 500
+                raise
+            except Exception:
+                success = False
+                raise
+            finally:
+                in_flight.dec()
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if breaker is not None:
+                    breaker.record(success, elapsed_ms)
+                if instance is not None:
+                    self.balancer.release(service_id, instance, elapsed_ms, success)
+            if admitted:
+                # 스트리밍 응답은 본문 전송이 끝날 때까지 자리를 유지
+                admitted = False
+                _release_after_body(response, gate.release)
+            return response
+        finally:
+            if admitted:
+                gate.release()
+    
+    def _coalesce_key(self, plan: RoutePlan, path: str, request: Request) -> Optional[str]:
+        """병합 가능한 요청이면 키 반환 (메서드, URL, 응답에 영향을 주는 요청 헤더)"""
+        service = plan.service
+        if not settings.PROXY_COALESCE or request.method not in ("GET", "HEAD"):
+            return None
+        if (service.metadata or {}).get("coalesce") is False or _has_request_body(request):
+            return None
+        # 캐시 지정 서비스는 응답 캐시가 동시 미스를 이미 병합
+        if self.cache.config_for(service) is not None:
+            return None
+        if "no-cache" in request.headers.get("cache-control", ""):
+            return None
+        vary = "\n".join(request.headers.get(name, "") for name in _COALESCE_VARY_HEADERS)
+        digest = hashlib.sha256(vary.encode("utf-8")).hexdigest()[:32]
+        key = f"{service.id} {request.method} /{path.lstrip('/')}?{request.url.query} {digest}"
+        until = self._coalesce_bypass.get(key)
+        if until is not None:
+            if time.monotonic() < until:
+                return None
+            del self._coalesce_bypass[key]
+        return key
+    
+    def _skip_coalescing(self, key: str):
+        """공유할 수 없는 응답이 나온 키는 PROXY_COALESCE_BYPASS_TTL초 동안 병합하지 않음 (대기 후 재요청 방지)"""
+        if settings.PROXY_COALESCE_BYPASS_TTL <= 0:
+            return
+        now = time.monotonic()
+        if len(self._coalesce_bypass) >= _COALESCE_BYPASS_MAX_KEYS:
+            self._coalesce_bypass = {k: t for k, t in self._coalesce_bypass.items() if t > now}
+            if len(self._coalesce_bypass) >= _COALESCE_BYPASS_MAX_KEYS:
+                self._coalesce_bypass.clear()
+        self._coalesce_bypass[key] = now + settings.PROXY_COALESCE_BYPASS_TTL
+    
+    async def _coalesce_fill(
+        self,
+        plan: RoutePlan,
+        path: str,
+        request: Request,
+        key: str
+    ) -> Tuple[Optional[CacheEntry], Any]:
+        """선행 요청 → (대기자와 공유할 응답 또는 None, 선행 요청 자신의 응답 또는 HTTPException)
+
+        업스트림 본문은 압축하지 않은 채로 받아(업스트림이 알려 준 길이 유지) 공유 여부를 정하고,
+        압축은 선행 요청과 대기자 각자의 응답을 만들 때 한다.
+        응답 헤더를 받은 시점에 대기자가 없으면 그대로 스트리밍한다. SSE, 길이를 모르는 응답(롱 폴링 등),
+        PROXY_COALESCE_MAX_BYTES 초과 응답, Set-Cookie 응답은 공유하지 않고, 그 키는 한동안 병합하지 않는다.
+        업스트림 연결 실패/타임아웃/차단 같은 오류 응답은 대기자와 공유한다 (각자 다시 기다리지 않도록).
+        """
+        accept_encoding = request.headers.get("accept-encoding")
+        try:
+            response = await self._dispatch(plan, path, request, compress=False)
+        except HTTPException as e:
+            return _error_entry(e), e
+        if "set-cookie" in response.headers:
+            self._skip_coalescing(key)
+            return None, _compress_response(response, plan, accept_encoding)
+        if not isinstance(response, StreamingResponse):
+            entry = CacheEntry(response.status_code, dict(response.headers), response.body, 0.0)
+            return entry, _entry_response(entry, plan, accept_encoding)
+        if not _can_buffer_for_followers(response):
+            self._skip_coalescing(key)
+            return None, _compress_response(response, plan, accept_encoding)
+        if not self.cache.waiting(key):
+            return None, _compress_response(response, plan, accept_encoding)
+        
+        chunks = []
+        body_iter = response.body_iterator
+        try:
+            async for chunk in body_iter:
+                chunks.append(chunk if isinstance(chunk, bytes) else chunk.encode("utf-8"))
+        finally:
+            if response.background is not None:
+                await response.background()
+        body = b"".join(chunks)
+        entry = CacheEntry(response.status_code, dict(response.headers), body, 0.0)
+        return entry, _entry_response(entry, plan, accept_encoding)
+    
+    async def _forward(
+        self,
+        plan: RoutePlan,
+        path: str,
+        request: Request,
+        instance: Optional[str] = None,
+        compress: bool = True
+    ) -> Response:
+        """업스트림 요청 전송 및 응답 변환 (경로 계산은 ServiceRegistry의 RoutePlan 사용)
+
+        compress=False면 허브 압축을 하지 않는다 (병합 경로가 공유 여부를 정한 뒤 응답마다 압축).
+        """
+        service = plan.service
+        service_id = service.id
         path_part = path.lstrip("/") if path else ""
-        proxy_base = service.base_url
-        if meta.get("backend_port") is not None:
-            p = urlparse(service.base_url or "")
-            host = p.hostname or "127.0.0.1"
-            proxy_base = f"{p.scheme or 'http'}://{host}:{meta['backend_port']}"
-        if use_base_path:
-            base_path = f"api/{service_id}/"
-            target_url = f"{proxy_base.rstrip('/')}/{base_path}{path_part}"
-        elif backend_path:
-            target_url = f"{proxy_base.rstrip('/')}{backend_path}/{path_part}" if path_part else f"{proxy_base.rstrip('/')}{backend_path}"
-        else:
-            target_url = f"{proxy_base.rstrip('/')}/{path_part}" if path_part else f"{proxy_base.rstrip('/')}/"
+        proxy_base = instance.rstrip("/") if instance else plan.proxy_base
+        target_url = proxy_base + plan.path_prefix + (f"/{path_part}" if path_part else plan.empty_suffix)
         
         # 쿼리 파라미터 추가
         if request.url.query:
             target_url += f"?{request.url.query}"
         
         # 요청 헤더 준비
+        # 스트리밍 모드에서는 content-length를 유지해야 업스트림이 chunked 없이 본문 길이를 안다
+        stream_mode = plan.stream_mode
         headers = dict(request.headers)
         headers.pop("host", None)
-        headers.pop("content-length", None)
         headers.pop("origin", None)
-        headers["referer"] = f"{proxy_base.rstrip('/')}/"
+        headers.pop("transfer-encoding", None)
+        headers.pop("connection", None)
+        if not stream_mode:
+            headers.pop("content-length", None)
+        headers["referer"] = f"{proxy_base}/" if instance else plan.referer
+        # 스트리밍은 업스트림 바이트를 그대로 넘기므로 클라이언트가 받을 수 있는 인코딩만 요청
+        # (없으면 httpx 기본값 gzip, deflate, br이 붙어 압축 본문이 그대로 전달됨)
+        headers["accept-encoding"] = request.headers.get("accept-encoding") or "identity"
         
-        body = await request.body()
+        if stream_mode:
+            content = _RequestBody(request.stream()) if _has_request_body(request) else None
+        else:
+            body = await request.body()
+            content = body if body else None
         
-        def _alt_urls(u: str) -> list:
-            try:
-                p = urlparse(u)
-                if p.hostname not in ("localhost", "127.0.0.1", "::1"):
-                    return [u]
-                scheme = p.scheme or "http"
-                port = f":{p.port}" if p.port else ""
-                path = (p.path or "/") + (f"?{p.query}" if p.query else "")
-                return [
-                    f"{scheme}://localhost{port}{path}",
-                    f"{scheme}://127.0.0.1{port}{path}",
-                    f"{scheme}://[::1]{port}{path}",
-                ]
-            except Exception:
-                return [u]
-        
-        proxy_timeout = meta.get("proxy_timeout")
-        if proxy_timeout is None:
-            proxy_timeout = settings.PROXY_TIMEOUT
-        urls_to_try = _alt_urls(target_url)
-        last_err = None
-        for try_url in urls_to_try:
+        proxy_timeout = plan.timeout
+        client = self.pool.get_client(service)
+        rewrite_html = plan.rewriter is not None
+        
+        # 응답 캐시: metadata.cache 지정 서비스의 GET만 (인증 헤더가 있으면 제외)
+        cache_config = self.cache.config_for(service)
+        if cache_config is not None and request.method == "GET" and "authorization" not in headers:
+            response = await self._cached_get(
+                plan, cache_config, client, target_url, headers, proxy_timeout, rewrite_html, request
+            )
+            if response is not None:
+                return response
+        
+        response, try_url = await self._send_upstream(
+            service_id, client, request.method, target_url, headers, content, proxy_timeout
+        )
+        if response.status_code >= 500:
+            logger.warning(f"프록시 upstream {response.status_code}: {service_id} <- {try_url}")
+        if response.status_code == 404:
+            logger.warning(f"프록시 upstream 404: {service_id} <- {try_url} (path_part={path_part!r}, path_prefix={plan.path_prefix!r})")
+        try:
+            return await self._build_response(
+                response, plan,
+                rewrite_html=rewrite_html,
+                stream_mode=stream_mode,
+                accept_encoding=request.headers.get("accept-encoding"),
+                compress=compress
+            )
+        except httpx.TimeoutException:
+            await response.aclose()
+            logger.error(f"프록시 타임아웃: {service_id} - {try_url}")
+            raise HTTPException(status_code=504, detail="게이트웨이 타임아웃")
+        except BaseException:
+            await response.aclose()
+            raise
+    
+    async def _send_upstream(
+        self,
+        service_id: str,
+        client: httpx.AsyncClient,
+        method: str,
+        target_url: str,
+        headers: Dict[str, str],
+        content,
+        timeout: float
+    ) -> Tuple[httpx.Response, str]:
+        """학습된 루프백 주소부터 시도해 응답 헤더까지 수신 → (스트리밍 응답, 성공 URL)
+
+        스트리밍 요청 본문은 한 번만 읽을 수 있으므로, 본문을 읽기 시작한 뒤 실패하면 다음 주소로 재시도하지 않는다.
+        """
+        urls_to_try = self.resolver.candidates(service_id, target_url)
+        trace = metrics.connect_tracer(service_id)
+        for attempt, try_url in enumerate(urls_to_try):
+            if attempt:
+                metrics.upstream_address_retries.labels(service_id).inc()
             try:
-                async with httpx.AsyncClient(
-                    timeout=proxy_timeout,
-                    follow_redirects=True
-                ) as client:
-                    response = await client.request(
-                        method=request.method,
-                        url=try_url,
-                        headers=headers,
-                        content=body if body else None
-                    )
-                    response_headers = dict(response.headers)
-                    response_headers.pop("access-control-allow-origin", None)
-                    response_headers.pop("access-control-allow-credentials", None)
-                    response_headers.pop("access-control-allow-methods", None)
-                    response_headers.pop("access-control-allow-headers", None)
-                    response_headers.pop("content-length", None)
-                    response_headers.pop("transfer-encoding", None)
-                    content = response.content or b""
-                    content_modified = False
-                    if not use_base_path and path_part == "" and content:
-                        ct = response.headers.get("content-type", "")
-                        if "text/html" in ct and 200 <= response.status_code < 300:
-                            try:
-                                content_str = content.decode("utf-8", errors="replace")
-                                prefix = f"/api/{service_id}"
-                                content_str = re.sub(r'(src|href)="/(?!/)', r'\1="' + prefix + r'/', content_str)
-                                content = content_str.encode("utf-8")
-                                content_modified = True
-                            except Exception as e:
-                                logger.warning(f"HTML 경로 교체 실패 {service_id}: {e}")
-                    if response.status_code >= 500:
-                        logger.warning(f"프록시 upstream {response.status_code}: {service_id} <- {try_url}")
-                    if response.status_code == 404:
-                        logger.warning(f"프록시 upstream 404: {service_id} <- {try_url} (path_part={path_part!r}, backend_path={backend_path!r})")
-                    return Response(
-                        content=content,
-                        status_code=response.status_code,
-                        headers=response_headers,
-                        media_type=response.headers.get("content-type")
-                    )
+                upstream_request = client.build_request(
+                    method=method,
+                    url=try_url,
+                    headers=headers,
+                    content=content,
+                    timeout=timeout,
+                    extensions={"trace": trace}
+                )
+                response = await client.send(upstream_request, stream=True)
+                self.resolver.record_success(service_id, try_url)
+                return response, try_url
             except httpx.ConnectError as e:
-                last_err = e
-                if try_url != urls_to_try[-1]:
+                self.resolver.record_failure(service_id, try_url)
+                if try_url != urls_to_try[-1] and not _body_started(content):
                     logger.debug(f"프록시 {service_id} {try_url} 연결 실패, 다음 시도: {e}")
-                else:
-                    logger.error(f"프록시 연결 실패 (ConnectError): {service_id} - {try_url} - {e}")
-                    raise HTTPException(status_code=503, detail=f"서비스 '{service_id}'에 연결할 수 없습니다")
+                    continue
+                logger.error(f"프록시 연결 실패 (ConnectError): {service_id} - {try_url} - {e}")
+                raise HTTPException(status_code=503, detail=f"서비스 '{service_id}'에 연결할 수 없습니다")
             except httpx.TimeoutException:
                 logger.error(f"프록시 타임아웃: {service_id} - {try_url}")
                 raise HTTPException(status_code=504, detail="게이트웨이 타임아웃")
             except Exception as e:
-                last_err = e
+                if _body_started(content):
+                    logger.error(f"프록시 요청 본문 전송 중 실패 (재시도 불가): {service_id} - {try_url} - {e}")
+                    raise HTTPException(status_code=502, detail=f"서비스 '{service_id}'로 요청 본문을 전달하지 못했습니다")
                 if try_url != urls_to_try[-1]:
                     logger.debug(f"프록시 {service_id} {try_url} 오류: {e}")
-                else:
-                    raise
+                    continue
+                raise
+        raise HTTPException(status_code=503, detail=f"서비스 '{service_id}'에 연결할 수 없습니다")
+    
+    async def _cached_get(
+        self,
+        plan: RoutePlan,
+        config: CacheConfig,
+        client: httpx.AsyncClient,
+        target_url: str,
+        headers: Dict[str, str],
+        timeout: float,
+        rewrite_html: bool,
+        request: Request
+    ) -> Optional[Response]:
+        """캐시 조회 → 신선하면 HIT, 아니면 (ETag 재검증 포함) 한 번만 업스트림 요청
+
+        병합 대기자인데 선행 응답이 캐시 불가였으면 None (호출측이 직접 요청)
+        """
+        key = f"{plan.service.id} {request.url.path}?{request.url.query}"
+        client_cc = parse_cache_control(request.headers.get("cache-control"))
+        entry = self.cache.get(key)
+        if entry is not None and entry.is_fresh() and "no-cache" not in client_cc:
+            self.cache.stats["hits"] += 1
+            return _cached_response(entry, request, "HIT", plan)
+        
+        async def fetch():
+            return await self._fill_cache(
+                plan, config, client, target_url, headers, timeout, rewrite_html, key, entry
+            )
+        
+        entry, extra, is_leader = await self.cache.collapse(key, fetch)
+        if is_leader:
+            if isinstance(extra, Response):
+                return extra
+            return _cached_response(entry, request, extra, plan)
+        if entry is None:
+            return None
+        self.cache.stats["hits"] += 1
+        return _cached_response(entry, request, "HIT", plan)
+    
+    async def _fill_cache(
+        self,
+        plan: RoutePlan,
+        config: CacheConfig,
+        client: httpx.AsyncClient,
+        target_url: str,
+        headers: Dict[str, str],
+        timeout: float,
+        rewrite_html: bool,
+        key: str,
+        stale: Optional[CacheEntry]
+    ) -> Tuple[Optional[CacheEntry], Any]:
+        """업스트림 요청 후 캐시 저장 → (entry, 'MISS'/'REVALIDATED') 또는 (None, 캐시 불가 응답)"""
+        fetch_headers = dict(headers)
+        # 캐시 본문은 디코딩해서 저장하고, 캐시 불가 응답은 그대로 전달하므로 accept-encoding은 클라이언트 값 유지
+        for name in ("if-none-match", "if-modified-since", "cache-control", "pragma"):
+            fetch_headers.pop(name, None)
+        if stale is not None and stale.can_revalidate():
+            if stale.etag:
+                fetch_headers["if-none-match"] = stale.etag
+            if stale.last_modified:
+                fetch_headers["if-modified-since"] = stale.last_modified
+        
+        response, _ = await self._send_upstream(plan.service.id, client, "GET", target_url, fetch_headers, None, timeout)
+        try:
+            if response.status_code == 304 and stale is not None:
+                await response.aclose()
+                merged = dict(stale.headers)
+                for name in ("cache-control", "etag", "last-modified", "vary"):
+                    if name in response.headers:
+                        merged[name] = response.headers[name]
+                stale.headers = merged
+                stale.refresh(response_ttl(merged, config) or 0.0)
+                self.cache.stats["revalidated"] += 1
+                return stale, "REVALIDATED"
+            
+            self.cache.stats["misses"] += 1
+            response_headers = _filter_response_headers(response.headers)
+            ttl = response_ttl(response_headers, config) if response.status_code == 200 else None
+            if ttl is None:
+                return None, await self._build_response(
+                    response, plan, rewrite_html, stream_mode=True, accept_encoding=headers.get("accept-encoding")
+                )
+            
+            response_headers.pop("content-length", None)
+            response_headers.pop("content-encoding", None)
+            content_type = response_headers.get("content-type", "")
+            rewriter = plan.rewriter if rewrite_html and plan.rewriter.applies_to(content_type) else None
+            chunks = []
+            size = 0
+            body_iter = response.aiter_bytes()
+            async for chunk in body_iter:
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > config.max_entry_bytes:
+                    # 캐시 상한 초과: 저장 없이 나머지 스트리밍
+                    body_stream = _chain_chunks(chunks, body_iter)
+                    if rewriter is not None:
+                        body_stream = rewriter.rewrite_iter(body_stream, content_type)
+                    encoding = _compression_encoding(
+                        plan, headers.get("accept-encoding"), response.status_code, response_headers
+                    )
+                    if encoding is not None:
+                        body_stream = compress_stream(body_stream, encoding)
+                        _mark_compressed(response_headers, encoding)
+                    return None, StreamingResponse(
+                        body_stream,
+                        status_code=response.status_code,
+                        headers=response_headers,
+                        media_type=response.headers.get("content-type"),
+                        background=BackgroundTask(response.aclose)
+                    )
+            await response.aclose()
+            body = b"".join(chunks)
+            if rewriter is not None:
+                body = rewriter.rewrite(body, content_type)
+            entry = CacheEntry(response.status_code, response_headers, body, ttl)
+            self.cache.put(key, entry)
+            return entry, "MISS"
+        except BaseException:
+            await response.aclose()
+            raise
+    
+    async def _build_response(
+        self,
+        response: httpx.Response,
+        plan: RoutePlan,
+        rewrite_html: bool,
+        stream_mode: bool,
+        accept_encoding: Optional[str] = None,
+        compress: bool = True
+    ) -> Response:
+        """업스트림 응답 → 클라이언트 응답 (스트리밍 또는 버퍼링, HTML/CSS 경로 교체, 압축 포함)"""
+        response_headers = _filter_response_headers(response.headers)
+        media_type = response.headers.get("content-type")
+        ct = media_type or ""
+        rewriter = plan.rewriter if rewrite_html and plan.rewriter.applies_to(ct) else None
+        # 업스트림이 클라이언트가 받을 수 없는 인코딩으로 보냈으면(identity 요청 무시 등) 디코딩해서 전달
+        passthrough = rewriter is None and _client_accepts(accept_encoding, response_headers.get("content-encoding"))
+        if not passthrough or not stream_mode:
+            # 경로 교체/버퍼링/디코딩은 디코딩된 본문을 다루므로 길이/인코딩 헤더 제거
+            response_headers.pop("content-length", None)
+            response_headers.pop("content-encoding", None)
+        encoding = _compression_encoding(plan, accept_encoding, response.status_code, response_headers) if compress else None
+        
+        if not stream_mode:
+            await response.aread()
+            await response.aclose()
+            content = response.content or b""
+            if rewriter is not None:
+                content = rewriter.rewrite(content, ct)
+            if encoding is not None and len(content) >= settings.PROXY_COMPRESS_MIN_BYTES:
+                content = compress(content, encoding)
+                _mark_compressed(response_headers, encoding)
+            return Response(
+                content=content,
+                status_code=response.status_code,
+                headers=response_headers,
+                media_type=media_type
+            )
+        
+        # 스트리밍: 교체/디코딩 대상이 아니면 업스트림 원본 바이트(인코딩 유지)를 그대로 전달
+        if rewriter is not None:
+            body = rewriter.rewrite_iter(response.aiter_bytes(), ct)
+        else:
+            body = response.aiter_raw() if passthrough else response.aiter_bytes()
+        if encoding is not None:
+            # 길이를 모르는 스트림도 미리 읽지 않고 청크마다 압축 후 flush (롱 폴링/스트리밍 지연 없음)
+            body = compress_stream(body, encoding)
+            _mark_compressed(response_headers, encoding)
+        return StreamingResponse(
+            body,
+            status_code=response.status_code,
+            headers=response_headers,
+            media_type=media_type,
+            background=BackgroundTask(response.aclose)
+        )
+
+
+# 클라이언트로 전달하지 않을 응답 헤더 (CORS는 허브가 직접 처리, 전송 인코딩은 재계산)
+_DROP_RESPONSE_HEADERS = (
+    "access-control-allow-origin",
+    "access-control-allow-credentials",
+    "access-control-allow-methods",
+    "access-control-allow-headers",
+    "transfer-encoding",
+    "connection",
+    "keep-alive",
+)
+
+# httpx가 aiter_bytes()에서 디코딩하는 인코딩
+_DECODABLE_ENCODINGS = ("gzip", "deflate", "br") if BROTLI_AVAILABLE else ("gzip", "deflate")
+
+# 병합하지 않을 키 기록 상한 (쿼리마다 키가 다르므로 넘으면 만료된 것부터 정리)
+_COALESCE_BYPASS_MAX_KEYS = 4096
+
+# 같은 URL이라도 응답이 달라질 수 있는 요청 헤더 (병합 키에 포함)
+_COALESCE_VARY_HEADERS = (
+    "authorization",
+    "cookie",
+    "accept",
+    "accept-encoding",
+    "accept-language",
+    "range",
+    "if-none-match",
+    "if-modified-since",
+)
+
+
+def _filter_response_headers(upstream_headers: httpx.Headers) -> Dict[str, str]:
+    headers = dict(upstream_headers)
+    for name in _DROP_RESPONSE_HEADERS:
+        headers.pop(name, None)
+    return headers
+
+
+def _entry_response(entry: CacheEntry, plan: RoutePlan, accept_encoding: Optional[str]) -> Response:
+    """병합으로 공유한 항목 → 요청의 Accept-Encoding에 맞춘 응답 (압축본은 항목에 보관해 재사용)"""
+    headers = dict(entry.headers)
+    headers.pop("content-length", None)
+    body = entry.body
+    encoding = _compression_encoding(plan, accept_encoding, entry.status_code, headers)
+    if encoding is not None and len(body) >= settings.PROXY_COMPRESS_MIN_BYTES:
+        body = entry.encoded(encoding)
+        _mark_compressed(headers, encoding)
+    return Response(content=body, status_code=entry.status_code, headers=headers)
+
+
+def _compress_response(response: Response, plan: RoutePlan, accept_encoding: Optional[str]) -> Response:
+    """compress=False로 받은 응답에 허브 압축 적용 (병합 경로에서 공유하지 않는 선행 응답)"""
+    headers = dict(response.headers)
+    encoding = _compression_encoding(plan, accept_encoding, response.status_code, headers)
+    if encoding is None:
+        return response
+    if not isinstance(response, StreamingResponse):
+        if len(response.body) < settings.PROXY_COMPRESS_MIN_BYTES:
+            return response
+        _mark_compressed(headers, encoding)
+        return Response(
+            content=compress(response.body, encoding),
+            status_code=response.status_code,
+            headers=headers,
+            background=response.background
+        )
+    _mark_compressed(headers, encoding)
+    return StreamingResponse(
+        compress_stream(response.body_iterator, encoding),
+        status_code=response.status_code,
+        headers=headers,
+        background=response.background
+    )
+
+
+def _circuit_open(service_id: str, breaker: CircuitBreaker) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=f"서비스 '{service_id}'가 응답하지 않아 일시적으로 차단되었습니다",
+        headers={"Retry-After": str(breaker.retry_after())}
+    )
+
+
+def _error_entry(error: HTTPException) -> CacheEntry:
+    """HTTPException → 병합 대기자에게 줄 항목 (FastAPI 기본 오류 응답과 같은 JSON 본문)"""
+    headers = {"content-type": "application/json", **(error.headers or {})}
+    body = json.dumps({"detail": error.detail}, ensure_ascii=False).encode("utf-8")
+    return CacheEntry(error.status_code, headers, body, 0.0)
+
+
+def _cached_response(entry: CacheEntry, request: Request, cache_status: str, plan: RoutePlan) -> Response:
+    """캐시 항목 → 응답 (클라이언트 If-None-Match 일치 시 304, 압축본은 항목에 보관해 재사용)"""
+    headers = dict(entry.headers)
+    headers["x-cache"] = cache_status
+    headers["age"] = str(entry.age())
+    if_none_match = request.headers.get("if-none-match")
+    if entry.etag and if_none_match and entry.etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+        keep = ("etag", "cache-control", "last-modified", "vary", "x-cache", "age")
+        return Response(status_code=304, headers={k: v for k, v in headers.items() if k in keep})
+    body = entry.body
+    encoding = _compression_encoding(plan, request.headers.get("accept-encoding"), entry.status_code, headers)
+    if encoding is not None and len(body) >= settings.PROXY_COMPRESS_MIN_BYTES:
+        body = entry.encoded(encoding)
+        _mark_compressed(headers, encoding)
+    return Response(
+        content=body,
+        status_code=entry.status_code,
+        headers=headers,
+        media_type=headers.get("content-type")
+    )
+
+
+def _compression_encoding(
+    plan: RoutePlan,
+    accept_encoding: Optional[str],
+    status_code: int,
+    headers: Dict[str, str]
+) -> Optional[str]:
+    """허브에서 압축할 인코딩 (압축 대상이 아니거나 업스트림이 이미 압축했으면 None)"""
+    if not plan.compress_types or not accept_encoding:
+        return None
+    if status_code < 200 or status_code in (204, 206, 304):
+        return None
+    if headers.get("content-encoding", "identity").lower() != "identity":
+        return None
+    if "no-transform" in headers.get("cache-control", "").lower():
+        return None
+    if _is_event_stream(headers):
+        # SSE는 이벤트마다 바로 전달해야 하므로 압축하지 않음 (프록시/브라우저 버퍼링 방지)
+        return None
+    if not is_compressible(headers.get("content-type"), plan.compress_types):
+        return None
+    length = headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) < settings.PROXY_COMPRESS_MIN_BYTES:
+        return None
+    return choose_encoding(accept_encoding)
+
+
+def _client_accepts(accept_encoding: Optional[str], content_encoding: Optional[str]) -> bool:
+    """업스트림 응답 인코딩을 클라이언트가 받을 수 있는지 (httpx가 풀 수 없는 인코딩이면 그대로 전달)"""
+    content_encoding = (content_encoding or "identity").strip().lower()
+    if content_encoding == "identity" or content_encoding not in _DECODABLE_ENCODINGS:
+        return True
+    return choose_encoding(accept_encoding, (content_encoding,)) is not None
+
+
+def _mark_compressed(headers: Dict[str, str], encoding: str):
+    """압축 응답 헤더 정리 (길이 제거, Vary 추가, 원본 표현의 강한 ETag는 약한 ETag로)"""
+    headers.pop("content-length", None)
+    headers["content-encoding"] = encoding
+    vary = headers.get("vary")
+    if not vary:
+        headers["vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower() and vary.strip() != "*":
+        headers["vary"] = f"{vary}, Accept-Encoding"
+    etag = headers.get("etag")
+    if etag and etag.startswith('"'):
+        headers["etag"] = f"W/{etag}"
+
+
+def _is_event_stream(headers) -> bool:
+    return (headers.get("content-type") or "").lower().startswith("text/event-stream")
+
+
+def _can_buffer_for_followers(response: StreamingResponse) -> bool:
+    """병합 대기자와 공유하려고 본문 전체를 읽어도 되는 응답인지 (길이를 알고 상한 이하, SSE 아님)"""
+    if _is_event_stream(response.headers):
+        return False
+    length = response.headers.get("content-length")
+    return length is not None and length.isdigit() and int(length) <= settings.PROXY_COALESCE_MAX_BYTES
+
+
+def _has_request_body(request: Request) -> bool:
+    """본문이 있는 요청인지 (GET 등에 chunked 본문을 붙이지 않기 위함)"""
+    if request.headers.get("transfer-encoding"):
+        return True
+    try:
+        return int(request.headers.get("content-length") or 0) > 0
+    except ValueError:
+        return False
+
+
+class _RequestBody:
+    """한 번만 읽을 수 있는 요청 본문 스트림 (읽기 시작했는지 기록 → 다른 주소로 재시도 가능 여부)"""
+
+    __slots__ = ("_stream", "started")
+
+    def __init__(self, stream: AsyncIterator[bytes]):
+        self._stream = stream
+        self.started = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        self.started = True
+        async for chunk in self._stream:
+            yield chunk
+
+
+def _body_started(content) -> bool:
+    return isinstance(content, _RequestBody) and content.started
+
+
+async def _chain_chunks(buffered: List[bytes], rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    for chunk in buffered:
+        yield chunk
+    async for chunk in rest:
+        yield chunk
+
+
+def _release_after_body(response: Response, release: Callable[[], None]):
+    """응답 본문 전송이 끝나면(연결이 끊겨도) release를 한 번만 호출"""
+    if not isinstance(response, StreamingResponse):
+        release()
+        return
+    released = False
+    
+    def release_once():
+        nonlocal released
+        if not released:
+            released = True
+            release()
+    
+    async def body(iterator):
+        try:
+            async for chunk in iterator:
+                yield chunk
+        finally:
+            release_once()
+    
+    async def background(previous):
+        try:
+            if previous is not None:
+                await previous()
+        finally:
+            release_once()
+    
+    response.body_iterator = body(response.body_iterator)
+    response.background = BackgroundTask(background, response.background)
@@ -0,0 +1,187 @@
+"""프록시 GET 응답 캐시 (LRU, TTL, ETag 재검증, 동시 미스 병합)"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from pydantic import BaseModel, ValidationError
+from app.models import ServiceInfo
+from app.compression import compress
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheConfig(BaseModel):
+    """서비스별 캐시 설정 (services.json metadata.cache, 지정한 서비스만 캐시)"""
+    ttl: float = 10  # 초, 업스트림 Cache-Control max-age가 있으면 그 값 사용 (ttl 상한)
+    max_entry_bytes: int = 1024 * 1024
+
+
+class CacheEntry:
+    """캐시된 응답 (디코딩된 본문, 압축본은 처음 요청될 때 만들어 함께 보관)"""
+    __slots__ = ("status_code", "headers", "body", "etag", "last_modified", "stored_at", "expires_at", "_encoded")
+
+    def __init__(self, status_code: int, headers: Dict[str, str], body: bytes, ttl: float):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.etag = headers.get("etag")
+        self.last_modified = headers.get("last-modified")
+        self.stored_at = time.monotonic()
+        self.expires_at = self.stored_at + ttl
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        """인코딩별 압축 본문 (HIT마다 다시 압축하지 않음)"""
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = compress(self.body, encoding)
+            self._encoded[encoding] = data
+        return data
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def can_revalidate(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def refresh(self, ttl: float):
+        """304 재검증 성공 시 유효기간 갱신"""
+        self.stored_at = time.monotonic()
+        self.expires_at = self.stored_at + ttl
+
+    def age(self) -> int:
+        return int(time.monotonic() - self.stored_at)
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Cache-Control 헤더 → {지시어: 값}"""
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        name, _, arg = part.partition("=")
+        directives[name.strip()] = arg.strip().strip('"') or None
+    return directives
+
+
+def response_ttl(headers: Dict[str, str], config: CacheConfig) -> Optional[float]:
+    """저장할 TTL (저장 불가면 None)"""
+    cc = parse_cache_control(headers.get("cache-control"))
+    if "no-store" in cc or "private" in cc:
+        return None
+    if "set-cookie" in headers:
+        return None
+    vary = (headers.get("vary") or "").lower()
+    if vary and any(v.strip() not in ("accept-encoding", "origin") for v in vary.split(",")):
+        return None
+    if "no-cache" in cc:
+        return 0.0  # 저장하되 매번 재검증
+    for name in ("s-maxage", "max-age"):
+        if cc.get(name) is not None:
+            try:
+                return max(0.0, min(float(cc[name]), config.ttl))
+            except ValueError:
+                break
+    return config.ttl
+
+
+class ResponseCache:
+    """크기 제한 LRU 응답 캐시
+
+    RESPONSE_CACHE_MAX_BYTES / RESPONSE_CACHE_MAX_ENTRIES를 넘으면 가장 오래 안 쓴 항목부터 제거한다.
+    같은 키의 미스가 동시에 들어오면 업스트림 요청은 하나만 보내고 나머지는 그 결과를 기다린다.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._size = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, int] = {}
+        self._configs: Dict[str, Optional[CacheConfig]] = {}
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "collapsed": 0, "stores": 0, "evictions": 0}
+
+    def config_for(self, service: ServiceInfo) -> Optional[CacheConfig]:
+        """서비스 캐시 설정 (미지정 시 None = 캐시 안 함)"""
+        if service.id in self._configs:
+            return self._configs[service.id]
+        raw = (service.metadata or {}).get("cache")
+        config = None
+        if raw and settings.RESPONSE_CACHE_ENABLED:
+            try:
+                config = CacheConfig(**raw) if isinstance(raw, dict) else CacheConfig()
+            except ValidationError as e:
+                logger.warning(f"응답 캐시 설정 오류 {service.id}: {e} → 캐시 안 함")
+        self._configs[service.id] = config
+        return config
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: CacheEntry):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= len(old.body)
+        self._entries[key] = entry
+        self._size += len(entry.body)
+        self.stats["stores"] += 1
+        while self._entries and (self._size > settings.RESPONSE_CACHE_MAX_BYTES or
+                                 len(self._entries) > settings.RESPONSE_CACHE_MAX_ENTRIES):
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted.body)
+            self.stats["evictions"] += 1
+
+    def invalidate_service(self, service_id: str):
+        """서비스 설정 변경 시 해당 서비스 항목 제거"""
+        self._configs.pop(service_id, None)
+        prefix = f"{service_id} "
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            self._size -= len(self._entries.pop(key).body)
+
+    async def collapse(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Tuple[Optional[CacheEntry], Any]]]
+    ) -> Tuple[Optional[CacheEntry], Any, bool]:
+        """동시 미스 병합 → (entry, 선행 요청의 추가 결과, 선행 요청 여부)
+
+        대기자는 entry만 받으며, 캐시할 수 없는 응답이었다면 None을 받아 직접 요청한다.
+        """
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["collapsed"] += 1
+            self._waiters[key] = self._waiters.get(key, 0) + 1
+            try:
+                return await asyncio.shield(pending), None, False
+            finally:
+                remaining = self._waiters.get(key, 1) - 1
+                if remaining > 0:
+                    self._waiters[key] = remaining
+                else:
+                    self._waiters.pop(key, None)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        entry = None
+        try:
+            entry, extra = await fetch()
+            return entry, extra, True
+        finally:
+            self._inflight.pop(key, None)
+            future.set_result(entry)
+
+    def waiting(self, key: str) -> int:
+        """진행 중인 key 요청의 결과를 기다리는 대기자 수"""
+        return self._waiters.get(key, 0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": settings.RESPONSE_CACHE_MAX_BYTES,
+        }
@@ -2,47 +2,41 @@
 import json
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional
-from app.models import ServiceInfo, ServiceType
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from app.models import RoutePlan, ServiceInfo, ServiceType
+from app.html_rewriter import UrlPrefixRewriter
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class ServicesDiff:
+    """설정 재로드 결과 (서비스 id 목록)"""
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
 class ServiceRegistry:
     """서비스 레지스트리 관리"""
     
     def __init__(self):
         self._services: Dict[str, ServiceInfo] = {}
+        self._routes: Dict[str, RoutePlan] = {}
         self._config_path = Path(settings.SERVICES_CONFIG_PATH)
     
     async def load_services(self):
         """서비스 목록 로드 (포트 9000, 9001, 9002... 자동 할당)"""
         if self._config_path.exists():
             try:
-                with open(self._config_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    port = 9000
-                    for service_data in data.get('services', []):
-                        if (service_data.get('type') != 'desktop' and
-                                service_data.get('enabled', True)):
-                            service_data = dict(service_data)
-                            meta = service_data.get('metadata') or {}
-                            # metadata.port 지정 시 해당 포트 사용, 없으면 자동 할당
-                            assigned_port = meta.get('port') if meta.get('port') is not None else port
-                            port = max(port, assigned_port + 1)  # 다음 서비스가 중복 포트 받지 않도록
-                            host = meta.get('host', settings.SERVICE_HOST)
-                            base = f'http://{host}:{assigned_port}'
-                            health_path = meta.get('health_path', '/')
-                            service_data['base_url'] = base
-                            service_data['health_check_url'] = f'{base.rstrip("/")}{health_path}'
-                            if 'metadata' not in service_data:
-                                service_data['metadata'] = {}
-                            meta = dict(service_data['metadata'])
-                            meta['ports'] = [assigned_port]
-                            service_data['metadata'] = meta
-                        service = ServiceInfo(**service_data)
-                        self._services[service.id] = service
+                services, port = self._read_config()
+                self._swap(services)
                 port_info = f" (포트 9000~{port - 1} 자동 할당)" if port > 9000 else ""
                 logger.info(f"{len(self._services)}개의 서비스 로드 완료{port_info}")
             except Exception as e:
@@ -52,6 +46,85 @@ class ServiceRegistry:
             # 기본 서비스 등록
             await self._register_default_services()
     
+    def reload_services(self) -> "ServicesDiff":
+        """설정 파일을 다시 읽어 바뀐 서비스만 교체 (파싱 실패 시 예외, 기존 목록 유지)"""
+        services, _ = self._read_config()
+        current = self._services
+        diff = ServicesDiff(
+            added=[sid for sid in services if sid not in current],
+            removed=[sid for sid in current if sid not in services],
+            changed=[sid for sid in services if sid in current and services[sid] != current[sid]],
+        )
+        if diff:
+            # 바뀌지 않은 서비스는 기존 객체/경로 계획을 그대로 재사용
+            for sid in services:
+                if sid in current and sid not in diff.changed:
+                    services[sid] = current[sid]
+            self._swap(services)
+        return diff
+    
+    @property
+    def config_path(self) -> Path:
+        return self._config_path
+    
+    def config_signature(self) -> Optional[Tuple[int, int]]:
+        """설정 파일 변경 감지용 (mtime_ns, size), 파일이 없으면 None"""
+        try:
+            stat = self._config_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _read_config(self) -> Tuple[Dict[str, ServiceInfo], int]:
+        """services.json 파싱 → (서비스 목록, 다음 자동 할당 포트)"""
+        with open(self._config_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        services: Dict[str, ServiceInfo] = {}
+        port = 9000
+        for service_data in data.get('services', []):
+            if (service_data.get('type') != 'desktop' and
+                    service_data.get('enabled', True)):
+                service_data = dict(service_data)
+                meta = service_data.get('metadata') or {}
+                # metadata.port 지정 시 해당 포트 사용, 없으면 자동 할당
+                assigned_port = meta.get('port') if meta.get('port') is not None else port
+                port = max(port, assigned_port + 1)  # 다음 서비스가 중복 포트 받지 않도록
+                host = meta.get('host', settings.SERVICE_HOST)
+                base = f'http://{host}:{assigned_port}'
+                health_path = meta.get('health_path', '/')
+                ports = [assigned_port]
+                # metadata.instances: 다중 인스턴스 (포트 번호 또는 {"host", "port"})
+                instances = self._parse_instances(meta.get('instances'), host)
+                if instances:
+                    base = instances[0][0]
+                    ports = [p for _, p in instances]
+                    service_data['instances'] = [url for url, _ in instances]
+                service_data['base_url'] = base
+                service_data['health_check_url'] = f'{base.rstrip("/")}{health_path}'
+                if 'metadata' not in service_data:
+                    service_data['metadata'] = {}
+                meta = dict(service_data['metadata'])
+                meta['ports'] = ports
+                service_data['metadata'] = meta
+            service = ServiceInfo(**service_data)
+            services[service.id] = service
+        return services, port
+    
+    @staticmethod
+    def _parse_instances(raw, default_host: str) -> List[tuple]:
+        """metadata.instances → [(base_url, port), ...]"""
+        instances = []
+        for item in raw or []:
+            if isinstance(item, dict):
+                host = item.get('host', default_host)
+                port = item.get('port')
+            else:
+                host, port = default_host, item
+            if port is None:
+                continue
+            instances.append((f'http://{host}:{int(port)}', int(port)))
+        return instances
+    
     async def _register_default_services(self):
         """기본 서비스 등록"""
         default_services = [
@@ -143,6 +216,7 @@ class ServiceRegistry:
             }
         ]
         
+        services: Dict[str, ServiceInfo] = {}
         port = 9000
         for service_data in default_services:
             if (service_data.get('type') != 'desktop' and
@@ -159,11 +233,21 @@ class ServiceRegistry:
                 service_data['metadata'] = meta
                 port += 1
             service = ServiceInfo(**service_data)
-            self._services[service.id] = service
+            services[service.id] = service
+        self._swap(services)
         
         port_info = f" (포트 9000~{port - 1} 자동 할당)" if port > 9000 else ""
         logger.info(f"{len(self._services)}개의 기본 서비스 등록 완료{port_info}")
     
+    def _swap(self, services: Dict[str, ServiceInfo]):
+        """서비스 목록과 경로 계획을 한 번에 교체 (요청 처리 중에도 일관된 스냅샷)"""
+        routes = {service_id: build_route_plan(service) for service_id, service in services.items()}
+        self._services, self._routes = services, routes
+    
+    def get_route(self, service_id: str) -> Optional[RoutePlan]:
+        """프록시 경로 계획 조회"""
+        return self._routes.get(service_id)
+    
     def get_service(self, service_id: str) -> Optional[ServiceInfo]:
         """서비스 조회"""
         return self._services.get(service_id)
@@ -178,11 +262,64 @@ class ServiceRegistry:
     
     def register_service(self, service: ServiceInfo):
         """서비스 등록"""
-        self._services[service.id] = service
+        services = dict(self._services)
+        services[service.id] = service
+        self._swap(services)
         logger.info(f"서비스 등록: {service.id} - {service.name}")
     
     def unregister_service(self, service_id: str):
         """서비스 제거"""
         if service_id in self._services:
-            del self._services[service_id]
+            services = dict(self._services)
+            del services[service_id]
+            self._swap(services)
             logger.info(f"서비스 제거: {service_id}")
+
+
+def build_route_plan(service: ServiceInfo) -> RoutePlan:
+    """서비스 설정 → 프록시 경로 계획
+    
+    proxy_base_path: Vite base 사용 서비스(ball-bounce 등)만 전체 경로 전달
+    backend_path: 프론트엔드가 /api/coffee 호출 시 백엔드 /api/coffee 경로로 전달
+    backend_port: 실제 프록시 대상 포트 (experiments → 8101 gateway 직접)
+    """
+    meta = service.metadata or {}
+    use_base_path = bool(meta.get("proxy_base_path", False))
+    backend_path = (meta.get("backend_path") or "").rstrip("/")
+    proxy_base = (service.base_url or "").rstrip("/")
+    if meta.get("backend_port") is not None:
+        p = urlparse(service.base_url or "")
+        host = p.hostname or "127.0.0.1"
+        proxy_base = f"{p.scheme or 'http'}://{host}:{meta['backend_port']}"
+    if use_base_path:
+        path_prefix, empty_suffix = f"/api/{service.id}", "/"
+    elif backend_path:
+        path_prefix, empty_suffix = backend_path, ""
+    else:
+        path_prefix, empty_suffix = "", "/"
+    timeout = meta.get("proxy_timeout")
+    if timeout is None:
+        timeout = settings.PROXY_TIMEOUT
+    # metadata.compress: false(압축 안 함) / true(기본 형식) / ["application/json", ...](형식 지정)
+    compress = meta.get("compress", settings.PROXY_COMPRESS)
+    if isinstance(compress, list):
+        compress_types = tuple(str(t).strip().lower() for t in compress if str(t).strip())
+    elif compress:
+        compress_types = tuple(t.strip().lower() for t in settings.PROXY_COMPRESS_TYPES.split(",") if t.strip())
+    else:
+        compress_types = ()
+    return RoutePlan(
+        service=service,
+        proxy_base=proxy_base,
+        path_prefix=path_prefix,
+        empty_suffix=empty_suffix,
+        referer=f"{proxy_base}/",
+        use_instances=len(service.instances) > 1 and meta.get("backend_port") is None,
+        timeout=timeout,
+        stream_mode=bool(meta.get("proxy_streaming", settings.PROXY_STREAMING)),
+        rewriter=None if use_base_path else UrlPrefixRewriter(
+            f"/api/{service.id}",
+            css_urls=bool(meta.get("rewrite_css_urls", settings.PROXY_REWRITE_CSS_URLS))
+        ),
+        compress_types=compress_types,
+    )
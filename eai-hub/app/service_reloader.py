@@ -0,0 +1,105 @@
+"""services.json 변경 감지 및 무중단 재로드"""
+import asyncio
+import logging
+from typing import Optional, Tuple
+from app.service_registry import ServiceRegistry, ServicesDiff
+from app.upstream_pool import UpstreamClientPool
+from app.address_resolver import AddressResolver
+from app.circuit_breaker import CircuitBreakerRegistry
+from app.load_balancer import LoadBalancer
+from app.response_cache import ResponseCache
+from app.admission import AdmissionController
+from app.health_checker import HealthChecker
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceReloader:
+    """설정 파일을 SERVICES_RELOAD_INTERVAL초마다 확인해 바뀌었으면 차이만 반영
+
+    레지스트리 교체는 한 번에 이루어지므로 요청은 항상 이전 또는 새 설정 중 하나만 본다.
+    바뀌지 않은 서비스의 연결 풀/헬스체크 스케줄/서킷 상태는 그대로 두고,
+    추가·변경·제거된 서비스의 상태만 정리한다. 변경·제거된 서비스의 기존 연결 풀은
+    진행 중인 요청이 끝날 때까지 유지한 뒤 닫는다(UpstreamClientPool.retire_client).
+    """
+
+    def __init__(
+        self,
+        registry: ServiceRegistry,
+        pool: UpstreamClientPool,
+        resolver: AddressResolver,
+        breakers: CircuitBreakerRegistry,
+        balancer: LoadBalancer,
+        cache: ResponseCache,
+        admission: AdmissionController,
+        health_checker: HealthChecker
+    ):
+        self.registry = registry
+        self.pool = pool
+        self.resolver = resolver
+        self.breakers = breakers
+        self.balancer = balancer
+        self.cache = cache
+        self.admission = admission
+        self.health_checker = health_checker
+        self._signature: Optional[Tuple[int, int]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def reload(self) -> Optional[ServicesDiff]:
+        """설정 파일 재로드 (파일이 없거나 잘못되면 기존 설정 유지 후 None)"""
+        async with self._lock:
+            self._signature = self.registry.config_signature()
+            if self._signature is None:
+                logger.warning("서비스 설정 파일이 없어 재로드하지 않습니다 (기존 설정 유지)")
+                return None
+            try:
+                diff = self.registry.reload_services()
+            except Exception as e:
+                logger.error(f"서비스 설정 재로드 실패 (기존 설정 유지): {e}")
+                return None
+            if diff:
+                self._apply(diff)
+                logger.info(
+                    f"서비스 설정 재로드: 추가 {diff.added or '-'}, 변경 {diff.changed or '-'}, "
+                    f"제거 {diff.removed or '-'}"
+                )
+            return diff
+
+    def _apply(self, diff: ServicesDiff):
+        """변경·제거된 서비스의 서비스별 상태 정리 (추가된 서비스는 첫 요청/헬스체크 때 생성)"""
+        for service_id in diff.changed + diff.removed:
+            self.pool.retire_client(service_id)
+            self.resolver.forget(service_id)
+            self.breakers.remove(service_id)
+            self.balancer.remove(service_id)
+            self.cache.invalidate_service(service_id)
+            self.admission.remove(service_id)
+        for service_id in diff.added + diff.changed + diff.removed:
+            self.health_checker.forget(service_id)
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(settings.SERVICES_RELOAD_INTERVAL)
+            try:
+                signature = self.registry.config_signature()
+                if signature is not None and signature != self._signature:
+                    await self.reload()
+            except Exception as e:
+                logger.error(f"서비스 설정 감시 오류: {e}")
+
+    def start(self):
+        """설정 파일 감시 시작 (SERVICES_RELOAD_INTERVAL <= 0 이면 사용 안 함)"""
+        if settings.SERVICES_RELOAD_INTERVAL <= 0:
+            return
+        self._signature = self.registry.config_signature()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch())
+            logger.info(f"서비스 설정 감시 시작 ({self.registry.config_path}, {settings.SERVICES_RELOAD_INTERVAL}초)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,192 @@
+"""로그인 세션 저장소 (memory / redis)"""
+import asyncio
+import heapq
+from abc import ABC, abstractmethod
+import json
+import logging
+import secrets
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# redis 백엔드는 redis 패키지가 있을 때만 사용
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis_asyncio = None
+    REDIS_AVAILABLE = False
+
+
+class SessionStore(ABC):
+    """세션 저장소 인터페이스 - 세션 데이터: {"username": str, "created_at": datetime}"""
+
+    @abstractmethod
+    async def create(self, username: str) -> str:
+        """새 세션 토큰 발급"""
+
+    @abstractmethod
+    async def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """유효한 세션 반환 (없거나 만료면 None)"""
+
+    @abstractmethod
+    async def delete(self, token: str):
+        """세션 삭제 (없으면 무시)"""
+
+    async def start(self):
+        """백그라운드 작업 시작 (앱 시작 시)"""
+
+    async def aclose(self):
+        """정리 (앱 종료 시)"""
+
+
+class MemorySessionStore(SessionStore):
+    """프로세스 내 세션 - 만료 시각 순 힙과 주기 정리로 버려진 세션도 회수 (단일 워커 전용)"""
+
+    def __init__(self, ttl: int = None):
+        self.ttl = ttl if ttl is not None else settings.SESSION_TTL
+        # token → (username, created_at, expires_at[monotonic])
+        self._sessions: Dict[str, Tuple[str, datetime, float]] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def create(self, username: str) -> str:
+        token = secrets.token_urlsafe(32)
+        expires_at = time.monotonic() + self.ttl
+        self._sessions[token] = (username, datetime.now(), expires_at)
+        heapq.heappush(self._expiry_heap, (expires_at, token))
+        return token
+
+    async def get(self, token: str) -> Optional[Dict[str, Any]]:
+        entry = self._sessions.get(token)
+        if entry is None:
+            return None
+        username, created_at, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._sessions[token]
+            return None
+        return {"username": username, "created_at": created_at}
+
+    async def delete(self, token: str):
+        self._sessions.pop(token, None)
+        # 로그아웃이 많아 힙에 죽은 항목이 쌓이면 재구성
+        if len(self._expiry_heap) > 2 * len(self._sessions) + 64:
+            self._expiry_heap = [(exp, t) for t, (_, _, exp) in self._sessions.items()]
+            heapq.heapify(self._expiry_heap)
+
+    def sweep(self) -> int:
+        """만료 세션 제거 (힙 앞쪽만 확인하므로 만료된 개수에 비례)"""
+        now = time.monotonic()
+        removed = 0
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, token = heapq.heappop(self._expiry_heap)
+            entry = self._sessions.get(token)
+            if entry is not None and entry[2] == expires_at:
+                del self._sessions[token]
+                removed += 1
+        return removed
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(settings.SESSION_SWEEP_INTERVAL)
+            removed = self.sweep()
+            if removed:
+                logger.info(f"만료 세션 {removed}개 정리")
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class RedisSessionStore(SessionStore):
+    """Redis 세션 - 만료는 Redis TTL이 처리하며 여러 워커/프로세스가 공유
+
+    client를 넘기면 그 클라이언트(redis.asyncio 호환 객체, 예: LocalRedis)를 사용한다.
+    """
+
+    KEY_PREFIX = "eai-hub:session:"
+
+    def __init__(self, url: str = None, ttl: int = None, client: Any = None):
+        self.ttl = ttl if ttl is not None else settings.SESSION_TTL
+        if client is None:
+            client = redis_asyncio.from_url(url or settings.SESSION_REDIS_URL, decode_responses=True)
+        self._redis = client
+
+    async def create(self, username: str) -> str:
+        token = secrets.token_urlsafe(32)
+        data = json.dumps({"username": username, "created_at": datetime.now().isoformat()})
+        await self._redis.set(self.KEY_PREFIX + token, data, ex=self.ttl)
+        return token
+
+    async def get(self, token: str) -> Optional[Dict[str, Any]]:
+        raw = await self._redis.get(self.KEY_PREFIX + token)
+        if raw is None:
+            return None
+        try:
+            data = json.loads(raw)
+            return {"username": data.get("username"), "created_at": datetime.fromisoformat(data["created_at"])}
+        except (ValueError, KeyError, TypeError):
+            logger.warning("손상된 세션 데이터 무시")
+            return None
+
+    async def delete(self, token: str):
+        await self._redis.delete(self.KEY_PREFIX + token)
+
+    async def aclose(self):
+        await self._redis.aclose()
+
+
+class LocalRedis:
+    """redis.asyncio 클라이언트 대용 (세션 저장소가 쓰는 get / set(ex) / delete만, 프로세스 내)
+
+    SESSION_REDIS_URL=memory:// 이면 사용 - Redis 서버 없이 redis 백엔드 경로를 실행해 볼 때 쓴다.
+    """
+
+    def __init__(self):
+        # key → (value, expires_at[monotonic] 또는 None)
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ex: Optional[int] = None) -> bool:
+        self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    async def aclose(self):
+        self._data.clear()
+
+
+def create_session_store() -> SessionStore:
+    """SESSION_BACKEND 설정에 따른 저장소 생성"""
+    backend = settings.SESSION_BACKEND.lower()
+    if backend == "redis":
+        if settings.SESSION_REDIS_URL.startswith("memory://"):
+            logger.info("세션 저장소: redis (memory:// 프로세스 내 LocalRedis, 워커 간 공유 안 됨)")
+            return RedisSessionStore(client=LocalRedis())
+        if REDIS_AVAILABLE:
+            logger.info(f"세션 저장소: redis ({settings.SESSION_REDIS_URL})")
+            return RedisSessionStore()
+        logger.error("SESSION_BACKEND=redis 이지만 redis 패키지가 없습니다 → memory 사용 (워커 간 세션 공유 안 됨)")
+    elif backend != "memory":
+        logger.warning(f"알 수 없는 SESSION_BACKEND '{settings.SESSION_BACKEND}' → memory 사용")
+    return MemorySessionStore()
@@ -0,0 +1,263 @@
+"""정적 파일 / 생성 HTML 메모리 캐시 (사전 압축, 콘텐츠 해시 ETag)
+
+파일 확인·읽기와 처음 요청된 인코딩의 압축은 asyncio.to_thread로 실행해 이벤트 루프를 막지 않는다.
+"""
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+from app.compression import choose_encoding, compress, is_compressible, supported_encodings
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 파일명에 콘텐츠 해시가 들어간 자산 (app.3f9a1c2e.js 등) → 내용이 바뀌면 URL도 바뀌므로 영구 캐시
+_HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.[^./]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# 사전 압축 파일 확장자
+_PRECOMPRESSED = {"br": ".br", "gzip": ".gz"}
+
+
+class CachedBody:
+    """메모리에 올린 응답 본문 하나 (인코딩별 압축 결과는 처음 요청될 때 만들어 재사용)"""
+
+    __slots__ = ("body", "content_type", "etag", "_encoded")
+
+    def __init__(self, body: bytes, content_type: str, encoded: Optional[Dict[str, bytes]] = None):
+        self.body = body
+        self.content_type = content_type
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self._encoded: Dict[str, bytes] = dict(encoded or {})
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(b) for b in self._encoded.values())
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = compress(self.body, encoding)
+            if len(data) >= len(self.body):
+                data = self.body  # 압축 효과 없음 → 원본 재사용 (다음부터 원본 전송)
+            self._encoded[encoding] = data
+        return data
+
+    async def response(self, request: Request, cache_control: str, status_code: int = 200) -> Response:
+        """조건부 요청(If-None-Match)과 Accept-Encoding을 처리한 응답"""
+        headers = {"etag": self.etag, "cache-control": cache_control, "vary": "Accept-Encoding"}
+        if _etag_matches(request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=304, headers=headers)
+        body = self.body
+        if len(body) >= settings.STATIC_COMPRESS_MIN_BYTES and is_compressible(self.content_type):
+            encoding = choose_encoding(request.headers.get("accept-encoding"), self._available_encodings())
+            if encoding is not None:
+                data = self._encoded.get(encoding)
+                if data is None:
+                    data = await asyncio.to_thread(self.encoded, encoding)
+                if data is not self.body:
+                    body = data
+                    headers["content-encoding"] = encoding
+        return Response(content=body, status_code=status_code, headers=headers, media_type=self.content_type)
+
+    def _available_encodings(self) -> Tuple[str, ...]:
+        # 사전 압축 파일만 있는 인코딩(brotli 미설치 시 .br)도 제공
+        available = list(supported_encodings())
+        for encoding in ("br", "gzip"):
+            if encoding in self._encoded and encoding not in available:
+                available.insert(0, encoding)
+        return tuple(available)
+
+
+class StaticAssetCache:
+    """static/ 디렉터리 파일 서빙
+
+    STATIC_CACHE_MAX_FILE_BYTES 이하 파일은 메모리에 올려 두고(전체 STATIC_CACHE_MAX_BYTES, LRU)
+    요청마다 stat으로 변경만 확인한다. 같은 위치에 name.br / name.gz가 있으면 빌드 시 사전 압축본으로 사용하고,
+    없으면 처음 요청될 때 압축해 둔다. 큰 파일은 FileResponse로 스트리밍한다(Range 지원).
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory.resolve()
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], CachedBody, int]]" = OrderedDict()
+        self._size = 0
+        self.stats = {"hits": 0, "loads": 0, "evictions": 0, "not_modified": 0}
+
+    def resolve(self, rel_path: str) -> Optional[Path]:
+        """디렉터리 밖(../)을 가리키지 않는 실제 파일 경로"""
+        try:
+            path = (self.directory / rel_path).resolve()
+        except (OSError, ValueError):
+            return None
+        if not path.is_relative_to(self.directory) or not path.is_file():
+            return None
+        return path
+
+    def _stat(self, rel_path: str) -> Optional[Tuple[Path, Tuple[int, int]]]:
+        """(파일 경로, (mtime_ns, size)) - 파일이 없으면 None"""
+        path = self.resolve(rel_path)
+        if path is None:
+            return None
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return path, (stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _load(path: Path, mtime_ns: int) -> CachedBody:
+        return CachedBody(path.read_bytes(), _content_type(path), _read_precompressed(path, mtime_ns))
+
+    async def get(self, rel_path: str) -> Optional[CachedBody]:
+        """캐시된 본문 (파일이 없거나 너무 크면 None)"""
+        found = await asyncio.to_thread(self._stat, rel_path)
+        if found is None:
+            return None
+        path, signature = found
+        cached = self._entries.get(rel_path)
+        if cached is not None and cached[0] == signature:
+            self._entries.move_to_end(rel_path)
+            self.stats["hits"] += 1
+            return cached[1]
+        if signature[1] > settings.STATIC_CACHE_MAX_FILE_BYTES:
+            return None
+        try:
+            entry = await asyncio.to_thread(self._load, path, signature[0])
+        except OSError:
+            return None
+        self.stats["loads"] += 1
+        self._store(rel_path, signature, entry)
+        return entry
+
+    def _store(self, rel_path: str, signature: Tuple[int, int], entry: CachedBody):
+        old = self._entries.pop(rel_path, None)
+        if old is not None:
+            self._size -= old[2]
+        # 처음 요청 시 만드는 압축본(원본보다 작음)을 위해 원본 크기만큼 더 잡아 둠
+        accounted = entry.size + len(entry.body)
+        self._entries[rel_path] = (signature, entry, accounted)
+        self._size += accounted
+        while self._entries and self._size > settings.STATIC_CACHE_MAX_BYTES:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            self.stats["evictions"] += 1
+
+    async def response(self, request: Request, rel_path: str, cache_control: Optional[str] = None) -> Response:
+        """파일 응답 (없으면 404), cache_control 미지정 시 해시 자산은 영구 캐시, 나머지는 매번 재검증"""
+        entry = await self.get(rel_path)
+        if entry is None:
+            path = await asyncio.to_thread(self.resolve, rel_path)
+            if path is None:
+                return Response(status_code=404)
+            return FileResponse(path, headers={"cache-control": cache_control or settings.STATIC_CACHE_CONTROL})
+        if cache_control is None:
+            cache_control = (IMMUTABLE_CACHE_CONTROL if self.is_immutable(rel_path, request, entry)
+                             else settings.STATIC_CACHE_CONTROL)
+        response = await entry.response(request, cache_control)
+        if response.status_code == 304:
+            self.stats["not_modified"] += 1
+        return response
+
+    @staticmethod
+    def is_immutable(rel_path: str, request: Request, entry: CachedBody) -> bool:
+        """파일명 해시 또는 ?v=<콘텐츠 해시>로 요청된 자산"""
+        if _HASHED_NAME.search(rel_path):
+            return True
+        version = request.query_params.get("v", "")
+        return len(version) >= 8 and entry.etag.strip('"').startswith(version)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries), "bytes": self._size}
+
+
+class PageCache:
+    """서버에서 만드는 HTML 페이지 캐시
+
+    키(서비스 id + 관리자 여부 등 화면 분기)마다 하나를 보관하고, 만들 때 사용한 객체(ServiceInfo, ServiceStatus)가
+    그대로일 때만 재사용한다. 설정 재로드나 헬스체크로 객체가 바뀌면 다음 요청에서 다시 만든다.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or settings.PAGE_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[Any, ...], CachedBody]]" = OrderedDict()
+        self.stats = {"hits": 0, "renders": 0}
+
+    def get(self, key: Hashable, *deps: Any) -> Optional[CachedBody]:
+        cached = self._entries.get(key)
+        if cached is None or len(cached[0]) != len(deps) or any(a is not b for a, b in zip(cached[0], deps)):
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return cached[1]
+
+    def put(self, key: Hashable, html: str, *deps: Any) -> CachedBody:
+        entry = CachedBody(html.encode("utf-8"), "text/html; charset=utf-8")
+        self._entries[key] = (deps, entry)
+        self._entries.move_to_end(key)
+        self.stats["renders"] += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries)}
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # 약한 비교 (W/ 접두어 무시)
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return etag in tags
+
+
+def _content_type(path: Path) -> str:
+    content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+def _read_precompressed(path: Path, mtime_ns: int) -> Dict[str, bytes]:
+    """원본보다 새로운 name.br / name.gz 읽기 (오래된 사전 압축본은 무시)"""
+    encoded = {}
+    for encoding, suffix in _PRECOMPRESSED.items():
+        candidate = path.with_name(path.name + suffix)
+        try:
+            if candidate.stat().st_mtime_ns >= mtime_ns:
+                encoded[encoding] = candidate.read_bytes()
+        except OSError:
+            continue
+    return encoded
+
+
+def precompress(directory: Path) -> int:
+    """빌드 시 사전 압축: 압축 가능한 파일마다 최고 압축률의 .gz / .br 생성 (생성한 파일 수)"""
+    written = 0
+    for path in sorted(directory.rglob("*")):
+        if (not path.is_file() or path.suffix in (".gz", ".br") or
+                path.stat().st_size < settings.STATIC_COMPRESS_MIN_BYTES or
+                not is_compressible(mimetypes.guess_type(path.name)[0])):
+            continue
+        data = path.read_bytes()
+        for encoding in supported_encodings():
+            level = 11 if encoding == "br" else 9
+            compressed = compress(data, encoding, level)
+            if len(compressed) < len(data):
+                path.with_name(path.name + _PRECOMPRESSED[encoding]).write_bytes(compressed)
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    import sys
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parent.parent / "static"
+    logging.basicConfig(level=logging.INFO)
+    logger.info(f"사전 압축 완료: {target} ({precompress(target)}개 파일)")
@@ -0,0 +1,96 @@
+"""서비스 상태 변경 SSE 브로드캐스트"""
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, Optional, Set
+from app.models import ServiceStatus
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class StatusSubscription:
+    """구독자 하나 - 서비스별 최신 상태만 보관하므로 느린 클라이언트도 서비스 수 이상 쌓이지 않음"""
+
+    def __init__(self):
+        self._pending: Dict[str, bytes] = {}
+        self._wakeup = asyncio.Event()
+        self.closed = False
+
+    def push(self, service_id: str, payload: bytes):
+        # 아직 못 보낸 이전 상태는 덮어씀 (중간 상태는 버리고 최신만 전달)
+        self._pending[service_id] = payload
+        self._wakeup.set()
+
+    def close(self):
+        self.closed = True
+        self._wakeup.set()
+
+    async def next_batch(self, timeout: float) -> Optional[Dict[str, bytes]]:
+        """대기 중인 상태 변경 반환 (timeout 동안 없으면 None)"""
+        if not self._pending and not self.closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+        self._wakeup.clear()
+        batch, self._pending = self._pending, {}
+        return batch
+
+
+class StatusBroadcaster:
+    """HealthChecker 상태 변경 → 다수 SSE 구독자 팬아웃
+
+    상태는 변경 시 한 번만 직렬화해 모든 구독자가 같은 바이트를 공유한다.
+    동시 구독자 수는 HEALTH_STREAM_MAX_CLIENTS로 제한한다.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[StatusSubscription] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, status: ServiceStatus):
+        if not self._subscribers:
+            return
+        payload = _encode(status)
+        for subscription in self._subscribers:
+            subscription.push(status.service_id, payload)
+
+    def subscribe(self, current: Dict[str, ServiceStatus]) -> Optional[StatusSubscription]:
+        """구독 시작 (current 상태 전체를 첫 배치로 받음), 구독자 상한 초과 시 None"""
+        if len(self._subscribers) >= settings.HEALTH_STREAM_MAX_CLIENTS:
+            return None
+        subscription = StatusSubscription()
+        for service_id, status in current.items():
+            subscription.push(service_id, _encode(status))
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: StatusSubscription):
+        self._subscribers.discard(subscription)
+
+    def close(self):
+        """앱 종료 시 열린 스트림 모두 종료"""
+        for subscription in list(self._subscribers):
+            subscription.close()
+        self._subscribers.clear()
+
+    async def stream(self, subscription: StatusSubscription) -> AsyncIterator[bytes]:
+        """SSE 이벤트 스트림 (status 이벤트, 변경 없으면 keep-alive 주석)"""
+        try:
+            yield b"retry: 5000\n\n"
+            while not subscription.closed:
+                batch = await subscription.next_batch(settings.HEALTH_STREAM_HEARTBEAT)
+                if batch is None:
+                    yield b": keep-alive\n\n"
+                    continue
+                if batch:
+                    yield b"".join(b"event: status\ndata: " + payload + b"\n\n" for payload in batch.values())
+        finally:
+            self.unsubscribe(subscription)
+
+
+def _encode(status: ServiceStatus) -> bytes:
+    return status.model_dump_json().encode("utf-8")
@@ -0,0 +1,235 @@
+"""업스트림 HTTP 클라이언트 풀"""
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set
+import httpx
+from app.models import ServiceInfo
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2는 h2 패키지(httpx[http2])가 있을 때만 사용
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class UpstreamClientPool:
+    """서비스별 장기 유지 httpx.AsyncClient 풀 (keep-alive, HTTP/2)
+
+    요청마다 AsyncClient를 새로 만들면 매번 TCP 연결(및 TLS 핸드셰이크)을 다시 맺으므로,
+    서비스마다 클라이언트 하나를 만들어 두고 앱 lifespan 동안 재사용한다.
+    풀 크기는 services.json metadata로 서비스별 지정 가능:
+    pool_max_connections, pool_max_keepalive, pool_keepalive_expiry, http2
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[httpx.AsyncClient, "CountingTransport"] = {}
+        self._draining: Set[asyncio.Task] = set()
+
+    def get_client(self, service: ServiceInfo) -> httpx.AsyncClient:
+        """서비스 전용 클라이언트 반환 (없으면 생성)"""
+        client = self._clients.get(service.id)
+        if client is None or client.is_closed:
+            if client is not None:
+                self._transports.pop(client, None)
+            client = self._build_client(service)
+            self._clients[service.id] = client
+        return client
+
+    def _build_client(self, service: ServiceInfo) -> httpx.AsyncClient:
+        meta = service.metadata or {}
+        limits = httpx.Limits(
+            max_connections=meta.get("pool_max_connections", settings.PROXY_POOL_MAX_CONNECTIONS),
+            max_keepalive_connections=meta.get("pool_max_keepalive", settings.PROXY_POOL_MAX_KEEPALIVE),
+            keepalive_expiry=meta.get("pool_keepalive_expiry", settings.PROXY_POOL_KEEPALIVE_EXPIRY),
+        )
+        proxy_timeout = meta.get("proxy_timeout")
+        if proxy_timeout is None:
+            proxy_timeout = settings.PROXY_TIMEOUT
+        http2 = bool(meta.get("http2", settings.PROXY_HTTP2))
+        if http2 and not HTTP2_AVAILABLE:
+            logger.debug(f"HTTP/2 미지원 (h2 미설치): {service.id} → HTTP/1.1 사용")
+            http2 = False
+        logger.info(
+            f"업스트림 풀 생성: {service.id} (max={limits.max_connections}, "
+            f"keepalive={limits.max_keepalive_connections}, http2={http2})"
+        )
+        transport = CountingTransport(httpx.AsyncHTTPTransport(limits=limits, http2=http2), limits, http2)
+        client = httpx.AsyncClient(
+            transport=transport,
+            timeout=proxy_timeout,
+            follow_redirects=settings.PROXY_FOLLOW_REDIRECTS,
+        )
+        self._transports[client] = transport
+        return client
+
+    async def close_client(self, service_id: str):
+        """특정 서비스 클라이언트 종료"""
+        client = self._clients.pop(service_id, None)
+        if client is not None:
+            self._transports.pop(client, None)
+            await client.aclose()
+
+    def retire_client(self, service_id: str):
+        """서비스 설정 변경/제거 시 클라이언트 교체
+
+        새 요청은 바로 새 클라이언트를 쓰고, 기존 클라이언트는 진행 중인 요청(스트리밍 응답 포함)이
+        모두 끝나거나 SERVICES_RELOAD_DRAIN_TIMEOUT이 지나면 닫는다.
+        """
+        client = self._clients.pop(service_id, None)
+        if client is None or client.is_closed:
+            return
+        task = asyncio.create_task(self._drain_and_close(service_id, client))
+        self._draining.add(task)
+        task.add_done_callback(self._draining.discard)
+
+    async def _drain_and_close(self, service_id: str, client: httpx.AsyncClient):
+        transport = self._transports.pop(client, None)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.SERVICES_RELOAD_DRAIN_TIMEOUT
+        try:
+            while transport is not None and transport.in_flight and loop.time() < deadline:
+                await asyncio.sleep(0.2)
+            busy = transport.in_flight if transport is not None else 0
+            if busy:
+                logger.warning(f"업스트림 풀 드레인 시간 초과: {service_id} (진행 중 {busy}개 강제 종료)")
+            else:
+                logger.info(f"업스트림 풀 드레인 완료: {service_id}")
+        finally:
+            await client.aclose()
+
+    async def aclose(self):
+        """전체 클라이언트 종료 (앱 종료 시)"""
+        for task in list(self._draining):
+            task.cancel()
+        await asyncio.gather(*self._draining, return_exceptions=True)
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._transports.clear()
+        await asyncio.gather(*(c.aclose() for c in clients), return_exceptions=True)
+        if clients:
+            logger.info(f"업스트림 풀 {len(clients)}개 종료")
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """서비스별 풀 상태 (사용 중/유휴 연결 수, 연결 대기 요청 수, 진행 중 요청 수, 설정된 한도)"""
+        stats: Dict[str, Dict[str, Any]] = {}
+        for service_id, client in self._clients.items():
+            transport = self._transports.get(client)
+            if transport is not None:
+                stats[service_id] = transport.get_stats()
+        return stats
+
+    @property
+    def draining_count(self) -> int:
+        """설정 변경으로 교체되어 진행 중 요청을 기다리는 클라이언트 수"""
+        return len(self._draining)
+
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """진행 중 요청 수를 직접 세는 전송 계층
+
+    응답 헤더를 받은 뒤에도 본문 스트림을 닫을 때까지 진행 중으로 본다(스트리밍 응답 드레인용).
+    진행 중/대기 요청 수는 직접 세므로 httpx/httpcore 버전에 영향받지 않고,
+    연결별 사용 중/유휴 수는 httpcore 풀의 공개 connections 목록으로 읽는다(없으면 None).
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limits: httpx.Limits, http2: bool):
+        self._transport = transport
+        self.limits = limits
+        self.http2 = http2
+        self.in_flight = 0
+        self.requests_total = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight += 1
+        self.requests_total += 1
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self.in_flight -= 1
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_CountedStream(response.stream, self._finished),
+            extensions=response.extensions,
+        )
+
+    def _finished(self):
+        self.in_flight -= 1
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+    def connection_stats(self) -> Dict[str, Optional[int]]:
+        """연결 상태별 개수 + 연결을 기다리는 요청 수
+
+        HTTP/1.1 연결은 한 번에 요청 하나만 처리하므로 max_connections를 넘는 진행 중 요청이 연결 대기다.
+        HTTP/2 연결(요청 다중화)이 있으면 대기 수를 알 수 없으므로 None.
+        연결 수는 httpcore 풀의 공개 connections 목록으로 세고, 풀에 접근할 수 없는 버전이면 None.
+        """
+        in_use = idle = None
+        multiplexed = self.http2
+        # httpx.AsyncHTTPTransport는 httpcore 풀을 공개 속성으로 노출하지 않음 → 없으면 건너뜀
+        connections = getattr(getattr(self._transport, "_pool", None), "connections", None)
+        if connections is not None:
+            try:
+                in_use = idle = 0
+                multiplexed = False
+                for conn in connections:
+                    if conn.is_closed():
+                        continue
+                    if conn.is_idle():
+                        idle += 1
+                    else:
+                        in_use += 1
+                    multiplexed = multiplexed or "HTTP/2" in conn.info()
+            except (AttributeError, TypeError):
+                in_use = idle = None
+                multiplexed = self.http2
+        waiting: Optional[int] = None
+        if not multiplexed:
+            limit = self.limits.max_connections
+            waiting = max(0, self.in_flight - limit) if limit is not None else 0
+        return {
+            "connections": None if in_use is None else in_use + idle,
+            "in_use": in_use,
+            "idle": idle,
+            "waiting": waiting,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.connection_stats(),
+            "in_flight": self.in_flight,
+            "requests_total": self.requests_total,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "http2": self.http2,
+        }
+
+
+class _CountedStream(httpx.AsyncByteStream):
+    """응답 본문 스트림을 닫을 때(한 번만) on_close 호출"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], None]):
+        self._stream = stream
+        self._on_close: Optional[Callable[[], None]] = on_close
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close is not None:
+                on_close()
@@ -0,0 +1 @@
+"""eai-hub 부하 테스트 / 벤치마크 (python -m bench.run)"""
@@ -0,0 +1,550 @@
+"""eai-hub 게이트웨이 부하 테스트 / 벤치마크
+
+스텁 업스트림(bench.stub_upstream)을 별도 프로세스로 띄우고, 같은 설정을 두 대상에 보낸다.
+
+- router: ProxyRouter.route()를 직접 호출하고 응답을 ASGI send로 끝까지 소비 (프록시 코어만)
+- app:    main.app 전체 (미들웨어·라우팅·lifespan 포함)를 httpx.ASGITransport로 호출
+
+사용 예 (eai-hub 디렉터리에서):
+
+    python -m bench.run                              # 전체 시나리오 × 두 대상
+    python -m bench.run -s fast,html -t app -c 50 -d 10
+    python -m bench.run --save-baseline local        # bench/baselines/local.json 저장
+    python -m bench.run --compare local              # 기준 대비 회귀가 있으면 종료 코드 1
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_DIR = Path(__file__).resolve().parent
+HUB_DIR = BENCH_DIR.parent
+BASELINE_DIR = BENCH_DIR / "baselines"
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """시나리오 하나 = 전용 서비스(bench-{name}) 하나"""
+    name: str
+    method: str
+    path: str
+    description: str
+    expect_status: int = 200
+    body_kb: int = 0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    # True면 병합을 끄지 않고 운영 기본 설정 그대로 측정
+    default_config: bool = False
+
+    @property
+    def service_id(self) -> str:
+        return f"bench-{self.name}"
+
+
+SCENARIOS: Dict[str, Scenario] = {s.name: s for s in (
+    Scenario("fast", "GET", "json", "작은 JSON (약 2KB)"),
+    Scenario("slow", "GET", "slow?ms=50", "업스트림 50ms 지연"),
+    Scenario("large", "GET", "large?kb=1024", "1MB 바이너리 스트리밍 응답"),
+    Scenario("upload", "POST", "echo", "256KB 요청 본문 업로드", body_kb=256),
+    # 서킷이 열리면 업스트림을 거치지 않으므로 오류 응답 전달 비용만 측정
+    Scenario("error", "GET", "error", "업스트림 500 응답", expect_status=500,
+             metadata={"circuit_breaker": False}),
+    Scenario("html", "GET", "page?kb=64", "64KB HTML 절대 경로 교체 (스트리밍)"),
+    # 운영 기본 경로: 동일 요청 병합(PROXY_COALESCE) 포함
+    Scenario("fast-default", "GET", "json", "작은 JSON, 기본 설정", default_config=True),
+    Scenario("slow-default", "GET", "slow?ms=50", "업스트림 50ms 지연, 기본 설정", default_config=True),
+)}
+
+# 기준 대비 비교 지표: (키, 높을수록 나쁨) - shared_pct는 병합 시나리오에서 선행 응답을 공유받은 요청 비율
+_COMPARED = (("rps", False), ("p50_ms", True), ("p95_ms", True), ("p99_ms", True), ("rss_peak_mb", True),
+             ("shared_pct", False))
+# 지연 변화가 이 값(ms) 미만이면 비율과 관계없이 잡음으로 봄
+_LATENCY_FLOOR_MS = 1.0
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _write_services(path: Path, port: int, scenarios: List[Scenario]):
+    """시나리오별 서비스 설정 (default_config가 아니면 병합 요청만 끄고 나머지는 기본 설정 그대로)"""
+    services = []
+    for s in scenarios:
+        services.append({
+            "id": s.service_id,
+            "name": f"Bench {s.name}",
+            "description": s.description,
+            "type": "microservice",
+            "enabled": True,
+            "metadata": {
+                "host": "127.0.0.1",
+                "port": port,
+                "health_path": "/health",
+                # 같은 요청을 반복하므로 병합하면 업스트림 왕복을 측정하지 못함
+                **({} if s.default_config else {"coalesce": False}),
+                **s.metadata,
+            },
+        })
+    path.write_text(json.dumps({"services": services}, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+class StubUpstream:
+    """bench.stub_upstream을 uvicorn 별도 프로세스로 실행 (허브와 CPU/메모리 측정이 섞이지 않도록)"""
+
+    def __init__(self, workers: int = 1):
+        self.port = _free_port()
+        self.workers = workers
+        self._process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "StubUpstream":
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "bench.stub_upstream:app",
+             "--host", "127.0.0.1", "--port", str(self.port), "--workers", str(self.workers),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=HUB_DIR,
+        )
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"스텁 업스트림이 종료되었습니다 (코드 {self._process.returncode})")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.2):
+                    return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError("스텁 업스트림이 시작되지 않았습니다")
+
+    def __exit__(self, *exc):
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        self._process = None
+
+
+class _BodySink:
+    """ASGI send 대상 (응답 상태/본문 크기만 기록)"""
+
+    __slots__ = ("status", "size")
+
+    def __init__(self):
+        self.status = 0
+        self.size = 0
+
+    async def __call__(self, message: Dict[str, Any]):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        elif message["type"] == "http.response.body":
+            self.size += len(message.get("body", b""))
+
+
+class RouterTarget:
+    """ProxyRouter 직접 호출 (라우팅 전 FastAPI/미들웨어 비용 제외)"""
+
+    name = "router"
+
+    async def __aenter__(self) -> "RouterTarget":
+        from app.service_registry import ServiceRegistry
+        from app.upstream_pool import UpstreamClientPool
+        from app.address_resolver import AddressResolver
+        from app.proxy import ProxyRouter
+
+        self.registry = ServiceRegistry()
+        await self.registry.load_services()
+        self.pool = UpstreamClientPool()
+        self.resolver = AddressResolver()
+        self.router = ProxyRouter(self.registry, self.pool, self.resolver)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.pool.aclose()
+        await self.resolver.aclose()
+
+    async def request(self, scenario: Scenario, body: bytes, headers: Dict[str, str]) -> Tuple[int, int]:
+        from fastapi import HTTPException, Request
+
+        path, _, query = scenario.path.partition("?")
+        full_path = f"/api/{scenario.service_id}/{path}"
+        raw_headers = [(b"host", b"bench.local")]
+        raw_headers += [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+        if body:
+            raw_headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": scenario.method,
+            "scheme": "http",
+            "server": ("bench.local", 80),
+            "client": ("127.0.0.1", 50000),
+            "root_path": "",
+            "path": full_path,
+            "raw_path": full_path.encode("latin-1"),
+            "query_string": query.encode("latin-1"),
+            "headers": raw_headers,
+        }
+        sent = False
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # 응답 전송 중 연결 끊김 감시(StreamingResponse)는 끝날 때까지 대기
+            await asyncio.Event().wait()
+
+        try:
+            response = await self.router.route(scenario.service_id, path, Request(scope, receive))
+        except HTTPException as e:
+            return e.status_code, 0
+        sink = _BodySink()
+        await response(scope, receive, sink)
+        return sink.status, sink.size
+
+
+class AppTarget:
+    """main.app 전체를 in-process ASGI로 호출 (lifespan 포함, 응답 본문은 transport가 모두 읽음)"""
+
+    name = "app"
+
+    async def __aenter__(self) -> "AppTarget":
+        import httpx
+        import main
+
+        self._lifespan = main.app.router.lifespan_context(main.app)
+        await self._lifespan.__aenter__()
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=main.app), base_url="http://bench.local", timeout=None
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+        await self._lifespan.__aexit__(None, None, None)
+
+    async def request(self, scenario: Scenario, body: bytes, headers: Dict[str, str]) -> Tuple[int, int]:
+        response = await self.client.request(
+            scenario.method, f"/api/{scenario.service_id}/{scenario.path}", content=body or None, headers=headers
+        )
+        return response.status_code, len(response.content)
+
+
+TARGETS = {"router": RouterTarget, "app": AppTarget}
+
+
+class MemorySampler:
+    """부하 중 프로세스 RSS 최댓값 (Linux /proc, 그 외는 getrusage 최대치)"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def rss_bytes() -> Optional[int]:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            pass
+        if resource is not None:
+            # ru_maxrss: Linux는 KB, macOS는 바이트 (현재값이 아닌 최대치)
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maxrss if sys.platform == "darwin" else maxrss * 1024
+        return None
+
+    async def _run(self):
+        while True:
+            self.peak = max(self.peak, self.rss_bytes() or 0)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.peak = self.rss_bytes() or 0
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> Optional[int]:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        current = self.rss_bytes()
+        if current is None:
+            return None
+        return max(self.peak, current)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """nearest-rank 백분위수"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), int(round(pct / 100 * len(sorted_values) + 0.5))))
+    return sorted_values[rank - 1]
+
+
+async def _drive(target, scenario: Scenario, concurrency: int, duration: float, max_requests: int,
+                 headers: Dict[str, str]) -> Dict[str, Any]:
+    """동시 concurrency개 작업자가 쉬지 않고 요청 (closed loop), duration초 또는 max_requests건까지"""
+    body = b"x" * (scenario.body_kb * 1024)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    received = 0
+    issued = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal received, issued
+        while time.perf_counter() < deadline and (not max_requests or issued < max_requests):
+            issued += 1
+            started = time.perf_counter()
+            try:
+                status, size = await target.request(scenario, body, headers)
+            except Exception as e:
+                status, size = type(e).__name__, 0
+            latencies.append(time.perf_counter() - started)
+            statuses[status] += 1
+            received += size
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": count - statuses.get(scenario.expect_status, 0),
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(_percentile(ms, 50), 3),
+        "p95_ms": round(_percentile(ms, 95), 3),
+        "p99_ms": round(_percentile(ms, 99), 3),
+        "max_ms": round(ms[-1], 3) if ms else 0.0,
+        "mb_received": round(received / 1024 / 1024, 2),
+    }
+
+
+async def run_benchmarks(args: argparse.Namespace, scenarios: List[Scenario]) -> Dict[str, Dict[str, Any]]:
+    headers = {"accept-encoding": args.accept_encoding} if args.accept_encoding else {}
+    results: Dict[str, Dict[str, Any]] = {}
+    for target_name in args.targets:
+        async with TARGETS[target_name]() as target:
+            for scenario in scenarios:
+                key = f"{target_name}/{scenario.name}"
+                if args.warmup > 0:
+                    await _drive(target, scenario, args.concurrency, args.warmup, 0, headers)
+                if args.tracemalloc:
+                    tracemalloc.reset_peak()
+                sampler = MemorySampler()
+                sampler.start()
+                shared_before = _coalesced_count(scenario)
+                result = await _drive(target, scenario, args.concurrency, args.duration, args.requests, headers)
+                peak = await sampler.stop()
+                # 압축(Accept-Encoding) 요청도 대기자가 선행 응답을 실제로 공유했는지 (업스트림 호출 생략 비율)
+                shared = _coalesced_count(scenario) - shared_before
+                result["shared"] = int(shared)
+                result["shared_pct"] = round(shared / result["requests"] * 100, 1) if result["requests"] else 0.0
+                result["rss_peak_mb"] = round(peak / 1024 / 1024, 1) if peak is not None else None
+                if args.tracemalloc:
+                    result["heap_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+                results[key] = result
+                _print_result(key, result)
+    return results
+
+
+def _coalesced_count(scenario: Scenario) -> float:
+    """허브 메트릭 eai_hub_proxy_coalesced_total (두 대상 모두 같은 프로세스에서 실행)"""
+    from prometheus_client import REGISTRY
+
+    return REGISTRY.get_sample_value("eai_hub_proxy_coalesced_total", {"service": scenario.service_id}) or 0.0
+
+
+def _display_width(text: str) -> int:
+    """한글(전각) 폭을 2칸으로 계산한 표시 폭"""
+    return sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+
+
+def _rjust(text: str, width: int) -> str:
+    return " " * max(0, width - _display_width(text)) + text
+
+
+def _ljust(text: str, width: int) -> str:
+    return text + " " * max(0, width - _display_width(text))
+
+
+def _print_header():
+    columns = ["요청", "오류", "RPS", "p50 ms", "p95 ms", "p99 ms", "RSS MB", "공유 %"]
+    widths = [8, 6, 9, 9, 9, 9, 8, 7]
+    print(_ljust("대상/시나리오", 20) + " ".join(_rjust(c, w) for c, w in zip(columns, widths)))
+
+
+def _print_result(key: str, r: Dict[str, Any]):
+    rss = "-" if r.get("rss_peak_mb") is None else f"{r['rss_peak_mb']:.1f}"
+    shared = f"{r['shared_pct']:.1f}" if r.get("shared") else "-"
+    print(f"{key:<20}{r['requests']:>8} {r['errors']:>6} {r['rps']:>9.1f} "
+          f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {rss:>8} {shared:>7}", flush=True)
+    if r["errors"]:
+        print(f"  응답 코드: {r['statuses']}", flush=True)
+
+
+def _options(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "requests": args.requests,
+        "accept_encoding": args.accept_encoding,
+    }
+
+
+def _baseline_path(name: str) -> Path:
+    path = Path(name)
+    if path.suffix == ".json" or path.parent != Path("."):
+        return path
+    return BASELINE_DIR / f"{name}.json"
+
+
+def save_baseline(name: str, args: argparse.Namespace, results: Dict[str, Dict[str, Any]]) -> Path:
+    """기존 기준 파일이 있으면 이번에 측정한 항목만 덮어씀"""
+    path = _baseline_path(name)
+    data = {"results": {}}
+    if path.exists():
+        data = json.loads(path.read_text(encoding="utf-8"))
+    data.update({
+        "updated": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": _options(args),
+    })
+    data.setdefault("results", {}).update(results)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def compare_baseline(name: str, args: argparse.Namespace, results: Dict[str, Dict[str, Any]],
+                     tolerance: float) -> List[str]:
+    """기준 대비 tolerance 비율 이상 나빠진 지표 목록"""
+    path = _baseline_path(name)
+    baseline = json.loads(path.read_text(encoding="utf-8"))
+    if baseline.get("options") != _options(args):
+        print(f"\n주의: 기준 측정 조건이 다릅니다 (기준 {baseline.get('options')}, 현재 {_options(args)})")
+    regressions = []
+    print(f"\n기준 비교 ({path}, 허용 {tolerance:.0%})")
+    for key, current in results.items():
+        base = baseline.get("results", {}).get(key)
+        if base is None:
+            print(f"  {key}: 기준 없음")
+            continue
+        changes = []
+        for metric, higher_is_worse in _COMPARED:
+            old, new = base.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            ratio = (new - old) / old
+            worse = ratio > tolerance if higher_is_worse else ratio < -tolerance
+            if worse and metric.endswith("_ms") and new - old < _LATENCY_FLOOR_MS:
+                worse = False
+            if worse:
+                regressions.append(f"{key} {metric}: {old} → {new} ({ratio:+.0%})")
+            changes.append(f"{metric} {ratio:+.0%}{' !' if worse else ''}")
+        if current["errors"] > base.get("errors", 0):
+            regressions.append(f"{key} errors: {base.get('errors', 0)} → {current['errors']}")
+        print(f"  {key}: {', '.join(changes)}")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="eai-hub 게이트웨이 부하 테스트 / 벤치마크")
+    parser.add_argument("-s", "--scenarios", default=",".join(SCENARIOS),
+                        help=f"쉼표 구분 ({', '.join(SCENARIOS)})")
+    parser.add_argument("-t", "--targets", default="router,app", help="쉼표 구분 (router, app)")
+    parser.add_argument("-c", "--concurrency", type=int, default=32, help="동시 요청 수")
+    parser.add_argument("-d", "--duration", type=float, default=5.0, help="시나리오별 측정 시간 (초)")
+    parser.add_argument("-n", "--requests", type=int, default=0, help="시나리오별 최대 요청 수 (0: 시간으로만 제한)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="측정 전 예열 시간 (초, 결과에서 제외)")
+    parser.add_argument("--accept-encoding", default="gzip, br", help="요청 Accept-Encoding (빈 값이면 보내지 않음)")
+    parser.add_argument("--upstream-workers", type=int, default=1, help="스텁 업스트림 uvicorn 워커 수")
+    parser.add_argument("--tracemalloc", action="store_true", help="Python 힙 최대 사용량도 측정 (느려짐)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--save-baseline", metavar="NAME", help="결과를 bench/baselines/NAME.json 기준으로 저장")
+    parser.add_argument("--compare", metavar="NAME", help="bench/baselines/NAME.json 기준과 비교")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="회귀로 볼 악화 비율 (기본 0.15)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="허브 로그 출력")
+    args = parser.parse_args(argv)
+    args.targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = [t for t in args.targets if t not in TARGETS]
+    if unknown:
+        parser.error(f"알 수 없는 대상: {', '.join(unknown)}")
+    names = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in names if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"알 수 없는 시나리오: {', '.join(unknown)}")
+    args.scenario_list = [SCENARIOS[s] for s in names]
+    if args.concurrency < 1:
+        parser.error("--concurrency는 1 이상이어야 합니다")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    with tempfile.TemporaryDirectory(prefix="eai-hub-bench-") as tmp, StubUpstream(args.upstream_workers) as stub:
+        services_path = Path(tmp) / "services.json"
+        _write_services(services_path, stub.port, args.scenario_list)
+        # app.config 로드 전에 설정 (그 외 설정은 .env / 환경 변수 그대로 사용)
+        os.environ["SERVICES_CONFIG_PATH"] = str(services_path)
+        os.environ["SERVICES_RELOAD_INTERVAL"] = "0"
+        if str(HUB_DIR) not in sys.path:
+            sys.path.insert(0, str(HUB_DIR))
+
+        print(f"스텁 업스트림 127.0.0.1:{stub.port}, 동시 {args.concurrency}, "
+              f"시나리오당 {args.duration:g}초" + (f" / 최대 {args.requests}건" if args.requests else ""))
+        _print_header()
+        results = asyncio.run(run_benchmarks(args, args.scenario_list))
+
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps({"options": _options(args), "results": results}, ensure_ascii=False, indent=2) + "\n",
+            encoding="utf-8",
+        )
+    if args.save_baseline:
+        print(f"\n기준 저장: {save_baseline(args.save_baseline, args, results)}")
+    if args.compare:
+        regressions = compare_baseline(args.compare, args, results, args.tolerance)
+        if regressions:
+            print("\n회귀 감지:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\n회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
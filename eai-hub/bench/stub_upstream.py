@@ -0,0 +1,99 @@
+"""벤치마크용 업스트림 스텁 (허브 없이 별도 프로세스로 실행)
+
+    python -m uvicorn bench.stub_upstream:app --port 9950
+"""
+import asyncio
+import json
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+
+_CHUNK = 64 * 1024
+_CHUNK_BYTES = bytes(range(256)) * (_CHUNK // 256)
+
+# 작은 JSON (압축 대상 크기 이상, 약 2KB)
+_JSON_BODY = json.dumps({
+    "status": "ok",
+    "items": [{"id": i, "name": f"item-{i}", "tags": ["bench", "stub"]} for i in range(40)],
+}).encode("utf-8")
+
+# 절대 경로 링크가 많은 HTML 조각 (프록시 경로 교체 대상)
+_HTML_HEAD = b"<!doctype html><html><head><link rel=\"stylesheet\" href=\"/style.css\"></head><body>\n"
+_HTML_ROW = (
+    b"<div class=\"row\"><a href=\"/detail/1\">detail</a> <img src=\"/img/a.png\" alt=\"\">"
+    b"<form action=\"/submit\"></form> <a href=\"https://example.com/x\">ext</a></div>\n"
+)
+_HTML_TAIL = b"</body></html>\n"
+
+
+def _kb(value: str, default: int) -> int:
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return default
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/json")
+async def small_json():
+    return Response(_JSON_BODY, media_type="application/json")
+
+
+@app.get("/slow")
+async def slow(request: Request):
+    """ms 밀리초 지연 후 응답 (업스트림 처리 시간 흉내)"""
+    await asyncio.sleep(_kb(request.query_params.get("ms"), 50) / 1000)
+    return Response(_JSON_BODY, media_type="application/json")
+
+
+@app.get("/large")
+async def large(request: Request):
+    """kb 킬로바이트 바이너리 스트리밍 (content-length 없음)"""
+    remaining = _kb(request.query_params.get("kb"), 1024) * 1024
+
+    async def body():
+        nonlocal remaining
+        while remaining > 0:
+            n = min(remaining, _CHUNK)
+            remaining -= n
+            yield _CHUNK_BYTES[:n]
+
+    return StreamingResponse(body(), media_type="application/octet-stream")
+
+
+@app.post("/echo")
+async def echo(request: Request):
+    """요청 본문 크기만 응답 (대용량 업로드)"""
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+    return {"bytes": size}
+
+
+@app.get("/error")
+async def error():
+    return JSONResponse({"detail": "stub error"}, status_code=500)
+
+
+@app.get("/page")
+async def page(request: Request):
+    """kb 킬로바이트 HTML (청크 스트리밍, 프록시에서 절대 경로 교체)"""
+    rows = max(1, _kb(request.query_params.get("kb"), 64) * 1024 // len(_HTML_ROW))
+
+    async def body():
+        yield _HTML_HEAD
+        batch = _HTML_ROW * (_CHUNK // len(_HTML_ROW))
+        per_batch = _CHUNK // len(_HTML_ROW)
+        left = rows
+        while left > 0:
+            n = min(left, per_batch)
+            left -= n
+            yield batch if n == per_batch else _HTML_ROW * n
+        yield _HTML_TAIL
+
+    return StreamingResponse(body(), media_type="text/html; charset=utf-8")
@@ -4,14 +4,14 @@ EAI Hub - Enterprise Application Integration Hub
 """
 from fastapi import FastAPI, HTTPException, Request, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse, FileResponse, StreamingResponse, Response
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from contextlib import asynccontextmanager
 import httpx
 import asyncio
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 from pathlib import Path
 import secrets
@@ -21,8 +21,19 @@ from app.config import settings
 from app.models import ServiceInfo, ServiceStatus, HealthCheckResponse
 from app.service_registry import ServiceRegistry
 from app.proxy import ProxyRouter
+from app.upstream_pool import UpstreamClientPool
+from app.address_resolver import AddressResolver
+from app.circuit_breaker import CircuitBreakerRegistry
+from app.load_balancer import LoadBalancer
+from app.response_cache import ResponseCache
+from app.admission import AdmissionController
+from app.service_reloader import ServiceReloader
 from app.health_checker import HealthChecker
-from app.access_logger import log_dashboard_access
+from app.status_stream import StatusBroadcaster
+from app.metrics import MetricsMiddleware
+from app.session_store import create_session_store
+from app.access_logger import access_log_writer, log_dashboard_access
+from app.static_assets import PageCache, StaticAssetCache
 
 # 로깅 설정
 logging.basicConfig(
@@ -33,49 +44,61 @@ logger = logging.getLogger(__name__)
 
 # 서비스 레지스트리 및 헬스체커 초기화
 service_registry = ServiceRegistry()
-health_checker = HealthChecker(service_registry)
-proxy_router = ProxyRouter(service_registry)
+# 루프백 주소 학습 캐시는 헬스체크·프록시·접속 확인이 공유
+address_resolver = AddressResolver()
+# 서킷 브레이커는 프록시 결과와 헬스체크 결과를 함께 반영
+circuit_breakers = CircuitBreakerRegistry()
+# 다중 인스턴스 선택은 헬스체크 결과로 비정상 인스턴스를 건너뜀
+load_balancer = LoadBalancer()
+# 상태 변경은 헬스체커 하나가 발행하고 SSE 구독자들에게 팬아웃
+status_broadcaster = StatusBroadcaster()
+health_checker = HealthChecker(
+    service_registry, address_resolver, circuit_breakers, load_balancer, status_broadcaster
+)
+upstream_pool = UpstreamClientPool()
+response_cache = ResponseCache()
+# 서비스별 동시 요청 상한 + 대기열 (느린 백엔드가 워커를 독점하지 않도록)
+admission_controller = AdmissionController()
+proxy_router = ProxyRouter(
+    service_registry, upstream_pool, address_resolver, circuit_breakers, load_balancer, response_cache,
+    admission_controller
+)
+# services.json 변경 시 바뀐 서비스만 교체 (나머지 서비스의 연결 풀/헬스체크 스케줄 유지)
+service_reloader = ServiceReloader(
+    service_registry, upstream_pool, address_resolver, circuit_breakers, load_balancer, response_cache,
+    admission_controller, health_checker
+)
 
-# 세션 관리 (실제 프로덕션에서는 Redis나 DB 사용 권장)
-# 구조: {token: {"created_at": datetime, "username": str}}
-active_sessions: Dict[str, dict] = {}
+# 대시보드 정적 파일과 서버 생성 HTML 페이지 캐시
+static_assets = StaticAssetCache(Path(__file__).parent / "static")
+page_cache = PageCache()
+
+# 세션 관리 (SESSION_BACKEND=redis면 여러 워커/프로세스가 공유)
+session_store = create_session_store()
 SESSION_SECRET = secrets.token_urlsafe(32)
 
 # 최고 권한(API 정보 접근 가능) 계정 — 나중에 요청 승인 계정 목록으로 확장 가능
 ADMIN_USERNAMES = {"admin"}
 
 
-def create_session_token() -> str:
-    """세션 토큰 생성"""
-    return secrets.token_urlsafe(32)
-
-
-def verify_session(session_token: Optional[str] = None) -> bool:
-    """세션 검증"""
+async def verify_session(session_token: Optional[str] = None) -> bool:
+    """세션 검증 (만료 세션은 저장소가 정리)"""
     if not session_token:
         return False
-    if session_token in active_sessions:
-        s = active_sessions[session_token]
-        created = (s.get("created_at") if isinstance(s, dict) else s)
-        if created and datetime.now() - created < timedelta(hours=24):
-            return True
-        del active_sessions[session_token]
-    return False
+    return await session_store.get(session_token) is not None
 
 
-def get_session_username(session_token: Optional[str] = None) -> Optional[str]:
+async def get_session_username(session_token: Optional[str] = None) -> Optional[str]:
     """세션에서 사용자명 반환 (없으면 None)"""
-    if not session_token or session_token not in active_sessions:
+    if not session_token:
         return None
-    s = active_sessions[session_token]
-    if isinstance(s, dict) and "username" in s:
-        return s["username"]
-    return None
+    s = await session_store.get(session_token)
+    return s.get("username") if s else None
 
 
-def is_admin_user(session_token: Optional[str] = None) -> bool:
+async def is_admin_user(session_token: Optional[str] = None) -> bool:
     """최고 권한(API 정보 버튼 등 접근 가능) 여부"""
-    u = get_session_username(session_token)
+    u = await get_session_username(session_token)
     return u in ADMIN_USERNAMES if u else False
 
 
@@ -85,6 +108,9 @@ async def lifespan(app: FastAPI):
     # 시작 시
     logger.info("EAI Hub 시작 중...")
     await service_registry.load_services()
+    service_reloader.start()
+    await session_store.start()
+    access_log_writer.start()
     health_checker.start_periodic_check()
     logger.info("EAI Hub 시작 완료")
     
@@ -92,7 +118,14 @@ async def lifespan(app: FastAPI):
     
     # 종료 시
     logger.info("EAI Hub 종료 중...")
+    await service_reloader.stop()
     health_checker.stop()
+    status_broadcaster.close()
+    await session_store.aclose()
+    await access_log_writer.stop()
+    await health_checker.aclose()
+    await upstream_pool.aclose()
+    await address_resolver.aclose()
     logger.info("EAI Hub 종료 완료")
 
 
@@ -113,12 +146,16 @@ app.add_middleware(
 )
 
 
+# 요청 지연/바이트 메트릭 (/metrics), service 라벨은 등록된 서비스만
+app.add_middleware(MetricsMiddleware, is_known_service=lambda sid: service_registry.get_service(sid) is not None)
+
+
 @app.middleware("http")
 async def dashboard_access_log_middleware(request: Request, call_next):
     """대시보드 접속 시도 시 IP 기록 (개인 자료용)"""
     if request.url.path.rstrip("/") == "/dashboard":
         session_token = request.cookies.get("session_token")
-        username = get_session_username(session_token) if verify_session(session_token) else None
+        username = await get_session_username(session_token)
         log_dashboard_access(request, username=username)
     return await call_next(request)
 
@@ -129,9 +166,9 @@ def get_session_token(request: Request) -> Optional[str]:
     return request.cookies.get("session_token")
 
 
-def require_auth(session_token: Optional[str] = Depends(get_session_token)) -> bool:
+async def require_auth(session_token: Optional[str] = Depends(get_session_token)) -> bool:
     """인증 필요 체크"""
-    if not verify_session(session_token):
+    if not await verify_session(session_token):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="로그인이 필요합니다"
@@ -145,11 +182,17 @@ async def root(request: Request):
     session_token = get_session_token(request)
     
     # 이미 로그인되어 있으면 대시보드로 리다이렉트
-    if verify_session(session_token):
+    if await verify_session(session_token):
         return RedirectResponse(url="/dashboard", status_code=303)
     
-    # 로그인 페이지 HTML 반환
-    return """
+    # 로그인 페이지 HTML 반환 (내용이 고정이라 한 번 만들어 압축본과 함께 재사용)
+    page = page_cache.get(("login",))
+    if page is None:
+        page = page_cache.put(("login",), _LOGIN_PAGE_HTML)
+    return await page.response(request, "no-cache")
+
+
+_LOGIN_PAGE_HTML = """
     <!DOCTYPE html>
     <html lang="ko">
     <head>
@@ -368,8 +411,7 @@ async def login(request: Request):
     # 간단한 인증 (실제 프로덕션에서는 DB나 LDAP 사용)
     # 기본 계정: admin / admin
     if username == "admin" and password == "admin":
-        session_token = create_session_token()
-        active_sessions[session_token] = {"created_at": datetime.now(), "username": username}
+        session_token = await session_store.create(username)
         
         response = JSONResponse({"message": "로그인 성공", "redirect": "/dashboard"})
         response.set_cookie(
@@ -378,7 +420,7 @@ async def login(request: Request):
             httponly=True,
             secure=False,  # HTTPS 사용 시 True로 변경
             samesite="lax",
-            max_age=86400  # 24시간
+            max_age=settings.SESSION_TTL
         )
         return response
     else:
@@ -392,8 +434,8 @@ async def login(request: Request):
 async def logout(request: Request):
     """로그아웃 API"""
     session_token = get_session_token(request)
-    if session_token and session_token in active_sessions:
-        del active_sessions[session_token]
+    if session_token:
+        await session_store.delete(session_token)
 
     response = JSONResponse({"message": "로그아웃되었습니다"})
     response.delete_cookie(key="session_token")
@@ -411,10 +453,10 @@ async def receive_incident_report(payload: dict):
 async def get_current_user(request: Request):
     """현재 로그인 사용자 정보 (이름, 최고 권한 여부)"""
     session_token = get_session_token(request)
-    if not verify_session(session_token):
+    if not await verify_session(session_token):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="로그인이 필요합니다")
-    username = get_session_username(session_token) or ""
-    return {"username": username, "is_admin": is_admin_user(session_token)}
+    username = (await get_session_username(session_token)) or ""
+    return {"username": username, "is_admin": await is_admin_user(session_token)}
 
 
 def _is_download_available(service_id: str, filename: str) -> bool:
@@ -451,15 +493,15 @@ async def service_detail_page(service_id: str, request: Request):
     """서비스 상세 정보 페이지"""
     # 인증되지 않으면 로그인 페이지로 리다이렉트
     session_token = get_session_token(request)
-    if not verify_session(session_token):
+    if not await verify_session(session_token):
         return RedirectResponse(url="/", status_code=303)
 
     service = service_registry.get_service(service_id)
     if not service:
         raise HTTPException(status_code=404, detail=f"서비스 '{service_id}'를 찾을 수 없습니다")
     
-    # 헬스체크 정보 가져오기
-    health_status = await health_checker.check_service(service_id)
+    # 헬스체크 정보 가져오기 (HEALTH_STATUS_MAX_AGE 이내면 캐시)
+    health_status = await health_checker.get_status(service_id)
     
     # 서비스 정보를 HTML로 렌더링
     service_dict = service.model_dump()
@@ -521,7 +563,7 @@ async def service_detail_page(service_id: str, request: Request):
 
     # API 접속 / API 정보 / 다운로드 링크
     session_token = get_session_token(request)
-    show_api_info = is_admin_user(session_token)
+    show_api_info = await is_admin_user(session_token)
     api_link_html = ""
     api_info_link_html = ""
     download_link_html = ""
@@ -546,6 +588,12 @@ async def service_detail_page(service_id: str, request: Request):
         service_access_url = f"/api/{service_id}/"
     service_access_link = f'<a href="#" class="btn btn-primary" onclick="openServiceAccess(event, \'{service_id}\', \'{service_access_url}\')">서비스 접속</a>'
 
+    # 서비스 설정과 헬스체크 결과가 그대로면 이전에 만든 페이지 재사용
+    page_key = ("service_detail", service_id, show_api_info, download_available, service_access_url)
+    page = page_cache.get(page_key, service, health_status)
+    if page is not None:
+        return await page.response(request, "private, no-cache")
+
     html_content = f"""
     <!DOCTYPE html>
     <html lang="ko">
@@ -861,16 +909,16 @@ async def service_detail_page(service_id: str, request: Request):
     </html>
     """
     
-    return HTMLResponse(content=html_content)
+    return await page_cache.put(page_key, html_content, service, health_status).response(request, "private, no-cache")
 
 
 @app.get("/services/{service_id}/api-info", response_class=HTMLResponse)
 async def service_api_info_page(service_id: str, request: Request):
     """API 정보 페이지 - 최고 권한(admin)만 접근 가능"""
     session_token = get_session_token(request)
-    if not verify_session(session_token):
+    if not await verify_session(session_token):
         return RedirectResponse(url="/", status_code=303)
-    if not is_admin_user(session_token):
+    if not await is_admin_user(session_token):
         return RedirectResponse(
             url="/dashboard?error=api_info_forbidden",
             status_code=303
@@ -883,6 +931,10 @@ async def service_api_info_page(service_id: str, request: Request):
         raise HTTPException(status_code=400, detail="이 서비스는 API 엔드포인트를 제공하지 않습니다.")
 
     base = str(request.base_url).rstrip("/")
+    page_key = ("api_info", service_id, base)
+    page = page_cache.get(page_key, service)
+    if page is not None:
+        return await page.response(request, "private, no-cache")
     api_base_url = f"{base}/api/{service_id}"
     service_dict = service.model_dump()
 
@@ -990,7 +1042,7 @@ async def service_api_info_page(service_id: str, request: Request):
     </body>
     </html>
     """
-    return HTMLResponse(content=html_content)
+    return await page_cache.put(page_key, html_content, service).response(request, "private, no-cache")
 
 
 @app.get("/api/services/{service_id}")
@@ -1003,24 +1055,52 @@ async def get_service(service_id: str):
 
 
 @app.get("/api/health")
-async def health_check():
-    """전체 서비스 헬스체크"""
+async def health_check(refresh: bool = False):
+    """전체 서비스 헬스체크 (주기 체크 결과 캐시, refresh=true면 즉시 재확인)"""
     services = service_registry.get_all_services()
-    health_status = await health_checker.check_all_services()
+    health_status = await health_checker.get_statuses(force=refresh)
     
     healthy_count = sum(1 for status in health_status.values() if status.is_healthy)
+    now = datetime.now()
     
     return {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now.isoformat(),
         "total_services": len(services),
         "healthy_services": healthy_count,
         "unhealthy_services": len(services) - healthy_count,
         "services": {
-            service_id: status.model_dump() for service_id, status in health_status.items()
+            service_id: {
+                **status.model_dump(),
+                "age_seconds": round((now - status.last_check).total_seconds(), 1)
+            }
+            for service_id, status in health_status.items()
         }
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus 메트릭 (AIIncidentIntelligencePlatform Prometheus가 수집)"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/api/health/stream")
+async def health_stream():
+    """서비스 상태 변경 스트림 (SSE) - 연결 시 현재 상태 전체, 이후 변경분만 전송"""
+    subscription = status_broadcaster.subscribe(health_checker.get_cached_statuses())
+    if subscription is None:
+        raise HTTPException(
+            status_code=503,
+            detail="상태 스트림 구독자가 너무 많습니다. /api/health를 사용하세요",
+            headers={"Retry-After": "30"}
+        )
+    return StreamingResponse(
+        status_broadcaster.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/api/health/{service_id}")
 async def service_health_check(service_id: str):
     """특정 서비스 헬스체크"""
@@ -1057,23 +1137,53 @@ async def service_health_check_debug(service_id: str):
         }
 
 
-def _check_urls_to_try(url: str) -> list:
-    """localhost/127.0.0.1/::1 교차 시도용 URL 목록"""
-    try:
-        from urllib.parse import urlparse
-        p = urlparse(url)
-        if p.hostname not in ("localhost", "127.0.0.1", "::1"):
-            return [url]
-        scheme = p.scheme or "http"
-        port = f":{p.port}" if p.port else ""
-        path = (p.path or "/") + (f"?{p.query}" if p.query else "")
-        return [
-            f"{scheme}://localhost{port}{path}",
-            f"{scheme}://127.0.0.1{port}{path}",
-            f"{scheme}://[::1]{port}{path}",
-        ]
-    except Exception:
-        return [url]
+@app.get("/api/pool-stats")
+async def pool_stats():
+    """서비스별 업스트림 연결 풀 상태 (진행 중 요청 수, 설정 한도) 및 학습된 접속 주소"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "pools": upstream_pool.get_stats(),
+        "draining": upstream_pool.draining_count,
+        "addresses": address_resolver.get_preferred()
+    }
+
+
+@app.get("/api/cache-stats")
+async def cache_stats():
+    """프록시 응답 캐시, 정적 파일 캐시, HTML 페이지 캐시 통계"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "cache": response_cache.get_stats(),
+        "static": static_assets.get_stats(),
+        "pages": page_cache.get_stats()
+    }
+
+
+@app.get("/api/instances")
+async def instance_status():
+    """다중 인스턴스 서비스의 인스턴스별 상태 (정상 여부, 대기 요청, EWMA 응답시간)"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "services": load_balancer.get_stats()
+    }
+
+
+@app.get("/api/circuit-breakers")
+async def circuit_breaker_status():
+    """서비스별 서킷 브레이커 상태 (closed / open / half_open)"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "circuits": circuit_breakers.get_stats()
+    }
+
+
+@app.get("/api/admission")
+async def admission_status():
+    """서비스별 입장 제어 상태 (처리 중 / 대기 중 요청 수, 거절 횟수)"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "services": admission_controller.get_stats()
+    }
 
 
 @app.get("/api/check-service-access/{service_id}")
@@ -1088,12 +1198,14 @@ async def check_service_access(service_id: str, request: Request):
         urls_to_try = [f"{str(request.base_url).rstrip('/')}/api/{service_id}/"]
     else:
         base_url = service.get_health_url() or f"{service.base_url.rstrip('/')}/"
-        urls_to_try = _check_urls_to_try(base_url)
+        urls_to_try = address_resolver.candidates(service_id, base_url)
     last_err = None
     for url in urls_to_try:
         try:
             async with httpx.AsyncClient(timeout=5, follow_redirects=True) as client:
                 resp = await client.get(url)
+                if not use_proxy_path:
+                    address_resolver.record_success(service_id, url)
                 if resp.status_code >= 300:
                     raise HTTPException(status_code=503, detail="서비스에 접근할 수 없습니다")
                 return {"ok": True}
@@ -1101,6 +1213,8 @@ async def check_service_access(service_id: str, request: Request):
             raise
         except Exception as e:
             last_err = e
+            if isinstance(e, httpx.ConnectError) and not use_proxy_path:
+                address_resolver.record_failure(service_id, url)
             if url == urls_to_try[-1]:
                 raise HTTPException(status_code=503, detail="서비스에 접근할 수 없습니다")
     raise HTTPException(status_code=503, detail="서비스에 접근할 수 없습니다")
@@ -1147,7 +1261,7 @@ async def coffee_path_redirect(request: Request):
 
 
 # 슬래시 없는 /api/{service_id} 요청 → 리다이렉트 (proxy 먼저 등록해 POST /api/experiments 직접 프록시)
-_RESERVED_API_PATHS = {"services", "health", "me", "check-service-access", "auth", "download"}
+_RESERVED_API_PATHS = {"services", "health", "me", "check-service-access", "auth", "download", "pool-stats", "circuit-breakers", "instances", "cache-stats", "admission"}
 
 
 @app.api_route("/api/{service_id}/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"])
@@ -1193,18 +1307,17 @@ async def api_service_redirect(service_id: str, request: Request):
 async def dashboard(request: Request):
     """대시보드 페이지"""
     session_token = get_session_token(request)
-    if not verify_session(session_token):
+    if not await verify_session(session_token):
         r = RedirectResponse(url="/", status_code=303)
         r.headers["Cache-Control"] = "no-store, no-cache, must-revalidate"
         return r
-    dashboard_path = Path(__file__).parent / "static" / "dashboard.html"
-    return FileResponse(dashboard_path, media_type="text/html")
+    return await static_assets.response(request, "dashboard.html", "private, no-cache")
 
 
-# 정적 파일 서빙 (대시보드)
-static_dir = Path(__file__).parent / "static"
-if static_dir.exists():
-    app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
+# 정적 파일 서빙 (메모리 캐시 + gzip/brotli, 파일명/?v= 해시 자산은 immutable)
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def static_file(path: str, request: Request):
+    return await static_assets.response(request, path)
 
 
 if __name__ == "__main__":
@@ -1225,5 +1338,7 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=port,
         reload=settings.DEBUG,
-        log_level="info"
+        log_level="info",
+        # 열린 상태 스트림(SSE)이 종료를 막지 않도록 대기 시간 제한
+        timeout_graceful_shutdown=5
     )